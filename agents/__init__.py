@@ -1,18 +1,33 @@
-from .summarizer_agent import summarize_sections_from_file
-from .research_agent import (extract_topics_from_json, enrich_topic)
+from .summarizer_agent import (
+    reduce_to_chapters,
+    summarize_sections,
+    summarize_sections_from_file
+)
+from .research_agent import (
+    extract_topics_from_json,
+    enrich_topic,
+    enrich_topics
+)
 from .atlas_agent import (
     build_lesson,
     build_blocks,
     create_page,
-    append_blocks
+    append_blocks,
+    pair_with_enrichment,
+    stream_lessons_to_page
 )
 
 __all__ = [
+    "reduce_to_chapters",
+    "summarize_sections",
     "summarize_sections_from_file",
     "extract_topics_from_json",
     "enrich_topic",
+    "enrich_topics",
     "build_lesson",
     "build_blocks",
     "create_page",
     "append_blocks",
+    "pair_with_enrichment",
+    "stream_lessons_to_page",
 ]
@@ -1,262 +1,216 @@
 import random
 import os
-import json
-import re
-from notion_client import Client
+import sys
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+
 from dotenv import load_dotenv
-from typing import List, Dict, Tuple
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize Notion client
-notion = Client(auth=os.getenv("NOTION_TOKEN"))
-
-
-atlas_agent = Agent(
-    name="Atlas",
-    role=(
-        "Tansform summaries and research into structured "
-        "educational lessons."
-    ),
-    model=OpenAIChat(id="gpt-4o"),
-    description=(
-        "You are a brilliant educational agent with a passion for "
-        "clear explanations. "
-        "Your job is to take summarized content and external research "
-        "on the same topic. "
-        "and combine them into a single, engaging, well-structured "
-        "textbook lesson. "
-    ),
-    instructions=[
-        (
-            "Combine the summarized content and the enrichhment "
-            "into a cohesive lesson. "
-        ),
-        (
-            "Structure it clearly using markdown headings, subheadings, "
-            "bullet points, quotes, toggle lists, callout boxes, "
-            "and paragraphs. "
-        ),
-        (
-            "Avoid redundancy. Rephrase overlapping points and integrate "
-            "definitions and examples from enrichment when helpful."
-        ),
-        (
-            "Ensure it reads like a high-quality educational blog "
-            "or chapter from a learning course."
-        ),
-        (
-            "Always begin with a single main heading (#) as the lesson title"
-        ),
-        (
-            "Then structure the lesson with logical sections (##) and "
-            "smaller subsections (###) as approriate."
-        ),
-        (
-            "Make the lesson visually appealing, using quotes "
-            "and lists when helpful."
-        ),
-        (
-            "Do NOT mention 'summary' or 'enrichment'. Merge them naturally "
-            "into a fluid lesson"
-        ),
-        (
-            "Use code blocks as examples when appropriate."
-        ),
-        (
-            """Always put quotes and non-code examples in Notion's "
-            "quotes blocks by adding a '" ' before the text."""
-        ),
-        (
-            "Do not use any HTML tags under any circumstances."
-            "Tags like <details> and <summary> are not allowed."
-        ),
-        (
-            "When using URLs, always put them below a "
-            "'### For Further Reading' section."
+
+from agents.routing import get_model_router
+from agents.runner import run_agent, shared_agent, stream_agent
+from core.artifact_store import get_artifact_store
+from core.metrics import in_current_context, metrics
+from core.notion_blocks import (
+    NotionBlockBuilder,
+    markdown_to_blocks,
+    parse_inline
+)
+from core.notion_sync import plan_page_update, published_blocks
+from core.notion_writer import get_notion_writer
+from processors.topic_matcher import TopicMatcher
+
+# Put into a lesson's queue once its worker has finished.
+_LESSON_DONE = object()
+
+
+@shared_agent
+def get_atlas_agent():
+    """
+    Returns the Atlas agent, building it on first use.
+    """
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    return Agent(
+        name="Atlas",
+        role=(
+            "Tansform summaries and research into structured "
+            "educational lessons."
         ),
-        (
-            "Do not organize URLs like this: [text](url) or ![text](url). "
-            "Never! "
-            "Instead, paste the full URL."
+        model=OpenAIChat(id=get_model_router().primary("atlas")),
+        description=(
+            "You are a brilliant educational agent with a passion for "
+            "clear explanations. "
+            "Your job is to take summarized content and external research "
+            "on the same topic. "
+            "and combine them into a single, engaging, well-structured "
+            "textbook lesson. "
         ),
-    ],
-    markdown=True
-)
+        instructions=[
+            (
+                "Combine the summarized content and the enrichhment "
+                "into a cohesive lesson. "
+            ),
+            (
+                "Structure it clearly using markdown headings, subheadings, "
+                "bullet points, quotes, toggle lists, callout boxes, "
+                "and paragraphs. "
+            ),
+            (
+                "Avoid redundancy. Rephrase overlapping points and integrate "
+                "definitions and examples from enrichment when helpful."
+            ),
+            (
+                "Ensure it reads like a high-quality educational blog "
+                "or chapter from a learning course."
+            ),
+            (
+                "Always begin with a single main heading (#) as the lesson "
+                "title"
+            ),
+            (
+                "Then structure the lesson with logical sections (##) and "
+                "smaller subsections (###) as approriate."
+            ),
+            (
+                "Make the lesson visually appealing, using quotes "
+                "and lists when helpful."
+            ),
+            (
+                "Do NOT mention 'summary' or 'enrichment'. Merge them "
+                "naturally into a fluid lesson"
+            ),
+            (
+                "Use code blocks as examples when appropriate."
+            ),
+            (
+                """Always put quotes and non-code examples in Notion's "
+                "quotes blocks by adding a '" ' before the text."""
+            ),
+            (
+                "Do not use any HTML tags under any circumstances."
+                "Tags like <details> and <summary> are not allowed."
+            ),
+            (
+                "When using URLs, always put them below a "
+                "'### For Further Reading' section."
+            ),
+            (
+                "Do not organize URLs like this: [text](url) or ![text](url). "
+                "Never! Instead, paste the full URL."
+            ),
+        ],
+        markdown=True
+    )
 
 
 def parse_markdown_to_rich_text(line: str) -> List[Dict]:
-    segments = []
-    pattern = r'(\*\*.*?\*\*|\*.*?\*|[^*]+)'
-    matches = re.findall(pattern, line)
-    for match in matches:
-        if match.startswith('**') and match.endswith('**'):
-            segments.append({
-                "type": "text",
-                "text": {"content": match[2:-2]},
-                "annotations": {"bold": True, "italic": False}
-            })
-        elif match.startswith('*') and match.endswith('*'):
-            segments.append({
-                "type": "text",
-                "text": {"content": match[1:-1]},
-                "annotations": {"bold": False, "italic": True}
-            })
-        else:
-            segments.append({
-                "type": "text",
-                "text": {"content": match},
-                "annotations": {"bold": False, "italic": False}
-            })
-    return segments
-
-
-def load_json(file_prefix: str) -> Tuple[List[Dict], str]:
-    input_dir = "transcript_files"
-    files = [
-        f for f in os.listdir(input_dir) if f.startswith(file_prefix)
-    ]
-    if not files:
-        raise FileNotFoundError(f"No files found with prefix: {file_prefix}")
-    with open(os.path.join(input_dir, files[0]), "r", encoding="utf-8") as f:
-        return json.load(f), re.search(
-            rf"{file_prefix}_(.+)\.json", files[0]
-        ).group(1)
+    """
+    Converts one line of inline Markdown into Notion rich text objects.
+    """
+    return parse_inline(line)
+
+
+def load_json(name: str,
+              video_id: Optional[str] = None) -> Tuple[List[Dict], str]:
+    """
+    Loads an artifact of a processed video from the artifact store.
+
+    Args:
+        name (str): Artifact name, e.g. `summarized_sections`.
+        video_id (Optional[str]): The video to load it for. Defaults to the
+        most recently processed video.
+
+    Returns:
+        Tuple[List[Dict], str]: The artifact and the video ID it belongs to.
+    """
+    store = get_artifact_store()
+    if video_id is None:
+        video_id = store.latest_video()
+    return store.get(video_id, name), video_id
 
 
 def build_blocks(section: Dict) -> List[Dict]:
-    text = section.get("summary", "")
-    lines = text.strip().split("\n")
-    blocks = []
-
-    within_code_block = False
-    code_lines = []
-    code_language = ""
-
-    for line in lines:
-        if line.strip().startswith("```") and not within_code_block:
-            within_code_block = True
-            code_language = line.strip().replace("```", "").strip().lower()
-            valid_languages = {
-                "abap", "agda", "arduino", "ascii art", "assembly", "bash",
-                "basic", "bnf", "c", "c#", "c++", "clojure", "coffeescript",
-                "coq", "css", "dart", "dhall", "diff", "docker", "ebnf",
-                "elixir", "elm", "erlang", "f#", "flow", "fortran", "gherkin",
-                "glsl", "go", "graphql", "groovy", "haskell", "hcl", "html",
-                "idris", "java", "javascript", "json", "julia", "kotlin",
-                "latex", "less", "lisp", "livescript", "llvm ir", "lua",
-                "makefile", "markdown", "markup", "matlab", "mathematica",
-                "mermaid", "nix", "notion formula", "objective-c", "ocaml",
-                "pascal", "perl", "php", "plain text", "powershell", "prolog",
-                "protobuf", "purescript", "python", "r", "racket", "reason",
-                "ruby", "rust", "sass", "scala", "scheme", "scss", "shell",
-                "smalltalk", "solidity", "sql", "swift", "toml", "typescript",
-                "vb.net", "verilog", "vhdl", "visual basic", "webassembly",
-                "xml", "yaml", "java/c/c++/c#", "notionscript"
-            }
-            if code_language not in valid_languages:
-                code_language = "plain text"
-            code_lines = []
-        elif line.strip().startswith("```") and within_code_block:
-            within_code_block = False
-            blocks.append({
-                "object": "block",
-                "type": "code",
-                "code": {
-                    "rich_text": [{"type": "text", "text": {
-                        "content": "\n".join(code_lines)
-                    }}],
-                    "language": code_language
-                }
-            })
-            code_language = ""
-            continue
-        elif within_code_block:
-            code_lines.append(line)
-            continue
-
-        elif line.startswith("# "):
-            blocks.append({
-                "object": "block",
-                "type": "heading_1",
-                "heading_1": {
-                    "rich_text": parse_markdown_to_rich_text(line[2:].strip())
-                }
-            })
-        elif line.startswith("## "):
-            blocks.append({
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {
-                    "rich_text": parse_markdown_to_rich_text(line[3:].strip())
-                }
-            })
-
-        elif line.startswith("### "):
-            blocks.append({
-                "object": "block",
-                "type": "heading_3",
-                "heading_3": {
-                    "rich_text": parse_markdown_to_rich_text(line[3:].strip())
-                }
-            })
-
-        elif line.startswith("#### "):
-            blocks.append({
-                "object": "block",
-                "type": "heading_3",
-                "heading_3": {
-                    "rich_text": parse_markdown_to_rich_text(line[5:].strip())
-                }
-            })
-        elif line.startswith("•") or line.startswith("- "):
-            blocks.append({
-                "object": "block",
-                "type": "bulleted_list_item",
-                "bulleted_list_item": {
-                    "rich_text": parse_markdown_to_rich_text(line.lstrip(
-                        "•- "
-                    ).strip())
-                }
-            })
-        elif line.strip() == "---":
-            blocks.append({
-                "object": "block",
-                "type": "divider", "divider": {}
-            })
-        elif line.startswith("> "):
-            blocks.append({
-                "object": "block",
-                "type": "quote",
-                "quote": {
-                    "rich_text": parse_markdown_to_rich_text(line[2:].strip())
-                }
-            })
-        elif line:
-            chunks = [line[i:i+2000] for i in range(0, len(line), 2000)]
-            for chunk in chunks:
-                blocks.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": parse_markdown_to_rich_text(chunk.strip())
-                    }
-                })
-    return blocks
+    """
+    Converts the Markdown `summary` of a section into Notion blocks.
+    """
+    return markdown_to_blocks(section.get("summary", ""))
 
 
-def build_lesson(summary: str, enrichment: str) -> List[Dict]:
-    lesson_input = (
+def lesson_input(summary: str, enrichment: str) -> str:
+    return (
         f"=== Summarized Content ===\n{summary.strip()}\n\n"
         f"=== Enrichment ===\n{enrichment.strip()}\n\n"
     )
-    response = atlas_agent.run(lesson_input)
-    return build_blocks({
-        "summary": str(response.content)
-    })
+
+
+def pair_with_enrichment(
+    sections: List[Dict], enrichment_data: Dict[str, str]
+) -> List[Tuple[str, str]]:
+    """
+    Pairs every section summary with the research on all the topics it
+    mentions, most mentioned first.
+
+    Args:
+        sections (List[Dict]): Summarized sections with a 'summary' key.
+        enrichment_data (Dict[str, str]): Research content keyed by topic.
+
+    Returns:
+        List[Tuple[str, str]]: One (summary, enrichment) pair per section.
+    """
+    matcher = TopicMatcher(list(enrichment_data))
+    order = {topic: i for i, topic in enumerate(enrichment_data)}
+    lesson_inputs = []
+    for section, hits in zip(sections, matcher.match_sections(sections)):
+        topics = sorted(hits, key=lambda topic: (-hits[topic], order[topic]))
+        enrichment = "\n\n".join(
+            enrichment_data[topic].strip()
+            for topic in topics
+            if enrichment_data[topic]
+        )
+        lesson_inputs.append((section.get("summary", ""), enrichment))
+    return lesson_inputs
+
+
+def build_lesson(summary: str, enrichment: str) -> List[Dict]:
+    with metrics.measure("build_lesson"):
+        content = run_agent(
+            get_atlas_agent(), lesson_input(summary, enrichment),
+            stage="atlas",
+        )
+        return build_blocks({
+            "summary": content
+        })
+
+
+def stream_lesson(summary: str, enrichment: str) -> Iterator[Dict]:
+    """
+    Builds a lesson like `build_lesson`, but yields each top-level block as
+    soon as the model has finished writing it instead of waiting for the
+    whole lesson.
+
+    The delay until the first block is recorded as `first_block_seconds`
+    on the `build_lesson` metrics event.
+    """
+    builder = NotionBlockBuilder()
+    with metrics.measure("build_lesson") as event:
+        started = time.perf_counter()
+        deltas = stream_agent(
+            get_atlas_agent(), lesson_input(summary, enrichment),
+            stage="atlas",
+        )
+        # The trailing None flushes the blocks still open at the end.
+        for delta in chain(deltas, [None]):
+            blocks = builder.feed(delta) if delta else builder.close()
+            for block in blocks:
+                event.setdefault(
+                    "first_block_seconds",
+                    round(time.perf_counter() - started, 3),
+                )
+                yield block
 
 
 def create_page(title: str) -> str:
@@ -274,57 +228,389 @@ def create_page(title: str) -> str:
     selected_icon = random.choice(education_icons)
     selected_cover = random.choice(education_covers)
 
-    page = notion.pages.create(
-        parent={"page_id": os.getenv("NOTION_PARENT_PAGE_ID")},
-        properties={
-            "title": {
-                "title": [
-                    {
-                        "type": "text",
-                        "text": {"content": f"Atlas Summary: {title}"}
-                    }
-                ]
-            }
-        },
-        icon={"type": "emoji", "emoji": selected_icon},
-        cover={"type": "external", "external": {"url": selected_cover}},
-    )
+    with metrics.measure("create_page"):
+        page = get_notion_writer().create_page(
+            parent={"page_id": os.getenv("NOTION_PARENT_PAGE_ID")},
+            properties={
+                "title": {
+                    "title": [
+                        {
+                            "type": "text",
+                            "text": {"content": f"Atlas Summary: {title}"}
+                        }
+                    ]
+                }
+            },
+            icon={"type": "emoji", "emoji": selected_icon},
+            cover={"type": "external", "external": {"url": selected_cover}},
+        )
     return page["id"]
 
 
-def append_blocks(page_id: str, blocks: List[Dict]):
+def append_blocks(page_id: str, blocks: List[Dict],
+                  after: Optional[str] = None) -> List[str]:
+    """
+    Appends blocks to a page, 100 per request.
+
+    Args:
+        page_id (str): The page to append to.
+        blocks (List[Dict]): The blocks, in order.
+        after (Optional[str]): Insert the blocks right after this block of
+        the page instead of at its end.
+
+    Returns:
+        List[str]: The IDs of the appended blocks.
+    """
+    writer = get_notion_writer()
+    block_ids = []
     for i in range(0, len(blocks), 100):
         batch = blocks[i:i + 100]
-        notion.blocks.children.append(block_id=page_id, children=batch)
+        with metrics.measure("append_blocks", blocks=len(batch)):
+            response = writer.append_children(page_id, batch, after=after)
+        batch_ids = [block["id"] for block in response.get("results", [])]
+        block_ids.extend(batch_ids)
+        if after and batch_ids:
+            after = batch_ids[-1]
+    return block_ids
 
 
-if __name__ == "__main__":
-    sections, video_id = load_json("summarized_sections")
-    print(f"Loading: summarized_sections_{video_id}.json")
+def delete_blocks(block_ids: List[str]) -> None:
+    """
+    Deletes blocks, e.g. those of a section an interrupted run had only
+    partially appended. Blocks that cannot be deleted are reported and
+    skipped.
+    """
+    writer = get_notion_writer()
+    for block_id in block_ids:
+        try:
+            with metrics.measure("delete_block"):
+                writer.delete_block(block_id)
+        except Exception as e:
+            print(f"Could not delete block {block_id}: {repr(e)}")
 
-    blocks: List[Dict] = []
 
-    enrichment_path = f"transcript_files/research_enrichment_{video_id}.json"
-    with open(enrichment_path, "r", encoding="utf-8") as f:
-        enrichment_data = json.load(f)
-    print(f"\nLoading enrichment file: research_enrichment_{video_id}.json")
-    print("\nAtlas is working on building a lesson…")
+def list_block_ids(page_id: str) -> List[str]:
+    """
+    Returns the IDs of the top-level blocks of a page, in order.
+    """
+    writer = get_notion_writer()
+    block_ids: List[str] = []
+    cursor = None
+    while True:
+        with metrics.measure("list_blocks"):
+            response = writer.list_children(page_id, start_cursor=cursor)
+        block_ids.extend(block["id"] for block in response["results"])
+        cursor = response.get("next_cursor")
+        if not response.get("has_more") or not cursor:
+            return block_ids
 
-    for section in sections:
-        summary = section.get("summary", "")
-        topic_keys = enrichment_data.keys()
-        matched_topics = next(
-            (key for key in topic_keys if key.lower() in summary.lower()), None
+
+def update_page(
+    page_id: str,
+    published: List[Dict],
+    blocks: List[Dict],
+    on_published: Optional[Callable[[List[Dict]], None]] = None,
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Makes an existing page hold `blocks` with as few requests as possible.
+
+    Unchanged blocks are left alone, changed ones are updated in place when
+    Notion allows it, and only the rest are deleted or inserted (see
+    `core.notion_sync.plan_page_update`).
+
+    Args:
+        page_id (str): The page to update.
+        published (List[Dict]): The blocks the page holds, as returned by
+        `core.notion_sync.published_blocks` when they were written.
+        blocks (List[Dict]): The blocks the page should hold.
+        on_published (Optional[Callable[[List[Dict]], None]]): Called with
+        the blocks the page holds once the update ends, also when a request
+        fails partway, so that the next update does not write the blocks
+        inserted so far again.
+
+    Returns:
+        Tuple[List[Dict], Dict[str, int]]: The page's new blocks, as
+        described by `published_blocks`, and the number of blocks kept,
+        updated, inserted and deleted.
+    """
+    ops, block_ids = plan_page_update(published, blocks)
+    writer = get_notion_writer()
+    counts = {"kept": len(block_ids), "updated": 0, "inserted": 0,
+              "deleted": 0}
+    # The page's blocks, in order, as each operation leaves them.
+    current = list(published)
+
+    def position(block_id: str) -> int:
+        return next(
+            i for i, entry in enumerate(current) if entry["id"] == block_id
         )
-        enrichment = enrichment_data.get(
-            matched_topics, ""
-        ) if matched_topics else ""
-        blocks.extend(build_lesson(summary, enrichment))
 
-    print(f"\nTotal blocks: {len(blocks)}")
+    try:
+        for op in ops:
+            if op[0] == "update":
+                _, block_id, index = op
+                with metrics.measure("update_block"):
+                    writer.update_block(block_id, blocks[index])
+                current[position(block_id)] = published_blocks(
+                    [blocks[index]], [block_id]
+                )[0]
+                counts["updated"] += 1
+            elif op[0] == "delete":
+                delete_blocks([op[1]])
+                del current[position(op[1])]
+                counts["deleted"] += 1
+            else:
+                _, anchor, indexes = op
+                after = None
+                if anchor is not None:
+                    kind, ref = anchor
+                    after = ref if kind == "old" else block_ids[ref]
+                # One request at a time, so the blocks of every request
+                # that succeeded are known if a later one fails.
+                for i in range(0, len(indexes), 100):
+                    batch = indexes[i:i + 100]
+                    inserted = append_blocks(
+                        page_id, [blocks[j] for j in batch], after=after
+                    )
+                    block_ids.update(zip(batch, inserted))
+                    at = position(after) + 1 if after else len(current)
+                    current[at:at] = published_blocks(
+                        [blocks[j] for j in batch], inserted
+                    )
+                    if inserted:
+                        after = inserted[-1]
+                counts["inserted"] += len(indexes)
+    finally:
+        if on_published:
+            on_published(list(current))
+    counts["kept"] -= counts["updated"]
+    return current, counts
+
+
+def build_lessons(
+    lesson_inputs: List[Tuple[str, str]],
+    max_workers: int = 4,
+    lessons: Optional[Dict[int, List[Dict]]] = None,
+    on_lesson_built: Optional[Callable[[int, List[Dict]], None]] = None,
+) -> Dict[int, List[Dict]]:
+    """
+    Builds the lessons of every section concurrently, without writing them
+    to Notion.
+
+    Args:
+        lesson_inputs (List[Tuple[str, str]]): `(summary, enrichment)` pairs,
+        one per section, in page order.
+        max_workers (int): Maximum number of lessons generated concurrently.
+        lessons (Optional[Dict[int, List[Dict]]]): Blocks of lessons already
+        built by an earlier run, keyed by section index.
+        on_lesson_built (Optional[Callable[[int, List[Dict]], None]]):
+        Called with `(section_index, blocks)` from worker threads as soon as
+        each new lesson is built.
+
+    Returns:
+        Dict[int, List[Dict]]: The blocks of every lesson, keyed by section
+        index. Lessons that failed are missing.
+    """
+    lessons = dict(lessons or {})
+
+    def build(index: int, summary: str, enrichment: str) -> None:
+        try:
+            blocks = build_lesson(summary, enrichment)
+        except Exception as e:
+            print(
+                f"An error occurred while building lesson {index}: {repr(e)}"
+            )
+            return
+        lessons[index] = blocks
+        if on_lesson_built:
+            on_lesson_built(index, blocks)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        build = in_current_context(build)
+        for index, (summary, enrichment) in enumerate(lesson_inputs):
+            if index not in lessons:
+                executor.submit(build, index, summary, enrichment)
+    return lessons
+
+
+def _next_blocks(sink: queue.Queue) -> Iterator[List[Dict]]:
+    # Yields the blocks a lesson worker puts into `sink` until it is done,
+    # grouping those already waiting so that each append request carries
+    # as many blocks as are ready.
+    while True:
+        batch: List[Dict] = []
+        item = sink.get()
+        while item is not _LESSON_DONE:
+            batch.extend(item)
+            if len(batch) >= 100:
+                break
+            try:
+                item = sink.get_nowait()
+            except queue.Empty:
+                break
+        if batch:
+            yield batch
+        if item is _LESSON_DONE:
+            return
+
+
+def stream_lessons_to_page(
+    title: str,
+    lesson_inputs: List[Tuple[str, str]],
+    max_workers: int = 4,
+    on_section_appended: Optional[Callable[[int, int], None]] = None,
+    on_page_created: Optional[Callable[[str], None]] = None,
+    page_id: Optional[str] = None,
+    lessons: Optional[Dict[int, List[Dict]]] = None,
+    start_index: int = 0,
+    on_lesson_built: Optional[Callable[[int, List[Dict]], None]] = None,
+    stream: bool = False,
+    partial_block_ids: Optional[List[str]] = None,
+    on_blocks_appended: Optional[Callable[[int, List[str]], None]] = None,
+) -> Tuple[str, int]:
+    """
+    Creates a Notion page and fills it with lessons as they are generated.
+
+    The page is created up front and lessons are built concurrently. Each
+    section's blocks are appended as soon as that section and every earlier
+    one are done, so content reaches Notion in section order while later
+    lessons are still being written. With `stream`, the section being
+    appended is sent block by block while the model is still writing it.
+
+    If a lesson fails, the blocks it had already appended are deleted and
+    no later section is appended, though the remaining lessons are still
+    built. The page is then incomplete: passing it and the number of
+    sections appended to a later call finishes it.
+
+    Args:
+        title (str): Title of the Notion page.
+        lesson_inputs (List[Tuple[str, str]]): `(summary, enrichment)` pairs,
+        one per section, in page order.
+        max_workers (int): Maximum number of lessons generated concurrently.
+        on_section_appended (Optional[Callable[[int, int], None]]): Called
+        with `(section_index, block_count)` after each section is appended,
+        up to the first failed one.
+        on_page_created (Optional[Callable[[str], None]]): Called with the
+        page ID as soon as the page exists.
+        page_id (Optional[str]): An existing page to resume filling instead
+        of creating a new one.
+        lessons (Optional[Dict[int, List[Dict]]]): Blocks of lessons already
+        built by an earlier run, keyed by section index.
+        start_index (int): Number of leading sections already appended to
+        `page_id` by an earlier run.
+        on_lesson_built (Optional[Callable[[int, List[Dict]], None]]):
+        Called with `(section_index, blocks)` from worker threads as soon as
+        each new lesson is built.
+        stream (bool): Stream lessons from the model and append their blocks
+        as they are completed.
+        partial_block_ids (Optional[List[str]]): Blocks of section
+        `start_index` that an interrupted run had already appended. They
+        are deleted before the section is appended again.
+        on_blocks_appended (Optional[Callable[[int, List[str]], None]]):
+        Called with `(section_index, block_ids)` after each append request,
+        with the IDs of every block appended so far for that section.
+
+    Returns:
+        Tuple[str, int]: The ID of the page and the number of leading
+        sections it holds, `len(lesson_inputs)` once it is complete.
+    """
+    if page_id is None:
+        page_id = create_page(title)
+    if on_page_created:
+        on_page_created(page_id)
+    if partial_block_ids:
+        delete_blocks(partial_block_ids)
+    lessons = lessons or {}
+    sinks = {
+        index: queue.Queue()
+        for index in range(start_index, len(lesson_inputs))
+    }
+
+    def build(index: int, summary: str, enrichment: str) -> List[Dict]:
+        sink = sinks[index]
+        try:
+            if index in lessons:
+                sink.put(lessons[index])
+                return lessons[index]
+            if stream:
+                blocks = []
+                for block in stream_lesson(summary, enrichment):
+                    blocks.append(block)
+                    sink.put([block])
+            else:
+                blocks = build_lesson(summary, enrichment)
+                sink.put(blocks)
+            if on_lesson_built:
+                on_lesson_built(index, blocks)
+            return blocks
+        finally:
+            sink.put(_LESSON_DONE)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        build = in_current_context(build)
+        futures = [
+            executor.submit(build, index, summary, enrichment)
+            for index, (summary, enrichment) in enumerate(lesson_inputs)
+            if index >= start_index
+        ]
+        # Draining the lessons in submission order appends each section
+        # only once all earlier sections have been appended.
+        failed = False
+        appended = start_index
+        for index, future in enumerate(futures, start=start_index):
+            block_ids: List[str] = []
+            for blocks in _next_blocks(sinks[index]):
+                # After a failed section the page stops growing, so that a
+                # later run can resume right where the failure left a gap.
+                if failed:
+                    continue
+                block_ids.extend(append_blocks(page_id, blocks))
+                if on_blocks_appended:
+                    on_blocks_appended(index, block_ids)
+            try:
+                future.result()
+            except Exception as e:
+                print(
+                    f"An error occurred while building lesson {index}: "
+                    f"{repr(e)}"
+                )
+                failed = True
+                if block_ids:
+                    delete_blocks(block_ids)
+                    if on_blocks_appended:
+                        on_blocks_appended(index, [])
+            if failed:
+                continue
+            appended = index + 1
+            if on_section_appended:
+                on_section_appended(index, len(block_ids))
+    return page_id, appended
+
+
+if __name__ == "__main__":
+    # Load environment variables from .env file
+    load_dotenv()
+    sections, video_id = load_json(
+        "summarized_sections", sys.argv[1] if len(sys.argv) > 1 else None
+    )
+    print(f"Loading: summarized sections of {video_id}")
+
+    enrichment_data, _ = load_json("enrichment_data", video_id)
+    print(f"\nLoading enrichment data of {video_id}")
+    print("\nAtlas is working on building a lesson…")
+
+    lesson_inputs = pair_with_enrichment(sections, enrichment_data)
+
     print("\n Atlas is creating page in Notion...")
-    page_id = create_page(title=f"YouTube Video ID – {video_id}")
-    append_blocks(page_id, blocks)
+    page_id, appended = stream_lessons_to_page(
+        title=f"YouTube Video ID – {video_id}",
+        lesson_inputs=lesson_inputs,
+        on_section_appended=lambda index, count: print(
+            f"Section {index + 1}/{len(lesson_inputs)}: {count} blocks"
+        ),
+    )
+    if appended < len(lesson_inputs):
+        print(f"\n⚠️ The page stops before section {appended + 1}.")
     print(
         f"\n✅ Page created: https://www.notion.so/{page_id.replace('-', '')}"
     )
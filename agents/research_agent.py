@@ -1,120 +1,248 @@
-import re
 import os
-import json
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.tools.duckduckgo import DuckDuckGoTools
-
-# Load environment variables from .env file
-load_dotenv()
-
-research_agent = Agent(
-    name="Research Agent",
-    role=(
-        "Perform contextual research based on summarized sections of content."
-    ),
-    model=OpenAIChat(id="gpt-4o"),
-    description=(
-        "You are a technical researcher. You take a topic and enrich it by "
-        "researching the web using DuckDuckGo. You prefer reliable "
-        "and educational sources."
-    ),
-    instructions=[
-        (
-            "You will be given a technical topic (e.g., 'SQL injection', "
-            "'Binary Search Tree')."
-        ),
-        (
-            "Search DuckDuckGo for recent and reliable information "
-            "about the topic."
-        ),
-        (
-            "Prioritize results from .edu, .org, or official "
-            "documentation websites."
+
+from agents.routing import get_model_router
+from agents.runner import run_agent, shared_agent
+from core.artifact_store import get_artifact_store, iter_records
+from core.metrics import add_to_current_stage, in_current_context, metrics
+from core.topic_cache import get_topic_cache
+from processors.topic_ranker import describe_topic, rank_topics
+
+
+@shared_agent
+def get_research_agent():
+    """
+    Returns the research agent, building it on first use.
+    """
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+    from agno.tools.duckduckgo import DuckDuckGoTools
+
+    return Agent(
+        name="Research Agent",
+        role=(
+            "Perform contextual research based on summarized sections of "
+            "content."
         ),
-        (
-            "Avoid unreliable sources, forums, and user-generated content "
-            "unless it's from a credible authority."
+        # A hung request must not hold its worker past the research
+        # deadline, so every model call gives up on its own.
+        model=OpenAIChat(
+            id=get_model_router().primary("research"),
+            timeout=float(os.getenv("ATLAS_RESEARCH_TIMEOUT", "120")),
         ),
-        (
-            "For each topic, return the following in markdown format:"
-            "## 🔍 Enrichment: [Topic]"
-            "**Definition:** Brief definition or summary of the topic."
-            "**Example:** A real-world use case or application of the topic. "
-            "Include code snippets if the topic is a programming concept "
-            "such as loops, data structures, conditionals, etc."
-            "**Further Reading:** A bulleted list of relevant sources with"
-            "clickable links."
+        description=(
+            "You are a technical researcher. You take a topic and enrich it "
+            "by researching the web using DuckDuckGo. You prefer reliable "
+            "and educational sources."
         ),
-        (
-            "Ensure all URLs are valid and properly formatted.",
-            "Do not hallucinate URLs. Only include links that "
-            "appear in search results."
-        )
-    ],
-    tools=[DuckDuckGoTools()],
-    show_tool_calls=True,
-    markdown=True
-)
+        instructions=[
+            (
+                "You will be given a technical topic (e.g., 'SQL injection', "
+                "'Binary Search Tree')."
+            ),
+            (
+                "Search DuckDuckGo for recent and reliable information "
+                "about the topic."
+            ),
+            (
+                "Prioritize results from .edu, .org, or official "
+                "documentation websites."
+            ),
+            (
+                "Avoid unreliable sources, forums, and user-generated content "
+                "unless it's from a credible authority."
+            ),
+            (
+                "For each topic, return the following in markdown format:"
+                "## 🔍 Enrichment: [Topic]"
+                "**Definition:** Brief definition or summary of the topic."
+                "**Example:** A real-world use case or application of the "
+                "topic. "
+                "Include code snippets if the topic is a programming concept "
+                "such as loops, data structures, conditionals, etc."
+                "**Further Reading:** A bulleted list of relevant sources with"
+                "clickable links."
+            ),
+            (
+                "Ensure all URLs are valid and properly formatted.",
+                "Do not hallucinate URLs. Only include links that "
+                "appear in search results."
+            )
+        ],
+        tools=[DuckDuckGoTools()],
+        show_tool_calls=True,
+        markdown=True
+    )
 
 
 def extract_topics_from_json(path: str, max_topics: int = 5) -> list[str]:
-    with open(path, "r", encoding="utf-8") as f:
-        sections = json.load(f)
+    """
+    Picks the topics worth researching from the summarized sections.
+
+    Topics are ranked by salience across all sections (see
+    `processors.topic_ranker.rank_topics`) and the reason for each choice is
+    logged.
 
-    candidates = set()
-    for section in sections:
-        text = section.get("summary", "")
-        matches = re.findall(r'\*\*(.*?)\*\*', text)  # Look for bolded itens
-        candidates.update(matches)
+    Args:
+        path (str): Path to the summarized sections artifact.
+        max_topics (int): Number of topics to return.
 
-    topics = set()
-    for c in candidates:
-        cleaned = c.strip().strip(":;,.()[]{}").lower()
-        if 2 < len(cleaned) < 50:
-            topics.add(cleaned)
+    Returns:
+        list[str]: The topics, most salient first.
+    """
+    # Only the summaries are kept; the section text is streamed past.
+    sections = [
+        {"summary": section.get("summary", "")}
+        for section in iter_records(path)
+    ]
 
-    return list(topics)[:max_topics]
+    ranked = rank_topics(sections, max_topics)
+    for topic in ranked:
+        print(f"Topic chosen: {describe_topic(topic, len(sections))}")
+    return [topic["topic"] for topic in ranked]
 
 
 def enrich_topic(topic: str) -> str:
-    response = research_agent.run(f"Research and explain the topic: {topic}")
-    return re.sub(r"(?s)^.*?##", "##", str(response.content))
+    """
+    Researches `topic`, or reuses the research of the same or an equivalent
+    topic from any earlier video (see `core.topic_cache.TopicCache`).
+
+    Args:
+        topic (str): The topic to research.
+
+    Returns:
+        str: The enrichment, in Markdown.
+    """
+    cache = get_topic_cache()
+    with metrics.measure("enrich_topic", topic=topic) as event:
+        cached = cache.get(topic) if cache else None
+        if cached is not None:
+            add_to_current_stage(cache_hits=1)
+            event["cached_topic"] = cached["topic"]
+            event["cache_age_days"] = round(cached["age_seconds"] / 86400, 1)
+            print(
+                f"Research reused for {topic}: cached as "
+                f"{cached['topic']!r} {event['cache_age_days']} days ago "
+                f"(similarity {cached['similarity']})"
+            )
+            return cached["enrichment"]
+        content = run_agent(
+            get_research_agent(), f"Research and explain the topic: {topic}",
+            stage="research",
+        )
+    enrichment = re.sub(r"(?s)^.*?##", "##", content)
+    if cache and enrichment:
+        cache.set(topic, enrichment)
+    return enrichment
+
+
+def enrich_topics(
+    topics: list[str],
+    max_workers: int = 4,
+    timeout: float | None = None,
+    on_result: Callable[[str, str], None] | None = None,
+) -> dict[str, str]:
+    """
+    Enriches several topics concurrently.
+
+    Args:
+        topics (list[str]): Topics to research.
+        max_workers (int): Maximum number of research runs in flight.
+        timeout (float | None): Seconds each topic may research for,
+        counted from when its run starts, after which it is given up on.
+        Topics waiting for a free worker are not timed out. None waits
+        indefinitely.
+        on_result (Callable[[str, str], None] | None): Called with
+        `(topic, enrichment)` as soon as each topic completes, in completion
+        order, so callers can report partial results.
+
+    Returns:
+        dict[str, str]: Enrichment per topic, in the order of `topics`.
+        Topics that failed or timed out map to an empty string.
+    """
+    results: dict[str, str] = {}
+    started: dict[str, float] = {}
+
+    def finish(topic: str, enrichment: str) -> None:
+        results[topic] = enrichment
+        if on_result:
+            on_result(topic, enrichment)
+
+    def research(topic: str) -> str:
+        started[topic] = time.monotonic()
+        return enrich_topic(topic)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    run = in_current_context(research)
+    pending = {executor.submit(run, topic): topic for topic in topics}
+    try:
+        while pending:
+            remaining = None
+            if timeout is not None:
+                now = time.monotonic()
+                for future, topic in list(pending.items()):
+                    if topic not in started:
+                        # Its deadline is at least `timeout` away.
+                        left = timeout
+                    else:
+                        left = started[topic] + timeout - now
+                    if left <= 0:
+                        del pending[future]
+                        print(f"Research timed out after {timeout}s: {topic}")
+                        finish(topic, "")
+                    elif remaining is None or left < remaining:
+                        remaining = left
+                if not pending:
+                    break
+            done, _ = wait(
+                pending, timeout=remaining, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                topic = pending.pop(future)
+                try:
+                    finish(topic, future.result())
+                except Exception as e:
+                    print(
+                        "An error occurred while researching "
+                        f"{topic}: {repr(e)}"
+                    )
+                    finish(topic, "")
+    finally:
+        # Do not block on runs that timed out; their results are discarded.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {topic: results.get(topic, "") for topic in topics}
 
 
 if __name__ == "__main__":
-    input_dir = "transcript_files"
-    files = [f for f in os.listdir(input_dir) if f.startswith(
-        "summarized_sections_"
-    )]
-    if not files:
+    # Load environment variables from .env file
+    load_dotenv()
+    store = get_artifact_store()
+    video_id = sys.argv[1] if len(sys.argv) > 1 else store.latest_video()
+    input_path = store.locate(video_id, "summarized_sections")
+    if input_path is None:
         raise FileNotFoundError(
-            "No summarized_sections_ JSON file found in transcript_files"
+            f"No summarized sections found for video ID: {video_id}"
         )
-
-    input_filename = files[0]  # Use the first one
-    input_path = os.path.join(input_dir, input_filename)
-    print(f"📄 Using input: {input_filename}")
+    print(f"📄 Using input: {input_path}")
 
     # Extract dynamic topics
     topics = extract_topics_from_json(input_path)
     print(f"\n🔍 Topics extracted:\n{topics}\n")
 
     # Run enrichment
-    enriched_outputs = {}
-    for topic in topics:
-        print(f"🔎 Researching: {topic}")
-        enriched_outputs[topic] = enrich_topic(topic)
+    enriched_outputs = enrich_topics(
+        topics,
+        on_result=lambda topic, _: print(f"🔎 Researched: {topic}"),
+    )
 
     # Save results
-    video_id = re.search(
-        r"summarized_sections_(.+)\.json", input_filename
-    ).group(1)
-    output_path = os.path.join(
-        input_dir, f"research_enrichment_{video_id}.json"
-    )
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(enriched_outputs, f, indent=2, ensure_ascii=False)
+    output_path = store.put(video_id, "enrichment_data", enriched_outputs)
 
     print(f"\n✅ Enrichment saved to {output_path}")
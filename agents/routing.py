@@ -0,0 +1,198 @@
+import os
+import statistics
+import threading
+from collections import deque
+
+# Primary and fallback model of every stage. The summarizer runs far more
+# often than the other agents and does well on the smaller model.
+DEFAULT_ROUTES = {
+    "summarizer": ("gpt-4o-mini", "gpt-4o"),
+    "chapter": ("gpt-4o", "gpt-4o-mini"),
+    "research": ("gpt-4o", "gpt-4o-mini"),
+    "atlas": ("gpt-4o", "gpt-4o-mini"),
+}
+# Rolling median latency, in seconds, above which a stage's primary model
+# is considered too slow and its calls go to the fallback.
+DEFAULT_LATENCY_SLOS = {
+    "summarizer": 30.0,
+    "chapter": 45.0,
+    "research": 90.0,
+    "atlas": 60.0,
+}
+
+
+class ModelStats:
+    """
+    Rolling latency and error rate of one model over its latest calls.
+    """
+
+    def __init__(self, window: int = 20):
+        """
+        Args:
+            window (int): Number of most recent calls taken into account.
+        """
+        self._calls: deque[tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self._calls.append((seconds, ok))
+
+    @property
+    def calls(self) -> int:
+        return len(self._calls)
+
+    @property
+    def latency(self) -> float:
+        """
+        Median latency of the successful calls in the window, 0 if none.
+        """
+        latencies = [seconds for seconds, ok in self._calls if ok]
+        return statistics.median(latencies) if latencies else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(not ok for _, ok in self._calls) / len(self._calls)
+
+
+class ModelRouter:
+    """
+    Picks the model that serves each agent stage.
+
+    Every stage has a primary and a fallback model. Calls go to the primary
+    until its rolling median latency exceeds the stage's latency SLO or its
+    error rate exceeds `max_error_rate`; then they go to the fallback, with
+    every `probe_every`-th call still sent to the primary so that its
+    recovery is noticed. A call that fails is retried once on the other
+    model.
+    """
+
+    def __init__(self, routes: dict[str, tuple[str, str | None]],
+                 latency_slos: dict[str, float], window: int = 20,
+                 min_calls: int = 3, max_error_rate: float = 0.5,
+                 probe_every: int = 10):
+        """
+        Args:
+            routes (dict[str, tuple[str, str | None]]): Primary and fallback
+            model ID per stage. A None fallback disables routing for the
+            stage.
+            latency_slos (dict[str, float]): Latency SLO in seconds per
+            stage.
+            window (int): Number of recent calls the statistics of each
+            model cover.
+            min_calls (int): Calls a model needs in its window before it can
+            be judged too slow or failing.
+            max_error_rate (float): Share of failed calls above which the
+            primary is avoided.
+            probe_every (int): While the fallback is preferred, one call in
+            this many still goes to the primary.
+        """
+        self.routes = routes
+        self.latency_slos = latency_slos
+        self.window = window
+        self.min_calls = min_calls
+        self.max_error_rate = max_error_rate
+        self.probe_every = probe_every
+        self._stats: dict[str, ModelStats] = {}
+        self._fallback_calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def primary(self, stage: str) -> str:
+        """
+        Returns the primary model of `stage`.
+        """
+        return self.routes[stage][0]
+
+    def plan(self, stage: str) -> list[str]:
+        """
+        Returns the models to try for one call of `stage`, in order: the
+        chosen model, then the other one if the chosen model fails.
+        """
+        primary, fallback = self.routes[stage]
+        if not fallback or fallback == primary:
+            return [primary]
+        with self._lock:
+            if not self._degraded(stage):
+                self._fallback_calls[stage] = 0
+                return [primary, fallback]
+            count = self._fallback_calls.get(stage, 0) + 1
+            self._fallback_calls[stage] = count
+        if count % self.probe_every == 0:
+            return [primary, fallback]
+        return [fallback, primary]
+
+    def record(self, model_id: str, seconds: float, ok: bool) -> None:
+        """
+        Records the latency and outcome of one call to `model_id`.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(model_id, ModelStats(self.window))
+            stats.record(seconds, ok)
+
+    def stats(self) -> list[dict]:
+        """
+        Returns the rolling statistics of every model called so far.
+        """
+        with self._lock:
+            return [
+                {
+                    "model": model_id,
+                    "calls": stats.calls,
+                    "latency": round(stats.latency, 3),
+                    "error_rate": round(stats.error_rate, 3),
+                }
+                for model_id, stats in sorted(self._stats.items())
+            ]
+
+    def _degraded(self, stage: str) -> bool:
+        stats = self._stats.get(self.routes[stage][0])
+        if stats is None or stats.calls < self.min_calls:
+            return False
+        return (
+            stats.latency > self.latency_slos.get(stage, float("inf"))
+            or stats.error_rate > self.max_error_rate
+        )
+
+
+_model_router: ModelRouter | None = None
+_model_router_lock = threading.Lock()
+
+
+def _routes_from_env() -> tuple[dict, dict]:
+    routes, slos = {}, {}
+    for stage, (primary, fallback) in DEFAULT_ROUTES.items():
+        models = os.getenv(f"ATLAS_MODEL_{stage.upper()}")
+        if models:
+            primary, _, fallback = models.partition(",")
+            fallback = fallback.strip() or None
+        routes[stage] = (primary.strip(), fallback)
+        slos[stage] = float(os.getenv(
+            f"ATLAS_LATENCY_SLO_{stage.upper()}", DEFAULT_LATENCY_SLOS[stage]
+        ))
+    return routes, slos
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Returns the process-wide model router, creating it on first use.
+
+    The models of each stage are read from `ATLAS_MODEL_<STAGE>` as
+    "primary,fallback" (e.g. `ATLAS_MODEL_SUMMARIZER=gpt-4o-mini,gpt-4o`)
+    and their latency SLO from `ATLAS_LATENCY_SLO_<STAGE>`, in seconds.
+    """
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            routes, slos = _routes_from_env()
+            _model_router = ModelRouter(routes, slos)
+        return _model_router
+
+
+def set_model_router(router: ModelRouter | None) -> None:
+    """
+    Replaces the process-wide model router, e.g. with one whose routes and
+    SLOs suit a benchmark. None restores the configured one on next use.
+    """
+    global _model_router
+    with _model_router_lock:
+        _model_router = router
@@ -0,0 +1,311 @@
+import dataclasses
+import functools
+import threading
+import time
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterator
+
+from agents.routing import get_model_router
+from core.metrics import add_to_current_stage, token_usage
+from core.response_cache import ResponseCache, get_response_cache
+
+if TYPE_CHECKING:
+    # agno and the OpenAI SDK take most of a second to import, so they are
+    # only loaded once the first agent is built.
+    from agno.agent import Agent
+
+# Bounds the number of model calls in flight across the whole process.
+_inflight_calls: threading.BoundedSemaphore | None = None
+
+
+def shared_agent(build: Callable[[], "Agent"]) -> Callable[[], "Agent"]:
+    """
+    Turns an agent builder into a getter that builds the agent on first use
+    and hands the same instance to every later caller, in any thread.
+
+    Args:
+        build (Callable[[], Agent]): Builds the agent. Heavy imports belong
+        inside it so that importing its module stays cheap.
+
+    Returns:
+        Callable[[], Agent]: The getter.
+    """
+    agent = None
+    lock = threading.Lock()
+
+    @functools.wraps(build)
+    def get() -> "Agent":
+        nonlocal agent
+        if agent is None:
+            with lock:
+                if agent is None:
+                    agent = build()
+        return agent
+    return get
+
+
+def _run_with_model(agent: "Agent", message: str) -> Any:
+    # Agent.run keeps per-run state on the instance, so every call works
+    # on its own copy to stay safe when called from worker threads.
+    return agent.deep_copy().run(message)
+
+
+def _stream_with_model(agent: "Agent",
+                       message: str) -> Generator[str, None, Any]:
+    copy = agent.deep_copy()
+    for chunk in copy.run(message, stream=True):
+        if isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
+    return copy.run_response.metrics
+
+
+def _stream_whole(run: Callable[["Agent", str], Any]) -> Callable:
+    # Adapts a non-streaming backend: the whole response is one delta.
+    def stream(agent: "Agent", message: str) -> Generator[str, None, Any]:
+        response = run(agent, message)
+        if response.content:
+            yield str(response.content)
+        return response.metrics
+    return stream
+
+
+# Execute an agent run and return the agno run response, or yield its
+# content deltas and return its metrics. Benchmarks swap them for local
+# stand-ins with `set_agent_backend`.
+_backend: Callable[["Agent", str], Any] = _run_with_model
+_stream_backend: Callable[
+    ["Agent", str], Generator[str, None, Any]
+] = _stream_with_model
+
+
+def set_agent_backend(
+    backend: Callable[["Agent", str], Any] | None,
+    stream_backend: Callable[
+        ["Agent", str], Generator[str, None, Any]
+    ] | None = None,
+) -> None:
+    """
+    Replaces the functions that execute agent runs.
+
+    Args:
+        backend (Callable[[Agent, str], Any] | None): Called with
+        `(agent, message)`; must return an object with `content` and
+        `metrics` attributes like an agno `RunResponse`. None restores the
+        real models.
+        stream_backend (Callable[[Agent, str], Generator[str, None, Any]] |
+        None): Generator yielding the content deltas of a run and returning
+        its metrics. Defaults to `backend` with the whole response as a
+        single delta.
+    """
+    global _backend, _stream_backend
+    if backend is None:
+        _backend, _stream_backend = _run_with_model, _stream_with_model
+        return
+    _backend = backend
+    _stream_backend = stream_backend or _stream_whole(backend)
+
+
+def set_max_inflight_calls(limit: int | None) -> None:
+    """
+    Limits how many agent runs may call a model at the same time across all
+    threads of the process.
+
+    Args:
+        limit (int | None): Maximum number of concurrent model calls. None
+        removes the limit.
+    """
+    global _inflight_calls
+    _inflight_calls = threading.BoundedSemaphore(limit) if limit else None
+
+
+# Agent settings besides its description and instructions that agno puts
+# into the system message or that change the response content.
+_PROMPT_FIELDS = (
+    "role", "goal", "expected_output", "additional_context", "markdown",
+    "system_message", "add_name_to_instructions",
+    "add_datetime_to_instructions", "structured_outputs", "show_tool_calls",
+)
+
+
+def _tool_prompt(tool: Any) -> Any:
+    # What the model is told about a tool: a toolkit's functions, or a
+    # function's name and description.
+    functions = getattr(tool, "functions", None)
+    if isinstance(functions, dict):
+        return {
+            name: _tool_prompt(function)
+            for name, function in functions.items()
+        }
+    name = getattr(tool, "name", None) or getattr(tool, "__name__", None)
+    description = getattr(tool, "description", None)
+    if description is None:
+        entrypoint = getattr(tool, "entrypoint", None) or tool
+        description = getattr(entrypoint, "__doc__", None)
+    return [name, description]
+
+
+def agent_cache_key(agent: "Agent", message: str) -> str:
+    """
+    Builds the response cache key for running `agent` on `message`.
+
+    The key covers the model id and everything that goes into the agent's
+    system message (description, instructions, role, tools, Markdown and
+    output settings...), so editing an `Agent(...)` definition
+    automatically invalidates its entries.
+    """
+    response_model = getattr(agent, "response_model", None)
+    return ResponseCache.make_key(
+        model_id=f"{agent.name}:{agent.model.id}",
+        description=agent.description,
+        instructions=agent.instructions,
+        input_text=message,
+        tools=[_tool_prompt(tool) for tool in agent.tools or []],
+        response_model=(
+            response_model.model_json_schema()
+            if hasattr(response_model, "model_json_schema")
+            else response_model
+        ),
+        **{field: getattr(agent, field, None) for field in _PROMPT_FIELDS},
+    )
+
+
+def _with_model(agent: "Agent", model_id: str) -> "Agent":
+    # The agent as served by `model_id`; only copied when the model differs.
+    if agent.model.id == model_id:
+        return agent
+    return agent.deep_copy(
+        update={"model": dataclasses.replace(agent.model, id=model_id)}
+    )
+
+
+def _model_plan(agent: "Agent", stage: str | None) -> list[str]:
+    return get_model_router().plan(stage) if stage else [agent.model.id]
+
+
+def run_agent(agent: "Agent", message: str, stage: str | None = None) -> str:
+    """
+    Runs `agent` on `message` and returns the response content, serving
+    identical earlier runs from the persistent response cache.
+
+    With a `stage`, the model router picks the model that serves the run
+    and the run is retried once on the stage's other model if it fails.
+
+    Args:
+        agent (Agent): The agent to run.
+        message (str): The input message.
+        stage (str | None): Routing stage of the agent, e.g. `summarizer`.
+        None always uses the agent's own model.
+
+    Returns:
+        str: The content of the agent response.
+    """
+    models = _model_plan(agent, stage)
+    router = get_model_router()
+    cache = get_response_cache()
+    for attempt, model_id in enumerate(models):
+        routed = _with_model(agent, model_id)
+        key = agent_cache_key(routed, message) if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                add_to_current_stage(cache_hits=1)
+                return cached
+
+        with _inflight_calls or nullcontext():
+            started = time.perf_counter()
+            try:
+                response = _backend(routed, message)
+            except Exception as e:
+                if stage:
+                    router.record(
+                        model_id, time.perf_counter() - started, ok=False
+                    )
+                if attempt + 1 == len(models):
+                    raise
+                print(f"{agent.name} failed on {model_id}, retrying on "
+                      f"{models[attempt + 1]}: {repr(e)}")
+                continue
+            if stage:
+                router.record(model_id, time.perf_counter() - started, ok=True)
+        add_to_current_stage(**token_usage(response.metrics))
+        if stage and model_id != router.primary(stage):
+            add_to_current_stage(fallbacks=1)
+        content = str(response.content)
+
+        if cache and response.content:
+            cache.set(key, content)
+        return content
+
+
+def stream_agent(agent: "Agent", message: str,
+                 stage: str | None = None) -> Iterator[str]:
+    """
+    Runs `agent` on `message` and yields the response content as the model
+    writes it.
+
+    A cached response is yielded in one piece. A fully streamed response is
+    cached like those of `run_agent`; an interrupted one is not. A run that
+    fails before its first delta is retried on the stage's other model,
+    like in `run_agent`; once content has been yielded, errors propagate.
+
+    Args:
+        agent (Agent): The agent to run.
+        message (str): The input message.
+        stage (str | None): Routing stage of the agent, e.g. `atlas`. None
+        always uses the agent's own model.
+
+    Yields:
+        str: Consecutive pieces of the response content.
+    """
+    models = _model_plan(agent, stage)
+    router = get_model_router()
+    cache = get_response_cache()
+    for attempt, model_id in enumerate(models):
+        routed = _with_model(agent, model_id)
+        key = agent_cache_key(routed, message) if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                add_to_current_stage(cache_hits=1)
+                yield cached
+                return
+
+        parts = []
+        stream = None
+        # Only the time spent waiting on the model counts as its latency,
+        # and a call slot is only held meanwhile: whatever the consumer
+        # does between two deltas, e.g. Notion requests, happens outside.
+        elapsed = 0.0
+        try:
+            while True:
+                with _inflight_calls or nullcontext():
+                    started = time.perf_counter()
+                    try:
+                        if stream is None:
+                            stream = _stream_backend(routed, message)
+                        delta = next(stream)
+                    except StopIteration as done:
+                        response_metrics = done.value
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - started
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            if stage:
+                router.record(model_id, elapsed, ok=False)
+            if parts or attempt + 1 == len(models):
+                raise
+            print(f"{agent.name} failed on {model_id}, retrying on "
+                  f"{models[attempt + 1]}: {repr(e)}")
+            continue
+        if stage:
+            router.record(model_id, elapsed, ok=True)
+        add_to_current_stage(**token_usage(response_metrics))
+        if stage and model_id != router.primary(stage):
+            add_to_current_stage(fallbacks=1)
+
+        content = "".join(parts)
+        if cache and content:
+            cache.set(key, content)
+        return
@@ -1,154 +1,439 @@
-import os
-import json
+import math
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-import re
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize the summarizer agent
-summarizer_agent = Agent(
-    name="Summarizer",
-    role="Summarize each transcript section",
-    model=OpenAIChat(id="gpt-4o"),
-    description=(
-        """
-        You are an insightful assistant that summarizes video sections
-        with clarity.
-        """
-    ),
-    instructions=[
-        (
-            "Read the transcript chunk carefully and generate a clear, "
-            "high-quality summary."
-        ),
-        (
-            "Focus on extracting the key ideas, arguments, and topics "
-            "discussed."
-        ),
-        (
-            "Write in a clear, educational tone that feels at home in a "
-            "lesson, guide or study resource."
-        ),
-        (
-            "Avoid repeating the speaker's filler words or tangents. "
-            "Focus on substance."
-        ),
-        (
-            "If the section includes numbers, stats, names, or sources, "
-            "preserve them."
-        ),
-        (
-            "Do not use terms like 'This section covers…', "
-            "'This section explains…', 'The speaker discusses…', "
-            "'Let's dive into', or 'Here, the speaker unpacks…'"
-        ),
-        (
-            "Highlight key terms with **bold** formatting."
-            "Use *italics* sparingly to emphasize nuance or contrast."
-        ),
-        (
-            "Ensure your summary can stand on its own: don't refer to the "
-            "video, just the ideas."
-        ),
-        (
-            "Use Markdown formatting. Prefer paragraphs over bullet points."
-        ),
-        (
-            "Do not hallucinate or add commentary. Be faithful to the "
-            "speaker's ideas."
-        ),
-        (
-            "Keep the tone informative yet engaging. Feel free to echo the "
-            "speaker's original humor or energy when relevant."
-        ),
-        (
-            "Make sure the output will be useful for a formatting agent, "
-            "a research agent, and a Notion exporter downstream."
-        ),
-        (
-            "If the transcript contains promotional content, advertisements, "
-            "or sponsorship, ignore them completely and do not include "
-            "them in the summary."
 
+from agents.routing import get_model_router
+from agents.runner import run_agent, shared_agent
+from core.artifact_store import get_artifact_store, iter_records
+from core.metrics import in_current_context, metrics
+
+
+@shared_agent
+def get_summarizer_agent():
+    """
+    Returns the summarizer agent, building it on first use.
+    """
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    return Agent(
+        name="Summarizer",
+        role="Summarize each transcript section",
+        model=OpenAIChat(id=get_model_router().primary("summarizer")),
+        description=(
+            """
+            You are an insightful assistant that summarizes video sections
+            with clarity.
+            """
         ),
-        (
-            "Organize ideas in a way that helps a learner build understanding "
-            "step-by-step, even if it means reordering points slightly."
-        ),
-        (
-            "Include only quotes that are insightful, funny, or especially "
-            "illustrative, not just reiterations of the summary."
-        ),
-        (
-            "Automatically exclude promotional segments, sponsorship "
-            "mentions, or calls-to-action like 'sign up at' or 'thanks to...'"
-        ),
-        (
-            "Ensure consistency in your markdown structure, always following "
-            "the format: "
-            "1. A summary paragraph. "
-            "2. A key points section with bullets. "
-            "3. Notable quotes."
-        ),
-        (
-            "Always start with a single '#' level heading that introduces the "
-            "entire section (e.g., a title like 'Overview of "
-            "Memory Management' or 'What is a CPU?'). "
-            "Avoid using '## Summary' or generic headings."
-        ),
-        (
-            "The text should be structured as follows: "
-            "# Title\n"
-            "The summary paragraph of the section with sections ('## ') and "
-            "subsections ('### ').\n\n"
-            "## Key Points\n"
-            "- Bullet 1\n"
-            "- Bullet 2\n"
-            "- Bullet 3\n\n"
-            "## Notable Quotes\n"
-            "- Quote 1\n"
+        instructions=[
+            (
+                "Read the transcript chunk carefully and generate a clear, "
+                "high-quality summary."
+            ),
+            (
+                "Focus on extracting the key ideas, arguments, and topics "
+                "discussed."
+            ),
+            (
+                "Write in a clear, educational tone that feels at home in a "
+                "lesson, guide or study resource."
+            ),
+            (
+                "Avoid repeating the speaker's filler words or tangents. "
+                "Focus on substance."
+            ),
+            (
+                "If the section includes numbers, stats, names, or sources, "
+                "preserve them."
+            ),
+            (
+                "Do not use terms like 'This section covers…', "
+                "'This section explains…', 'The speaker discusses…', "
+                "'Let's dive into', or 'Here, the speaker unpacks…'"
+            ),
+            (
+                "Highlight key terms with **bold** formatting."
+                "Use *italics* sparingly to emphasize nuance or contrast."
+            ),
+            (
+                "Ensure your summary can stand on its own: don't refer to the "
+                "video, just the ideas."
+            ),
+            (
+                "Use Markdown formatting. Prefer paragraphs over bullet "
+                "points."
+            ),
+            (
+                "Do not hallucinate or add commentary. Be faithful to the "
+                "speaker's ideas."
+            ),
+            (
+                "Keep the tone informative yet engaging. Feel free to echo "
+                "the speaker's original humor or energy when relevant."
+            ),
+            (
+                "Make sure the output will be useful for a formatting agent, "
+                "a research agent, and a Notion exporter downstream."
+            ),
+            (
+                "If the transcript contains promotional content, "
+                "advertisements, "
+                "or sponsorship, ignore them completely and do not include "
+                "them in the summary."
+
+            ),
+            (
+                "Organize ideas in a way that helps a learner build "
+                "understanding "
+                "step-by-step, even if it means reordering points slightly."
+            ),
+            (
+                "Include only quotes that are insightful, funny, or "
+                "especially "
+                "illustrative, not just reiterations of the summary."
+            ),
+            (
+                "Automatically exclude promotional segments, sponsorship "
+                "mentions, or calls-to-action like 'sign up at' or 'thanks "
+                "to...'"
+            ),
+            (
+                "Ensure consistency in your markdown structure, always "
+                "following the format: "
+                "1. A summary paragraph. "
+                "2. A key points section with bullets. "
+                "3. Notable quotes."
+            ),
+            (
+                "Always start with a single '#' level heading that introduces "
+                "the entire section (e.g., a title like 'Overview of "
+                "Memory Management' or 'What is a CPU?'). "
+                "Avoid using '## Summary' or generic headings."
+            ),
+            (
+                "The text should be structured as follows: "
+                "# Title\n"
+                "The summary paragraph of the section with sections ('## ') "
+                "and subsections ('### ').\n\n"
+                "## Key Points\n"
+                "- Bullet 1\n"
+                "- Bullet 2\n"
+                "- Bullet 3\n\n"
+                "## Notable Quotes\n"
+                "- Quote 1\n"
+            ),
+        ],
+        markdown=True
+    )
+
+
+@shared_agent
+def get_chapter_agent():
+    """
+    Returns the chapter agent, building it on first use.
+    """
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    return Agent(
+        name="Chapter Editor",
+        role="Merge consecutive section summaries into one chapter",
+        model=OpenAIChat(id=get_model_router().primary("chapter")),
+        description=(
+            "You are an editor who turns consecutive summaries of a long "
+            "video into one coherent chapter."
         ),
-    ],
-    markdown=True
-)
+        instructions=[
+            (
+                "You receive consecutive summaries of the same video, in "
+                "order. Merge them into a single chapter summary."
+            ),
+            (
+                "Keep every key idea, definition, number, name and source, "
+                "but remove repetition between the parts."
+            ),
+            (
+                "Keep the chapter under 700 words, however many parts you "
+                "receive."
+            ),
+            (
+                "Highlight key terms with **bold** formatting, as the parts "
+                "do."
+            ),
+            (
+                "Do not refer to parts, sections, summaries or the video; "
+                "just present the ideas."
+            ),
+            (
+                "The text should be structured as follows: "
+                "# Chapter title\n"
+                "The chapter narrative with sections ('## ') and "
+                "subsections ('### ').\n\n"
+                "## Key Points\n"
+                "- Bullet 1\n"
+                "- Bullet 2\n"
+                "- Bullet 3\n"
+            ),
+        ],
+        markdown=True
+    )
+
+
+def summarize_section(section: dict) -> dict:
+    """
+    Summarizes a single transcript section.
+
+    A failing section does not abort the batch: the error is reported and
+    the section is returned with an empty summary and an ``error`` key.
+
+    Args:
+        section (dict): A section with keys 'text', 'start', and 'end'.
+
+    Returns:
+        dict: The same section with a 'summary' key added.
+    """
+    try:
+        with metrics.measure("summarizer_agent.run",
+                             section_start=section.get("start")):
+            section["summary"] = run_agent(
+                get_summarizer_agent(), section["text"], stage="summarizer"
+            )
+    except Exception as e:
+        print(
+            "An error occurred while summarizing section starting at "
+            f"{section.get('start')}: {repr(e)}"
+        )
+        section["summary"] = ""
+        section["error"] = repr(e)
+    return section
 
 
-def summarize_sections_from_file(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        sections = json.load(f)
+def summarize_sections(
+    sections: Iterable[dict],
+    max_workers: int = 1,
+    on_section: Callable[[int, dict], None] | None = None,
+) -> list[dict]:
+    """
+    Summarizes transcript sections, optionally concurrently.
 
-    summarized = []
+    Args:
+        sections (Iterable[dict]): Sections with keys 'text', 'start', and
+        'end'.
+        max_workers (int): Maximum number of sections summarized
+        concurrently. 1 keeps the original sequential behaviour.
+        on_section (Callable[[int, dict], None] | None): Called with
+        `(index, section)` as soon as each section is summarized. It may be
+        called from worker threads.
+
+    Returns:
+        list[dict]: The sections, in their original order, each with a
+        'summary' key.
+    """
+    return list(iter_summarized_sections(sections, max_workers, on_section))
+
+
+def iter_summarized_sections(
+    sections: Iterable[dict],
+    max_workers: int = 1,
+    on_section: Callable[[int, dict], None] | None = None,
+) -> Iterator[dict]:
+    """
+    Streaming counterpart of `summarize_sections`.
+
+    Sections are pulled from `sections` as workers free up, so a generator
+    of sections (e.g. the splitter's) is summarized while it is still
+    producing them, and at most `2 * max_workers` sections are held at
+    once however long the stream is.
+
+    Yields:
+        dict: The sections, in their original order, each with a 'summary'
+        key.
+    """
+    def summarize(index: int, section: dict) -> dict:
+        section = summarize_section(section)
+        if on_section:
+            on_section(index, section)
+        return section
+
+    if max_workers <= 1:
+        for i, section in enumerate(sections):
+            yield summarize(i, section)
+        return
+
+    # Results are yielded in submission order, so the output keeps the
+    # original section order regardless of completion order.
+    task = in_current_context(summarize)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for i, section in enumerate(sections):
+            in_flight.append(executor.submit(task, i, section))
+            if len(in_flight) >= 2 * max_workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def chapter_count(sections: int) -> int:
+    """
+    Returns the default number of chapters for a video with `sections`
+    sections: logarithmic in its length, so a 10-hour lecture gets a few
+    more chapters than a 1-hour one rather than ten times as many.
+    """
+    return max(1, math.ceil(math.log2(max(sections, 1))))
+
+
+def merge_sections(sections: list[dict]) -> dict:
+    """
+    Merges consecutive summarized sections (or chapters) into one chapter.
+
+    A failing merge does not abort the reduction: the parts are joined
+    unchanged and the chapter gets an ``error`` key. So does a chapter
+    merged from a failed part, so that it is redone along with that part.
+
+    Args:
+        sections (list[dict]): Consecutive sections with keys 'summary',
+        'start' and 'end'.
+
+    Returns:
+        dict: The chapter, with keys 'summary', 'start', 'end' and
+        'sections' (the number of original sections it covers).
+    """
+    chapter = {
+        "start": sections[0].get("start"),
+        "end": sections[-1].get("end"),
+        "sections": sum(section.get("sections", 1) for section in sections),
+    }
+    parts = [section.get("summary", "").strip() for section in sections]
+    message = "\n\n".join(
+        f"=== Part {i} ===\n{part}" for i, part in enumerate(parts, start=1)
+    )
+    try:
+        with metrics.measure("chapter_agent.run", parts=len(sections)):
+            chapter["summary"] = run_agent(
+                get_chapter_agent(), message, stage="chapter"
+            )
+    except Exception as e:
+        print(
+            "An error occurred while merging the sections starting at "
+            f"{chapter['start']}: {repr(e)}"
+        )
+        chapter["summary"] = "\n\n".join(parts)
+        chapter["error"] = repr(e)
     for section in sections:
-        response = summarizer_agent.run(section["text"])
-        section["summary"] = str(response.content)
-        summarized.append(section)
-    return summarized
+        if "error" in section:
+            chapter.setdefault("error", section["error"])
+    return chapter
+
+
+def _groups(count: int, groups: int) -> list[range]:
+    # Splits `count` consecutive items into `groups` contiguous runs whose
+    # lengths differ by at most one.
+    bounds = [round(i * count / groups) for i in range(groups + 1)]
+    return [range(bounds[i], bounds[i + 1]) for i in range(groups)]
+
+
+def reduce_to_chapters(
+    sections: list[dict],
+    max_chapters: int | None = None,
+    fan_in: int = 4,
+    max_workers: int = 1,
+    merged: dict[str, dict] | None = None,
+    on_merge: Callable[[str, dict], None] | None = None,
+) -> list[dict]:
+    """
+    Merges summarized sections into chapters with tree-shaped reduce passes.
+
+    Every pass merges runs of at most `fan_in` adjacent sections (or
+    chapters of the previous pass) in parallel, until at most
+    `max_chapters` remain. Chapter sizes therefore stay bounded however long
+    the video is, and the number of passes grows logarithmically with it.
+
+    Args:
+        sections (list[dict]): Summarized sections, in order.
+        max_chapters (int | None): Number of chapters to stop at. Defaults
+        to `chapter_count(len(sections))`.
+        fan_in (int): Maximum number of parts merged by one model call.
+        max_workers (int): Maximum number of merges run concurrently.
+        merged (dict[str, dict] | None): Chapters saved by an interrupted
+        earlier run, keyed like the `on_merge` calls; they are reused
+        instead of being merged again.
+        on_merge (Callable[[str, dict], None] | None): Called with
+        `("<pass>:<index>", chapter)` as soon as each merge succeeds. It may
+        be called from worker threads.
+
+    Returns:
+        list[dict]: The chapters, in order, each with keys 'summary',
+        'start', 'end' and 'sections'.
+    """
+    if max_chapters is None:
+        max_chapters = chapter_count(len(sections))
+    max_chapters = max(max_chapters, 1)
+    fan_in = max(fan_in, 2)
+    merged = merged or {}
+    level = sections
+    depth = 0
+    while len(level) > max_chapters:
+        depth += 1
+        runs = _groups(
+            len(level), max(max_chapters, math.ceil(len(level) / fan_in))
+        )
+
+        def merge(index: int, run: range, depth: int = depth,
+                  level: list[dict] = level) -> dict:
+            key = f"{depth}:{index}"
+            if len(run) == 1:
+                return level[run[0]]
+            if key in merged:
+                return merged[key]
+            chapter = merge_sections([level[i] for i in run])
+            if on_merge and "error" not in chapter:
+                on_merge(key, chapter)
+            return chapter
+
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            level = list(executor.map(
+                in_current_context(merge), range(len(runs)), runs
+            ))
+    return level
+
+
+def summarize_sections_from_file(path: str,
+                                 max_workers: int = 1) -> list[dict]:
+    """
+    Summarizes every section stored in a sections artifact.
+
+    Sections are streamed from the file one at a time.
+
+    Args:
+        path (str): Path to a `sections.jsonl` artifact (compressed or not)
+        or a legacy `sections_<video_id>.json` file.
+        max_workers (int): Maximum number of sections summarized
+        concurrently.
+
+    Returns:
+        list[dict]: The sections, in their original order, each with a
+        'summary' key.
+    """
+    return summarize_sections(iter_records(path), max_workers=max_workers)
 
 
 if __name__ == "__main__":
-    # Extract video_id dynamically from the filename pattern
-    input_dir = "transcript_files"
-    # Find the first file matching the pattern sections_*.json
-    files = [f for f in os.listdir(input_dir) if re.match(
-        r"sections_(.+)\.json", f
-    )]
-    if not files:
+    # Load environment variables from .env file
+    load_dotenv()
+    store = get_artifact_store()
+    video_id = sys.argv[1] if len(sys.argv) > 1 else store.latest_video()
+    input_path = store.locate(video_id, "sections")
+    if input_path is None:
         raise FileNotFoundError(
-            "No transcript section files found in transcript_files directory."
+            f"No transcript sections found for video ID: {video_id}"
         )
-    input_filename = files[0]
-    match = re.match(r"sections_(.+)\.json", input_filename)
-    video_id = match.group(1) if match else "example_video_id"
 
-    input_path = os.path.join(input_dir, input_filename)
     result = summarize_sections_from_file(input_path)
-
-    output_filename = f"summarized_sections_{video_id}.json"
-    output_path = os.path.join(input_dir, output_filename)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    output_path = store.put(video_id, "summarized_sections", result)
 
     print(f"✅ Summarized file saved to {output_path}")
@@ -0,0 +1,90 @@
+import argparse
+import sys
+import time
+
+from benchmarks.fakes import load_fixture
+from core.notion_blocks import markdown_to_blocks
+
+# Constructs the lesson fixtures rarely use, so every code path is timed.
+LESSON_EXTRAS = """
+## Key Ideas
+1. A numbered step with `inline code` and a [link](https://example.com)
+2. Another step with ***strong emphasis***
+   - A nested bullet with *italic* text
+     - A nested bullet two levels deep
+- A bullet pointing to https://en.wikipedia.org/wiki/SQL.
+> "Learning never exhausts the mind." **Leonardo da Vinci**
+---
+```sql
+SELECT name, year FROM albums WHERE year > 2000;
+```
+"""
+
+
+def build_lesson_markdown(sections: int) -> str:
+    """
+    Builds one large lesson from `sections` fixture summaries, each followed
+    by lists, quotes, links and a code block.
+    """
+    summaries = [section["summary"] for section in load_fixture(
+        "summarized_sections"
+    )]
+    parts = []
+    for i in range(sections):
+        parts.append(f"# Lesson {i + 1}")
+        parts.append(summaries[i % len(summaries)])
+        parts.append(LESSON_EXTRAS)
+    return "\n".join(parts)
+
+
+def count_blocks(blocks: list[dict]) -> tuple[int, int]:
+    """
+    Counts blocks, nested ones included, and their rich text objects.
+    """
+    total = segments = 0
+    for block in blocks:
+        body = block[block["type"]]
+        children, children_segments = count_blocks(body.get("children", []))
+        total += 1 + children
+        segments += len(body.get("rich_text", [])) + children_segments
+    return total, segments
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure Markdown to Notion block conversion speed."
+    )
+    parser.add_argument(
+        "--sections", type=int, default=500,
+        help="Lesson sections in the generated document (default: 500).",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5,
+        help="Timed conversions; the fastest one is reported (default: 5).",
+    )
+    args = parser.parse_args(argv)
+
+    markdown = build_lesson_markdown(args.sections)
+    best = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        blocks = markdown_to_blocks(markdown)
+        best = min(best, time.perf_counter() - started)
+
+    total, segments = count_blocks(blocks)
+    lines = markdown.count("\n") + 1
+    print(
+        f"{len(markdown) / 1024 / 1024:.2f} MB of Markdown, {lines} lines, "
+        f"{total} blocks, {segments} rich text objects "
+        f"in {best * 1000:.1f} ms"
+    )
+    print(
+        f"{total / best:,.0f} blocks/s, {segments / best:,.0f} rich text/s, "
+        f"{lines / best:,.0f} lines/s, "
+        f"{len(markdown) / 1024 / 1024 / best:.1f} MB/s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
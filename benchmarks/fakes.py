@@ -0,0 +1,448 @@
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+FIXTURES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "transcript_files",
+)
+FIXTURE_VIDEO_ID = "p3qvj9hO_Bo"
+# Rough number of characters per token for English text.
+CHARS_PER_TOKEN = 4
+
+
+def load_fixture(name: str) -> list[dict]:
+    """
+    Loads one of the checked-in `<name>_p3qvj9hO_Bo.json` fixtures.
+    """
+    path = os.path.join(FIXTURES_DIR, f"{name}_{FIXTURE_VIDEO_ID}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeTranscriptSource:
+    """
+    Produces YouTube-like caption chunks of any length from the fixture
+    sections, repeating them until the requested duration is reached.
+    """
+
+    def __init__(self, hours: float, seconds_per_chunk: float = 4.0,
+                 latency: float = 0.0):
+        """
+        Args:
+            hours (float): Duration of the synthetic video.
+            seconds_per_chunk (float): Duration of one caption chunk.
+            latency (float): Simulated fetch latency in seconds.
+        """
+        self.hours = hours
+        self.seconds_per_chunk = seconds_per_chunk
+        self.latency = latency
+        self.sections = load_fixture("sections")
+
+    def __call__(self, video_id: str) -> list[dict]:
+        time.sleep(self.latency)
+        return list(self.iter_chunks())
+
+    def iter_chunks(self):
+        """
+        Yields caption chunks with 'text', 'start' and 'duration' keys.
+        """
+        target = self.hours * 3600
+        start = 0.0
+        for section in itertools.cycle(self.sections):
+            words = section["text"].split()
+            section_seconds = section["end"] - section["start"]
+            words_per_chunk = max(1, round(
+                len(words) * self.seconds_per_chunk / section_seconds
+            ))
+            for i in range(0, len(words), words_per_chunk):
+                if start >= target:
+                    return
+                yield {
+                    "text": " ".join(words[i:i + words_per_chunk]),
+                    "start": round(start, 3),
+                    "duration": self.seconds_per_chunk,
+                }
+                start += self.seconds_per_chunk
+
+
+class FakeChatBackend:
+    """
+    Stand-in for the OpenAI models behind the agents.
+
+    Replies are built from the fixtures so downstream stages see realistic
+    Markdown, and each call sleeps for a fixed latency plus the time needed
+    to "generate" its output at the configured token rate.
+    """
+
+    def __init__(self, latency: float = 0.5, tokens_per_second: float = 80.0,
+                 time_scale: float = 1.0):
+        """
+        Args:
+            latency (float): Time to first token, in seconds.
+            tokens_per_second (float): Simulated generation speed.
+            time_scale (float): Multiplier applied to every simulated delay,
+            to run long scenarios quickly while keeping their proportions.
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.time_scale = time_scale
+        self.calls = 0
+        self._summaries = itertools.cycle(
+            section["summary"] for section in load_fixture(
+                "summarized_sections"
+            )
+        )
+        self._enrichments = itertools.cycle(
+            load_fixture("enrichment_data").values()
+        )
+        self._lock = threading.Lock()
+
+    def __call__(self, agent, message: str) -> SimpleNamespace:
+        latency = self.first_token_latency(agent)
+        content = self.reply(agent.name, message)
+        input_tokens = len(message) // CHARS_PER_TOKEN
+        output_tokens = len(content) // CHARS_PER_TOKEN
+        time.sleep(self.time_scale * (
+            latency + output_tokens / self.tokens_per_second
+        ))
+        return SimpleNamespace(
+            content=content,
+            metrics={
+                "input_tokens": [input_tokens],
+                "output_tokens": [output_tokens],
+            },
+        )
+
+    def stream(self, agent, message: str):
+        """
+        Streaming variant of `__call__`: yields the reply in pieces of a few
+        tokens at the configured rate and returns the run metrics.
+        """
+        latency = self.first_token_latency(agent)
+        content = self.reply(agent.name, message)
+        time.sleep(self.time_scale * latency)
+        piece = CHARS_PER_TOKEN * 4
+        for i in range(0, len(content), piece):
+            time.sleep(self.time_scale * 4 / self.tokens_per_second)
+            yield content[i:i + piece]
+        return {
+            "input_tokens": [len(message) // CHARS_PER_TOKEN],
+            "output_tokens": [len(content) // CHARS_PER_TOKEN],
+        }
+
+    def first_token_latency(self, agent) -> float:
+        """
+        Returns the time to first token of a call to `agent`.
+        """
+        return self.latency
+
+    def reply(self, agent_name: str, message: str) -> str:
+        with self._lock:
+            self.calls += 1
+            if agent_name == "Summarizer":
+                return next(self._summaries)
+            if agent_name == "Research Agent":
+                return next(self._enrichments)
+        if agent_name == "Chapter Editor":
+            # A chapter keeps the heading and opening paragraph of each part.
+            parts = message.split("=== Part ")[1:]
+            return "\n\n".join(
+                "\n".join(part.split("\n")[1:3]) for part in parts
+            )
+        # Atlas: the lesson is the summary, reshaped with some structure.
+        summary = message.split("=== Enrichment ===")[0]
+        summary = summary.replace("=== Summarized Content ===", "").strip()
+        return (
+            f"{summary}\n\n---\n"
+            "> Learning is a treasure that will follow its owner everywhere."
+            "\n\n```python\nprint('hello, Atlas')\n```\n"
+        )
+
+
+class FakeModelError(RuntimeError):
+    """
+    Failure scripted for a call to a fake model.
+    """
+
+
+class ScriptedModelBackend(FakeChatBackend):
+    """
+    Fake chat backend whose models answer with scripted latencies, to
+    exercise the model router.
+
+    Every model ID has a script: the times to first token of its successive
+    calls, in seconds, where None makes the call fail. The last entry of a
+    script repeats once it is exhausted; models without a script answer
+    after the default `latency`.
+    """
+
+    def __init__(self, scripts: dict[str, list[float | None]], **kwargs):
+        """
+        Args:
+            scripts (dict[str, list[float | None]]): Latency script per
+            model ID.
+            **kwargs: Passed to `FakeChatBackend`.
+        """
+        super().__init__(**kwargs)
+        self.scripts = {model: list(script) for model, script in
+                        scripts.items()}
+        self.model_calls: dict[str, int] = {}
+
+    def first_token_latency(self, agent) -> float:
+        model_id = agent.model.id
+        with self._lock:
+            index = self.model_calls.get(model_id, 0)
+            self.model_calls[model_id] = index + 1
+        script = self.scripts.get(model_id)
+        if not script:
+            return self.latency
+        latency = script[min(index, len(script) - 1)]
+        if latency is None:
+            time.sleep(self.time_scale * self.latency)
+            raise FakeModelError(f"{model_id} call {index + 1} failed")
+        return latency
+
+
+class FakeNotionClient:
+    """
+    In-process stand-in for `notion_client.Client` that records every
+    appended block, gives it an ID and simulates the API round-trip latency.
+    """
+
+    def __init__(self, latency: float = 0.15):
+        self.latency = latency
+        self.page_blocks: dict[str, list[dict]] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.pages = SimpleNamespace(create=self._create_page)
+        self.blocks = SimpleNamespace(
+            children=SimpleNamespace(append=self._append, list=self._list),
+            delete=self._delete,
+            update=self._update,
+        )
+
+    def _request(self) -> None:
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+
+    def _create_page(self, **kwargs) -> dict:
+        self._request()
+        page_id = str(uuid.uuid4())
+        with self._lock:
+            self.page_blocks[page_id] = []
+        return {"object": "page", "id": page_id}
+
+    def _append(self, block_id: str, children: list[dict],
+                after: str | None = None) -> dict:
+        self._request()
+        results = [
+            {**child, "id": str(uuid.uuid4())} for child in children
+        ]
+        with self._lock:
+            blocks = self.page_blocks[block_id]
+            position = len(blocks)
+            if after is not None:
+                position = 1 + next(
+                    i for i, block in enumerate(blocks) if block["id"] == after
+                )
+            blocks[position:position] = results
+        return {"object": "list", "results": results}
+
+    def _list(self, block_id: str, page_size: int = 100,
+              start_cursor: str | None = None) -> dict:
+        self._request()
+        with self._lock:
+            blocks = list(self.page_blocks[block_id])
+        start = int(start_cursor or 0)
+        end = start + page_size
+        return {
+            "object": "list",
+            "results": blocks[start:end],
+            "has_more": end < len(blocks),
+            "next_cursor": str(end) if end < len(blocks) else None,
+        }
+
+    def _update(self, block_id: str, **content) -> dict:
+        self._request()
+        with self._lock:
+            for blocks in self.page_blocks.values():
+                for block in blocks:
+                    if block["id"] == block_id:
+                        block.update(content)
+                        return block
+        raise KeyError(block_id)
+
+    def _delete(self, block_id: str) -> dict:
+        self._request()
+        with self._lock:
+            for blocks in self.page_blocks.values():
+                blocks[:] = [b for b in blocks if b["id"] != block_id]
+        return {"object": "block", "id": block_id, "archived": True}
+
+
+class FakeNotionServer:
+    """
+    Serves a `FakeNotionClient` over HTTP on localhost, so that the real
+    `notion_client.Client`, and a `NotionWriter` pointed at it through
+    `base_url` (or `NOTION_BASE_URL`), can be exercised end to end.
+
+    Faults queued with `fail_next` make the next requests fail, either
+    before they are processed or after, as when a response is lost on its
+    way back.
+    """
+
+    def __init__(self, notion: FakeNotionClient | None = None):
+        """
+        Args:
+            notion (FakeNotionClient | None): The pages served. Defaults to
+            an empty client without latency.
+        """
+        self.notion = notion or FakeNotionClient(latency=0)
+        self._faults: list[tuple[int, bool]] = []
+        self._faults_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL to pass to `notion_client.Client` or `NotionWriter`.
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeNotionServer":
+        """
+        Starts serving on a free port in a background thread.
+        """
+        from http.server import ThreadingHTTPServer
+
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), _fake_notion_handler(self)
+        )
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeNotionServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def fail_next(self, status: int, applied: bool = False,
+                  times: int = 1) -> None:
+        """
+        Makes the next `times` requests answer with HTTP `status`.
+
+        Args:
+            status (int): The error status, e.g. 429 or 502.
+            applied (bool): Process the request before failing, as when the
+            response is lost after Notion handled it.
+            times (int): Number of requests that fail.
+        """
+        with self._faults_lock:
+            self._faults.extend([(status, applied)] * times)
+
+    def handle(self, method: str, path: str, query: dict,
+               body: dict) -> tuple[int, dict]:
+        """
+        Answers one API request with its status and JSON body.
+        """
+        with self._faults_lock:
+            fault = self._faults.pop(0) if self._faults else None
+        if fault is not None and not fault[1]:
+            return fault[0], _fake_notion_error(fault[0])
+        try:
+            result = self._route(method, path.strip("/").split("/"),
+                                 query, body)
+        except (KeyError, StopIteration):
+            return 404, _fake_notion_error(404)
+        if fault is not None:
+            return fault[0], _fake_notion_error(fault[0])
+        return 200, result
+
+    def _route(self, method: str, parts: list[str], query: dict,
+               body: dict) -> dict:
+        notion = self.notion
+        if parts[:2] != ["v1", "pages"] and parts[:2] != ["v1", "blocks"]:
+            raise KeyError("/".join(parts))
+        if method == "POST" and parts == ["v1", "pages"]:
+            return notion.pages.create(**body)
+        if len(parts) == 4 and parts[3] == "children":
+            if method == "PATCH":
+                return notion.blocks.children.append(
+                    parts[2], body["children"], after=body.get("after")
+                )
+            if method == "GET":
+                return notion.blocks.children.list(
+                    parts[2],
+                    page_size=int(query.get("page_size", 100)),
+                    start_cursor=query.get("start_cursor"),
+                )
+        if len(parts) == 3 and method == "PATCH":
+            return notion.blocks.update(parts[2], **body)
+        if len(parts) == 3 and method == "DELETE":
+            return notion.blocks.delete(parts[2])
+        raise KeyError("/".join(parts))
+
+
+def _fake_notion_error(status: int) -> dict:
+    codes = {
+        404: "object_not_found",
+        409: "conflict_error",
+        429: "rate_limited",
+        500: "internal_server_error",
+        503: "service_unavailable",
+    }
+    # Like Notion's gateway errors, unknown statuses come without a code.
+    error = {"object": "error", "status": status, "message": "fake error"}
+    if status in codes:
+        error["code"] = codes[status]
+    return error
+
+
+def _fake_notion_handler(server: FakeNotionServer):
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qsl, urlsplit
+
+    class Handler(BaseHTTPRequestHandler):
+        def _serve(self) -> None:
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            status, result = server.handle(
+                self.command, url.path, dict(parse_qsl(url.query)), body
+            )
+            payload = json.dumps(result).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _serve
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
@@ -0,0 +1,99 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Imports that must stay deferred until the first agent, Notion client or
+# transcript download is needed.
+HEAVY_MODULES = (
+    "agno",
+    "duckduckgo_search",
+    "notion_client",
+    "openai",
+    "youtube_transcript_api",
+)
+
+# Milliseconds importing the Streamlit entry point may take.
+BUDGET_MS = 800
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """
+    Imports `module` in a fresh interpreter under `-X importtime`.
+
+    Returns:
+        tuple[float, list[tuple[float, str]]]: The cumulative import time
+        of `module` in seconds and the (self seconds, name) pair of every
+        module imported along the way.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        imported.append((int(self_us) / 1e6, name.strip()))
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    return total, imported
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Fail when importing the app takes longer than a budget or pulls "
+            "in the heavy agent and API client libraries."
+        )
+    )
+    parser.add_argument(
+        "--module", default="main",
+        help="Module to import (default: main, the Streamlit entry point).",
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=BUDGET_MS,
+        help=f"Maximum import time in milliseconds (default: {BUDGET_MS}).",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="Imports measured; the fastest one counts (default: 3).",
+    )
+    args = parser.parse_args(argv)
+
+    best, imported = min(
+        (measure_import(args.module) for _ in range(max(args.runs, 1))),
+        key=lambda measurement: measurement[0],
+    )
+    heavy = sorted({
+        name for _, name in imported
+        if name.split(".")[0] in HEAVY_MODULES
+    })
+    print(
+        f"import {args.module}: {best * 1000:.0f} ms "
+        f"(budget {args.budget_ms:.0f} ms), {len(imported)} modules"
+    )
+    for seconds, name in sorted(imported, reverse=True)[:10]:
+        print(f"  {seconds * 1000:7.1f} ms  {name}")
+
+    failed = False
+    if best * 1000 > args.budget_ms:
+        print(f"❌ Import time is over budget by "
+              f"{best * 1000 - args.budget_ms:.0f} ms")
+        failed = True
+    if heavy:
+        print(f"❌ Heavy modules imported eagerly: {', '.join(heavy[:10])}")
+        failed = True
+    if not failed:
+        print("✅ Import time within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pipeline.runner as runner
+from agents.runner import set_agent_backend
+from benchmarks.fakes import (
+    FakeChatBackend,
+    FakeNotionClient,
+    FakeTranscriptSource
+)
+from core.metrics import metrics
+from core.notion_writer import NotionWriter, TokenBucket, set_notion_writer
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Returns the `q`-th percentile (0-100) of `values` using nearest rank.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def stage_latencies(events: list[dict]) -> dict[str, dict]:
+    """
+    Groups stage events and computes their latency distribution.
+    """
+    by_stage: dict[str, list[float]] = {}
+    for event in events:
+        by_stage.setdefault(event["stage"], []).append(event["seconds"])
+    return {
+        stage: {
+            "calls": len(seconds),
+            "p50": round(percentile(seconds, 50), 4),
+            "p95": round(percentile(seconds, 95), 4),
+            "total": round(sum(seconds), 4),
+        }
+        for stage, seconds in by_stage.items()
+    }
+
+
+class QuietReporter(runner.PipelineReporter):
+    """
+    Discards pipeline progress so that benchmark output stays readable.
+    """
+
+    def stage(self, title: str) -> None:
+        pass
+
+    def message(self, text: str) -> None:
+        pass
+
+    def progress(self, fraction: float, text: str) -> None:
+        pass
+
+    def run_summary(self, rows: list[dict]) -> None:
+        pass
+
+
+def run_scenario(hours: float, run: int, args,
+                 notion: FakeNotionClient) -> dict:
+    """
+    Runs the whole pipeline once on a synthetic video of `hours` hours with
+    every external service replaced by a local stand-in. Repeated runs share
+    `notion`, so they can update the page published by the first one.
+    """
+    scale = args.time_scale
+    chat = FakeChatBackend(
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        time_scale=scale,
+    )
+    notion_requests = notion.requests
+    set_agent_backend(chat, stream_backend=chat.stream)
+    runner.STREAM_LESSONS = not args.no_stream
+    runner.UPDATE_PAGES = not args.no_update
+    set_notion_writer(NotionWriter(
+        auth=None,
+        client=notion,
+        limiter=TokenBucket(rate=args.notion_rate / scale),
+    ))
+    runner.fetch_transcript_raw = FakeTranscriptSource(hours)
+
+    # Each scenario gets its own video ID, so checkpoints never leak between
+    # scenarios; repeated runs reuse it to exercise resume and caching.
+    video_id = f"bench{hours:g}h".replace(".", "_")
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started_at = time.time()
+    started = time.perf_counter()
+    runner.run_pipeline(
+        video_id,
+        reporter=QuietReporter(),
+        fresh=not args.resume,
+    )
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    set_agent_backend(None)
+    set_notion_writer(None)
+
+    events = metrics.events(video_id=video_id)
+    run_ids = [event["labels"]["run_id"] for event in events]
+    events = [e for e in events if e["labels"]["run_id"] == run_ids[-1]]
+    sections = sum(e["stage"] == "summarizer_agent.run" for e in events)
+    tokens = sum(e["input_tokens"] + e["output_tokens"] for e in events)
+    summaries = [
+        e["started_at"] for e in events
+        if e["stage"] == "summarizer_agent.run"
+    ]
+    first_blocks = [
+        e["first_block_seconds"] for e in events if "first_block_seconds" in e
+    ]
+    return {
+        "hours": hours,
+        "run": run,
+        "wall_seconds": round(wall, 3),
+        # Simulated delays are scaled down; scale back for real-world terms.
+        "projected_wall_seconds": round(wall / scale, 1),
+        "sections": sections,
+        "sections_per_second": round(sections / wall, 2) if wall else 0,
+        "video_hours_per_hour": round(hours * 3600 * scale / wall, 2),
+        "llm_calls": chat.calls,
+        "notion_requests": notion.requests - notion_requests,
+        "tokens": tokens,
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "first_summary_seconds": (
+            round(min(summaries) - started_at, 4) if summaries else 0.0
+        ),
+        "lesson_first_block_p50": round(percentile(first_blocks, 50), 4),
+        "stages": stage_latencies(events),
+    }
+
+
+def print_result(result: dict) -> None:
+    print(
+        f"\n{result['hours']:g}h video (run {result['run']}): "
+        f"{result['wall_seconds']}s wall "
+        f"(~{result['projected_wall_seconds']}s unscaled), "
+        f"{result['sections']} sections, "
+        f"{result['sections_per_second']} sections/s, "
+        f"{result['llm_calls']} LLM calls, "
+        f"{result['notion_requests']} Notion requests, "
+        f"{result['tokens']} tokens, "
+        f"peak memory {result['peak_memory_mb']} MB"
+    )
+    if result["first_summary_seconds"]:
+        print(
+            "  time to first section summary: "
+            f"{result['first_summary_seconds']}s"
+        )
+    if result["lesson_first_block_p50"]:
+        print(
+            "  time to first lesson block (p50): "
+            f"{result['lesson_first_block_p50']}s"
+        )
+    print(f"  {'stage':<24}{'calls':>7}{'p50 (s)':>10}{'p95 (s)':>10}")
+    for stage, row in result["stages"].items():
+        print(
+            f"  {stage:<24}{row['calls']:>7}"
+            f"{row['p50']:>10}{row['p95']:>10}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark the Atlas pipeline offline, with a fake chat model, "
+            "a fake Notion client and a synthetic transcript."
+        )
+    )
+    parser.add_argument(
+        "--hours", type=float, nargs="+", default=[1, 3, 10],
+        help="Video durations to benchmark (default: 1 3 10).",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=1,
+        help="Runs per duration; later runs show cache/resume effects.",
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.8,
+        help="Simulated model time to first token in seconds.",
+    )
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=80.0,
+        help="Simulated model generation speed.",
+    )
+    parser.add_argument(
+        "--notion-latency", type=float, default=0.15,
+        help="Simulated Notion round trip in seconds.",
+    )
+    parser.add_argument(
+        "--notion-rate", type=float, default=3.0,
+        help="Notion requests per second allowed by the rate limiter.",
+    )
+    parser.add_argument(
+        "--time-scale", type=float, default=0.01,
+        help=(
+            "Multiplier applied to every simulated delay so long videos "
+            "run quickly (default: 0.01)."
+        ),
+    )
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="Enable the agent response cache (in a temporary folder).",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Keep checkpoints between runs instead of starting fresh.",
+    )
+    parser.add_argument(
+        "--no-stream", action="store_true",
+        help="Build each lesson from the full model response.",
+    )
+    parser.add_argument(
+        "--no-update", action="store_true",
+        help="Create a new page on every run instead of updating the first.",
+    )
+    parser.add_argument(
+        "--json", default=None,
+        help="Also write the results to this JSON file.",
+    )
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="atlas-bench-")
+    os.environ["ATLAS_ARTIFACTS_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["ATLAS_CACHE_DIR"] = os.path.join(workdir, "cache")
+    if not args.cache:
+        os.environ["ATLAS_CACHE_DISABLED"] = "1"
+    print(f"Benchmark artifacts in {workdir}")
+
+    results = []
+    for hours in args.hours:
+        notion = FakeNotionClient(
+            latency=args.notion_latency * args.time_scale
+        )
+        for run in range(1, args.runs + 1):
+            result = run_scenario(hours, run, args, notion)
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from agents.routing import ModelRouter, set_model_router
+from agents.runner import set_agent_backend
+from agents.summarizer_agent import summarize_section
+from benchmarks.fakes import ScriptedModelBackend, load_fixture
+from core.metrics import metrics, run_context
+
+PRIMARY = "gpt-4o-mini"
+FALLBACK = "gpt-4o"
+
+
+def latency_script(args) -> list[float | None]:
+    """
+    Script of the primary model: healthy, then slow for `--slow-calls`
+    calls (failing every `--fail-every`-th of them), then healthy again.
+    """
+    slow = [
+        None if args.fail_every and i % args.fail_every == 0 else args.slow
+        for i in range(1, args.slow_calls + 1)
+    ]
+    return [args.fast] * args.fast_calls + slow + [args.fast]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Summarize sections through a primary model that slows down "
+            "and recovers, and show the router moving calls to the fallback "
+            "model and back."
+        )
+    )
+    parser.add_argument("--calls", type=int, default=40,
+                        help="Sections summarized (default: 40).")
+    parser.add_argument("--slo", type=float, default=1.0,
+                        help="Summarizer latency SLO in seconds "
+                        "(default: 1.0).")
+    parser.add_argument("--fast", type=float, default=0.2,
+                        help="Latency of the healthy primary (default: 0.2).")
+    parser.add_argument("--slow", type=float, default=3.0,
+                        help="Latency of the degraded primary "
+                        "(default: 3.0).")
+    parser.add_argument("--fallback", type=float, default=0.6,
+                        help="Latency of the fallback (default: 0.6).")
+    parser.add_argument("--fast-calls", type=int, default=8,
+                        help="Primary calls before it degrades (default: 8).")
+    parser.add_argument("--slow-calls", type=int, default=6,
+                        help="Primary calls while degraded (default: 6).")
+    parser.add_argument("--fail-every", type=int, default=0,
+                        help="Fail every n-th degraded call; 0 never fails.")
+    parser.add_argument("--probe-every", type=int, default=4,
+                        help="Fallback calls between probes of the primary "
+                        "(default: 4).")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Multiplier applied to every simulated delay "
+                        "(default: 0.05).")
+    args = parser.parse_args(argv)
+
+    os.environ["ATLAS_ARTIFACTS_DIR"] = tempfile.mkdtemp(prefix="atlas-")
+    os.environ["ATLAS_CACHE_DISABLED"] = "1"
+    scale = args.time_scale
+    # Latencies are recorded in scaled seconds, so the SLO is scaled too.
+    router = ModelRouter(
+        routes={"summarizer": (PRIMARY, FALLBACK)},
+        latency_slos={"summarizer": args.slo * scale},
+        window=5,
+        probe_every=args.probe_every,
+    )
+    chat = ScriptedModelBackend(
+        {PRIMARY: latency_script(args), FALLBACK: [args.fallback]},
+        latency=args.fast,
+        # Fast generation keeps the call latency close to the script.
+        tokens_per_second=2000,
+        time_scale=scale,
+    )
+    set_model_router(router)
+    set_agent_backend(chat, stream_backend=chat.stream)
+
+    sections = load_fixture("sections")
+    served = []
+    with run_context(run_id="routing_bench"):
+        for i in range(args.calls):
+            before = dict(chat.model_calls)
+            section = summarize_section(dict(sections[i % len(sections)]))
+            called = [
+                model for model, count in chat.model_calls.items()
+                if count > before.get(model, 0)
+            ]
+            model = called[-1] if section["summary"] else "-"
+            served.append(model)
+            print(f"call {i + 1:3d}: {' -> '.join(called):22s} "
+                  f"served by {model}")
+    set_agent_backend(None)
+    set_model_router(None)
+
+    print()
+    for row in router.stats():
+        print(f"{row['model']:12s} calls={row['calls']:3d} "
+              f"median={row['latency'] / scale:.2f}s "
+              f"errors={row['error_rate']:.0%}")
+    rows = metrics.summary(run_id="routing_bench")
+    fallbacks = sum(row["fallbacks"] for row in rows)
+    errors = sum(row["errors"] for row in rows)
+    print(f"{fallbacks} of {args.calls} calls served by the fallback, "
+          f"{errors} failed")
+
+    switched = FALLBACK in served
+    recovered = served[-1] == PRIMARY
+    if switched and recovered and not errors:
+        print("✅ Switched to the fallback and back to the primary")
+        return 0
+    print("❌ Expected the router to switch to the fallback and recover")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
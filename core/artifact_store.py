@@ -0,0 +1,342 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import IO, Any, Iterable, Iterator
+
+DEFAULT_ROOT = "transcript_files"
+MANIFEST_FILE = "manifest.json"
+RECORDS_SUFFIX = ".jsonl"
+COMPRESSED_SUFFIX = ".jsonl.gz"
+_MISSING = object()
+
+
+def _open_text(path: str, mode: str, compressed: bool) -> IO[str]:
+    opener = gzip.open if compressed else open
+    return opener(path, mode + "t", encoding="utf-8")
+
+
+def write_json_atomic(path: str, data: Any, indent: int | None = 2) -> None:
+    """
+    Writes `data` as JSON to `path` so that readers never see a partially
+    written file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_records_atomic(path: str, records: Iterable[Any]) -> int:
+    """
+    Writes `records` to `path` as JSON Lines, one record at a time, so that
+    readers never see a partially written file. Paths ending in `.gz` are
+    gzip-compressed.
+
+    Returns:
+        int: The number of records written.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    count = 0
+    try:
+        with _open_text(tmp_path, "w", path.endswith(".gz")) as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def iter_records(path: str) -> Iterator[Any]:
+    """
+    Streams the records of a JSON Lines file, compressed or not, reading
+    one line at a time.
+
+    Files from older versions of Atlas hold a single JSON document: they
+    are loaded whole and their items (or, for an object, their
+    `{"key", "value"}` pairs) yielded.
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            yield from ({"key": k, "value": v} for k, v in data.items())
+        else:
+            yield from data
+        return
+    with _open_text(path, "r", path.endswith(".gz")) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind.
+                continue
+
+
+class ArtifactStore:
+    """
+    Stores the intermediate artifacts of every processed video.
+
+    Each video gets its own folder (`<root>/<video_id>/`) holding one file
+    per artifact and a `manifest.json` index describing them, so looking up
+    an artifact is a direct path access instead of a directory scan, and many
+    videos can be processed side by side.
+
+    Artifacts are JSON Lines files with one record per line: the items of a
+    list artifact (transcript chunks, sections, ...) or the `{"key",
+    "value"}` pairs of a dict artifact. They are written atomically, record
+    by record, optionally gzip-compressed, and can be streamed back without
+    loading the whole file. Record logs, which grow one appended line at a
+    time, are never compressed.
+
+    Files from older versions of Atlas, stored as one JSON document in
+    `<root>/<video_id>/<name>.json` or flat as
+    `<root>/<name>_<video_id>.json`, are still readable.
+    """
+
+    # Per-video locks shared by every store instance in the process.
+    _locks: dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root: str = DEFAULT_ROOT, compress: bool = False):
+        """
+        Args:
+            root (str): Folder holding one subfolder per video.
+            compress (bool): Gzip the artifacts written from now on.
+        """
+        self.root = root
+        self.compress = compress
+
+    def path(self, video_id: str, name: str) -> str:
+        """
+        Returns the path artifact `name` of `video_id` is written to.
+        """
+        suffix = COMPRESSED_SUFFIX if self.compress else RECORDS_SUFFIX
+        return os.path.join(self.root, video_id, f"{name}{suffix}")
+
+    def records_path(self, video_id: str, name: str) -> str:
+        """
+        Returns the path of the append-only record log `name` of `video_id`.
+        """
+        return os.path.join(self.root, video_id, f"{name}{RECORDS_SUFFIX}")
+
+    def manifest(self, video_id: str) -> dict:
+        """
+        Returns the manifest of `video_id`, mapping artifact names to their
+        metadata.
+        """
+        path = os.path.join(self.root, video_id, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"video_id": video_id, "artifacts": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def entry(self, video_id: str, name: str) -> dict | None:
+        """
+        Returns the manifest metadata of one artifact, or None if absent.
+        """
+        return self.manifest(video_id)["artifacts"].get(name)
+
+    def locate(self, video_id: str, name: str) -> str | None:
+        """
+        Returns the path of artifact `name` of `video_id` if it exists.
+        """
+        for path in self._paths(video_id, name):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def has(self, video_id: str, name: str) -> bool:
+        """
+        Returns True if artifact `name` exists for `video_id`.
+        """
+        return self.locate(video_id, name) is not None
+
+    def get(self, video_id: str, name: str, default: Any = _MISSING) -> Any:
+        """
+        Loads artifact `name` of `video_id` whole. Use `read_records` to
+        stream it instead.
+
+        Raises:
+            FileNotFoundError: If the artifact does not exist and no
+            `default` is given.
+        """
+        path = self.locate(video_id, name)
+        if path is None:
+            if default is _MISSING:
+                raise FileNotFoundError(
+                    f"No '{name}' artifact found for video ID: {video_id}"
+                )
+            return default
+        if path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        entry = self.entry(video_id, name) or {}
+        if entry.get("shape") == "dict":
+            return {
+                record["key"]: record["value"]
+                for record in iter_records(path)
+            }
+        return list(iter_records(path))
+
+    def put(self, video_id: str, name: str, data: Any, **metadata) -> str:
+        """
+        Atomically stores artifact `name` of `video_id` and indexes it in the
+        manifest together with `metadata`.
+
+        Args:
+            video_id (str): The video the artifact belongs to.
+            name (str): Artifact name, e.g. `sections`.
+            data (Any): A dict, or any iterable of JSON-serializable
+            records. Generators are consumed one record at a time.
+            **metadata: Stored in the artifact's manifest entry.
+
+        Returns:
+            str: The path of the stored artifact.
+        """
+        path = self.path(video_id, name)
+        shape = "dict" if isinstance(data, dict) else "list"
+        if shape == "dict":
+            data = ({"key": k, "value": v} for k, v in data.items())
+        count = write_records_atomic(path, data)
+        with self._lock(video_id):
+            # Drop copies in other formats, which would now be stale.
+            for other in self._paths(video_id, name)[:-1]:
+                if other != path and os.path.exists(other):
+                    os.remove(other)
+            self._update_manifest(
+                video_id, name, {**metadata, "shape": shape,
+                                 "records": count},
+                replace=True,
+            )
+        return path
+
+    def update(self, video_id: str, name: str, **metadata) -> None:
+        """
+        Merges `metadata` into the manifest entry of artifact `name`.
+        """
+        with self._lock(video_id):
+            self._update_manifest(video_id, name, metadata, replace=False)
+
+    def delete(self, video_id: str, name: str) -> None:
+        """
+        Removes artifact `name` (and its record log) of `video_id`.
+        """
+        with self._lock(video_id):
+            for path in self._paths(video_id, name)[:-1]:
+                if os.path.exists(path):
+                    os.remove(path)
+            manifest = self.manifest(video_id)
+            if manifest["artifacts"].pop(name, None) is not None:
+                self._write_manifest(video_id, manifest)
+
+    def append_record(self, video_id: str, name: str, record: Any) -> None:
+        """
+        Appends one JSON record to the record log `name` of `video_id`.
+        Safe to call from worker threads.
+        """
+        line = json.dumps(record, ensure_ascii=False)
+        path = self.records_path(video_id, name)
+        with self._lock(video_id):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def read_records(self, video_id: str, name: str) -> Iterator[Any]:
+        """
+        Streams the records of artifact or record log `name` of `video_id`,
+        one line at a time. Yields nothing if it does not exist.
+        """
+        path = self.locate(video_id, name)
+        if path is not None:
+            yield from iter_records(path)
+
+    def videos(self) -> list[str]:
+        """
+        Returns the IDs of all stored videos, most recently updated first.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        updated = {}
+        for video_id in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, video_id, MANIFEST_FILE)
+            if os.path.exists(manifest_path):
+                updated[video_id] = os.path.getmtime(manifest_path)
+        return sorted(updated, key=updated.get, reverse=True)
+
+    def latest_video(self) -> str:
+        """
+        Returns the ID of the most recently updated video.
+
+        Raises:
+            FileNotFoundError: If the store holds no video.
+        """
+        videos = self.videos()
+        if not videos:
+            raise FileNotFoundError(
+                f"No processed videos found in {self.root}"
+            )
+        return videos[0]
+
+    def _paths(self, video_id: str, name: str) -> list[str]:
+        # Every file artifact `name` may be stored in, newest format first;
+        # the flat legacy file is last and never removed.
+        base = os.path.join(self.root, video_id, name)
+        return [
+            base + COMPRESSED_SUFFIX,
+            base + RECORDS_SUFFIX,
+            base + ".json",
+            os.path.join(self.root, f"{name}_{video_id}.json"),
+        ]
+
+    def _lock(self, video_id: str) -> threading.Lock:
+        key = os.path.join(os.path.abspath(self.root), video_id)
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _update_manifest(self, video_id: str, name: str, metadata: dict,
+                         replace: bool) -> None:
+        manifest = self.manifest(video_id)
+        entry = {} if replace else manifest["artifacts"].get(name, {})
+        entry.update(metadata)
+        entry["updated_at"] = time.time()
+        manifest["artifacts"][name] = entry
+        self._write_manifest(video_id, manifest)
+
+    def _write_manifest(self, video_id: str, manifest: dict) -> None:
+        write_json_atomic(
+            os.path.join(self.root, video_id, MANIFEST_FILE), manifest
+        )
+
+
+_artifact_store: ArtifactStore | None = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """
+    Returns the process-wide artifact store rooted at `ATLAS_ARTIFACTS_DIR`
+    (default `transcript_files`). Setting `ATLAS_COMPRESS_ARTIFACTS=1`
+    gzips the artifacts it writes.
+    """
+    global _artifact_store
+    if _artifact_store is None:
+        compress = os.getenv("ATLAS_COMPRESS_ARTIFACTS", "").lower()
+        _artifact_store = ArtifactStore(
+            os.getenv("ATLAS_ARTIFACTS_DIR", DEFAULT_ROOT),
+            compress=compress in ("1", "true", "yes"),
+        )
+    return _artifact_store
@@ -0,0 +1,146 @@
+from typing import Any, Iterator
+
+from core.artifact_store import ArtifactStore, get_artifact_store
+
+# Pipeline stages in execution order, mapped to the artifact holding their
+# output.
+STAGE_ARTIFACTS = {
+    "fetch": "transcript",
+    "split": "sections",
+    "summarize": "summarized_sections",
+    "topics": "topics",
+    "research": "enrichment_data",
+    "chapters": "chapters",
+    "lessons": "lesson_blocks",
+    "page": "notion_page",
+}
+
+
+class Checkpoint:
+    """
+    Stage checkpoints of one video's pipeline run.
+
+    Each completed stage stores its output in the artifact store and is
+    marked as complete in the video's manifest, so a re-run of the same video
+    resumes after the last completed stage. Stages that work item by item
+    (sections, topics) can also save each item as soon as it is done, which
+    lets an interrupted stage resume where it stopped.
+    """
+
+    def __init__(self, video_id: str, store: ArtifactStore | None = None):
+        """
+        Args:
+            video_id (str): The YouTube video ID of the run.
+            store (ArtifactStore | None): Where checkpoints are kept.
+            Defaults to the process-wide artifact store.
+        """
+        self.video_id = video_id
+        self.store = store or get_artifact_store()
+
+    def path(self, stage: str) -> str:
+        """
+        Returns the path of the output file of `stage`.
+        """
+        artifact = STAGE_ARTIFACTS[stage]
+        return (
+            self.store.locate(self.video_id, artifact)
+            or self.store.path(self.video_id, artifact)
+        )
+
+    def is_done(self, stage: str) -> bool:
+        """
+        Returns True if `stage` completed and its output is still stored.
+        """
+        entry = self.store.entry(self.video_id, STAGE_ARTIFACTS[stage])
+        return bool(entry and entry.get("complete")) and self.store.has(
+            self.video_id, STAGE_ARTIFACTS[stage]
+        )
+
+    def load(self, stage: str) -> Any:
+        """
+        Loads the output of a completed stage.
+        """
+        return self.store.get(self.video_id, STAGE_ARTIFACTS[stage])
+
+    def records(self, stage: str) -> Iterator[Any]:
+        """
+        Streams the output of a completed stage record by record.
+        """
+        return self.store.read_records(self.video_id, STAGE_ARTIFACTS[stage])
+
+    def save(self, stage: str, data: Any, complete: bool = True,
+             invalidate_later: bool = True) -> None:
+        """
+        Stores the output of `stage`.
+
+        A complete stage is marked as done and invalidates every later stage,
+        since their outputs were derived from the previous version of this
+        one. An incomplete stage (e.g. some sections failed) keeps its saved
+        items so that the next run only redoes the missing ones.
+
+        A streamed stage passes `invalidate_later=False`: the later stages
+        already worked from this very output while it was produced, and
+        their saved items must survive.
+        """
+        self.store.put(
+            self.video_id, STAGE_ARTIFACTS[stage], data, complete=complete
+        )
+        if not complete:
+            return
+        self.discard_items(stage)
+        if not invalidate_later:
+            return
+        stages = list(STAGE_ARTIFACTS)
+        for later in stages[stages.index(stage) + 1:]:
+            if self.store.entry(self.video_id, STAGE_ARTIFACTS[later]):
+                self.store.update(
+                    self.video_id, STAGE_ARTIFACTS[later], complete=False
+                )
+            self.discard_items(later)
+
+    def load_items(self, stage: str) -> dict:
+        """
+        Loads the items saved so far by an unfinished stage.
+
+        Returns:
+            dict: Item values keyed by the key they were saved with.
+        """
+        return dict(self.iter_items(stage))
+
+    def iter_items(self, stage: str) -> Iterator[tuple[Any, Any]]:
+        """
+        Streams the `(key, value)` items saved so far by an unfinished
+        stage, in the order they were saved.
+        """
+        for record in self.store.read_records(
+            self.video_id, self._items_name(stage)
+        ):
+            yield record["key"], record["value"]
+
+    def save_item(self, stage: str, key, value: Any) -> None:
+        """
+        Saves one finished item of `stage`. Safe to call from worker
+        threads.
+        """
+        self.store.append_record(
+            self.video_id,
+            self._items_name(stage),
+            {"key": key, "value": value},
+        )
+
+    def discard_items(self, stage: str) -> None:
+        """
+        Forgets the items saved so far by an unfinished stage.
+        """
+        self.store.delete(self.video_id, self._items_name(stage))
+
+    def reset(self) -> None:
+        """
+        Deletes every checkpoint of the video so the next run starts fresh.
+        """
+        for stage, artifact in STAGE_ARTIFACTS.items():
+            self.store.delete(self.video_id, artifact)
+            self.discard_items(stage)
+
+    def _items_name(self, stage: str) -> str:
+        return f"{STAGE_ARTIFACTS[stage]}.partial"
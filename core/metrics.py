@@ -0,0 +1,228 @@
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Numeric fields a stage event may accumulate while it runs.
+COUNTERS = ("input_tokens", "output_tokens", "retries", "bytes_sent",
+            "cache_hits", "fallbacks")
+
+_run_labels: contextvars.ContextVar[dict] = contextvars.ContextVar(
+    "atlas_run_labels", default={}
+)
+_current_event: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "atlas_current_event", default=None
+)
+
+
+class MetricsRecorder:
+    """
+    Collects one event per executed pipeline stage.
+
+    Each event records the stage name, the labels of the run it belongs to
+    (e.g. the video ID), its wall time, its outcome and the counters
+    accumulated while it ran: prompt/completion tokens, retries, bytes sent,
+    cache hits and agent runs served by a fallback model.
+    """
+
+    def __init__(self, max_events: int = 100_000):
+        """
+        Args:
+            max_events (int): Number of most recent events kept in memory.
+        """
+        self._events: deque[dict] = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage: str, **labels) -> Iterator[dict]:
+        """
+        Measures the code run inside the `with` block as one `stage` event.
+
+        Counters added with `add_to_current_stage` while the block runs are
+        accumulated on the event.
+
+        Args:
+            stage (str): Name of the stage, e.g. `create_page`.
+            **labels: Extra labels stored on the event.
+
+        Yields:
+            dict: The event being recorded.
+        """
+        event = {
+            "stage": stage,
+            "labels": {**_run_labels.get(), **labels},
+            "started_at": time.time(),
+            **{counter: 0 for counter in COUNTERS},
+        }
+        token = _current_event.set(event)
+        started = time.perf_counter()
+        try:
+            yield event
+            event["status"] = "ok"
+        except BaseException as e:
+            event["status"] = "error"
+            event["error"] = repr(e)
+            raise
+        finally:
+            event["seconds"] = time.perf_counter() - started
+            _current_event.reset(token)
+            with self._lock:
+                self._events.append(event)
+
+    def events(self, **labels) -> list[dict]:
+        """
+        Returns the recorded events whose labels match `labels`.
+        """
+        with self._lock:
+            events = list(self._events)
+        return [
+            event for event in events
+            if all(event["labels"].get(k) == v for k, v in labels.items())
+        ]
+
+    def summary(self, **labels) -> list[dict]:
+        """
+        Aggregates the events matching `labels` per stage.
+
+        Returns:
+            list[dict]: One row per stage, in order of first appearance, with
+            the call count, total and maximum wall time, errors and summed
+            counters.
+        """
+        rows: dict[str, dict] = {}
+        for event in self.events(**labels):
+            row = rows.setdefault(event["stage"], {
+                "stage": event["stage"],
+                "calls": 0,
+                "errors": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                **{counter: 0 for counter in COUNTERS},
+            })
+            row["calls"] += 1
+            row["errors"] += event["status"] == "error"
+            row["total_seconds"] += event["seconds"]
+            row["max_seconds"] = max(row["max_seconds"], event["seconds"])
+            for counter in COUNTERS:
+                row[counter] += event[counter]
+        for row in rows.values():
+            row["total_seconds"] = round(row["total_seconds"], 3)
+            row["max_seconds"] = round(row["max_seconds"], 3)
+        return list(rows.values())
+
+    def to_jsonl(self, **labels) -> str:
+        """
+        Exports the events matching `labels` as JSON Lines.
+        """
+        return "".join(
+            json.dumps(event, ensure_ascii=False) + "\n"
+            for event in self.events(**labels)
+        )
+
+    def to_prometheus(self, **labels) -> str:
+        """
+        Exports per-stage aggregates of the events matching `labels` in the
+        Prometheus text exposition format.
+        """
+        rows = self.summary(**labels)
+        metrics = [
+            ("atlas_stage_calls_total", "counter",
+             "Number of executed stage calls.", "calls"),
+            ("atlas_stage_errors_total", "counter",
+             "Number of stage calls that raised.", "errors"),
+            ("atlas_stage_seconds_total", "counter",
+             "Wall time spent in the stage.", "total_seconds"),
+            ("atlas_stage_seconds_max", "gauge",
+             "Longest single stage call.", "max_seconds"),
+            ("atlas_stage_input_tokens_total", "counter",
+             "Prompt tokens sent to the models.", "input_tokens"),
+            ("atlas_stage_output_tokens_total", "counter",
+             "Completion tokens received from the models.", "output_tokens"),
+            ("atlas_stage_retries_total", "counter",
+             "Retried requests.", "retries"),
+            ("atlas_stage_bytes_sent_total", "counter",
+             "Request payload bytes sent.", "bytes_sent"),
+            ("atlas_stage_cache_hits_total", "counter",
+             "Agent runs served from the response cache.", "cache_hits"),
+            ("atlas_stage_fallbacks_total", "counter",
+             "Agent runs served by a stage's fallback model.", "fallbacks"),
+        ]
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for row in rows:
+                stage = row["stage"].replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{name}{{stage="{stage}"}} {row[field]}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """
+        Forgets every recorded event.
+        """
+        with self._lock:
+            self._events.clear()
+
+
+metrics = MetricsRecorder()
+
+
+@contextmanager
+def run_context(**labels) -> Iterator[None]:
+    """
+    Attaches `labels` (e.g. `video_id`, `run_id`) to every event recorded
+    inside the `with` block, including in threads started through
+    `in_current_context`.
+    """
+    token = _run_labels.set({**_run_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _run_labels.reset(token)
+
+
+def add_to_current_stage(**counters: int) -> None:
+    """
+    Adds to the counters of the innermost stage being measured, if any.
+    """
+    event = _current_event.get()
+    if event is None:
+        return
+    for name, value in counters.items():
+        event[name] = event.get(name, 0) + value
+
+
+def in_current_context(fn: Callable) -> Callable:
+    """
+    Wraps `fn` so that, when run in a worker thread, it sees the run labels
+    and current stage of the thread that wrapped it.
+    """
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+def token_usage(response_metrics: dict | None) -> dict:
+    """
+    Extracts prompt and completion token counts from the metrics of an agno
+    run response, whose values are lists with one entry per model call.
+    """
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    if not response_metrics:
+        return usage
+    for field, keys in (("input_tokens", ("input_tokens", "prompt_tokens")),
+                        ("output_tokens",
+                         ("output_tokens", "completion_tokens"))):
+        for key in keys:
+            values = response_metrics.get(key)
+            if values:
+                if not isinstance(values, (list, tuple)):
+                    values = [values]
+                usage[field] = sum(v for v in values if v)
+                break
+    return usage
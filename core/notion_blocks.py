@@ -0,0 +1,384 @@
+import re
+
+# Notion rejects rich text objects longer than this.
+MAX_TEXT_LENGTH = 2000
+# Notion accepts at most two levels of nested children per request, i.e.
+# list items, their children and their grandchildren.
+MAX_LIST_DEPTH = 3
+
+NOTION_LANGUAGES = frozenset({
+    "abap", "agda", "arduino", "ascii art", "assembly", "bash", "basic",
+    "bnf", "c", "c#", "c++", "clojure", "coffeescript", "coq", "css", "dart",
+    "dhall", "diff", "docker", "ebnf", "elixir", "elm", "erlang", "f#",
+    "flow", "fortran", "gherkin", "glsl", "go", "graphql", "groovy",
+    "haskell", "hcl", "html", "idris", "java", "javascript", "json", "julia",
+    "kotlin", "latex", "less", "lisp", "livescript", "llvm ir", "lua",
+    "makefile", "markdown", "markup", "matlab", "mathematica", "mermaid",
+    "nix", "notion formula", "objective-c", "ocaml", "pascal", "perl", "php",
+    "plain text", "powershell", "prolog", "protobuf", "purescript", "python",
+    "r", "racket", "reason", "ruby", "rust", "sass", "scala", "scheme",
+    "scss", "shell", "smalltalk", "solidity", "sql", "swift", "toml",
+    "typescript", "vb.net", "verilog", "vhdl", "visual basic",
+    "webassembly", "xml", "yaml", "java/c/c++/c#", "notionscript",
+})
+# Common fence labels that are not Notion language names.
+LANGUAGE_ALIASES = {
+    "cpp": "c++", "cs": "c#", "csharp": "c#", "console": "shell",
+    "dockerfile": "docker", "golang": "go", "js": "javascript",
+    "jsx": "javascript", "kt": "kotlin", "md": "markdown",
+    "objc": "objective-c", "ps1": "powershell", "py": "python",
+    "python3": "python", "rb": "ruby", "rs": "rust", "sh": "shell",
+    "text": "plain text", "ts": "typescript", "tsx": "typescript",
+    "txt": "plain text", "yml": "yaml", "zsh": "shell",
+}
+
+HEADING_TYPES = ("heading_1", "heading_2", "heading_3")
+LIST_TYPES = {marker: "bulleted_list_item" for marker in "-*+•"}
+LIST_TYPES.update({digit: "numbered_list_item" for digit in "0123456789"})
+# First characters of every line that is not a plain paragraph; any other
+# line skips the block regex entirely.
+_BLOCK_STARTS = frozenset("#>-*+_•0123456789 \t")
+# Each alternative ends with a distinct named group, so `lastgroup` tells
+# which kind of block a line is.
+_BLOCK_RE = re.compile(
+    r"(?P<indent>[ \t]*)(?P<marker>[-*+][ \t]+|•[ \t]*|\d{1,9}[.)][ \t]+)"
+    r"(?P<item>.*)"
+    r"|(?P<hashes>#{1,6})[ \t]+(?P<heading>.*)"
+    r"|[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*(?P<divider>)$"
+    r"|>[ \t]?(?P<quote>.*)"
+)
+_INLINE_RE = re.compile(
+    r"`(?P<code>[^`]+)`"
+    r"|\[(?P<label>[^\]]+)\]\((?P<href>https?://[^)\s]+)\)"
+    r"|\*\*\*(?P<bold_italic>[^*]+?)\*\*\*"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*"
+)
+# Bare URLs are looked for separately, in text that contains "://": an "h"
+# alternative in `_INLINE_RE` would make it stop at every letter h.
+_URL_RE = re.compile(r"https?://[^\s<>\[\]`]+")
+_URL_TRAILING = ".,;:!?'\"*"
+
+
+def _add_text(segments: list[dict], content: str, bold: bool = False,
+              italic: bool = False, code: bool = False,
+              url: str | None = None) -> None:
+    for i in range(0, len(content), MAX_TEXT_LENGTH):
+        text = {"content": content[i:i + MAX_TEXT_LENGTH]}
+        if url:
+            text["link"] = {"url": url}
+        annotations = {"bold": bold, "italic": italic}
+        if code:
+            annotations["code"] = True
+        segments.append({
+            "type": "text",
+            "text": text,
+            "annotations": annotations,
+        })
+
+
+def _trim_url(url: str) -> str:
+    # Sentence punctuation and unbalanced closing parentheses right after a
+    # bare URL belong to the surrounding text, not to the link.
+    while True:
+        trimmed = url.rstrip(_URL_TRAILING)
+        if trimmed.endswith(")") and trimmed.count("(") < trimmed.count(")"):
+            trimmed = trimmed[:-1]
+        if trimmed == url:
+            return url
+        url = trimmed
+
+
+def _add_linked_text(segments: list[dict], content: str, bold: bool = False,
+                     italic: bool = False) -> None:
+    if "://" not in content:
+        if len(content) <= MAX_TEXT_LENGTH:
+            segments.append({
+                "type": "text",
+                "text": {"content": content},
+                "annotations": {"bold": bold, "italic": italic},
+            })
+        else:
+            _add_text(segments, content, bold, italic)
+        return
+    position = 0
+    for match in _URL_RE.finditer(content):
+        url = _trim_url(match.group())
+        if match.start() > position:
+            _add_text(segments, content[position:match.start()], bold, italic)
+        _add_text(segments, url, bold, italic, url=url)
+        position = match.start() + len(url)
+    if position < len(content):
+        _add_text(segments, content[position:], bold, italic)
+
+
+def parse_inline(text: str) -> list[dict]:
+    """
+    Converts inline Markdown into Notion rich text objects.
+
+    Supports `**bold**`, `*italic*`, `***bold italic***`, `` `code` ``,
+    `[label](url)` links and bare http(s) URLs. Anything else is kept as
+    plain text, and text longer than Notion's 2000 character limit is split
+    across several objects.
+
+    Args:
+        text (str): One line of Markdown.
+
+    Returns:
+        list[dict]: The rich text objects, in order.
+    """
+    segments: list[dict] = []
+    if not text:
+        return segments
+    if "*" not in text and "`" not in text and "[" not in text:
+        _add_linked_text(segments, text)
+        return segments
+    # Without URLs or over-long runs, every piece of plain, bold or italic
+    # text maps to exactly one rich text object, built inline.
+    simple = "://" not in text and len(text) <= MAX_TEXT_LENGTH
+    append = segments.append
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        start = match.start()
+        if start > position:
+            if simple:
+                append({
+                    "type": "text",
+                    "text": {"content": text[position:start]},
+                    "annotations": {"bold": False, "italic": False},
+                })
+            else:
+                _add_linked_text(segments, text[position:start])
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "code":
+            if simple:
+                append({
+                    "type": "text",
+                    "text": {"content": match.group(kind)},
+                    "annotations": {"bold": False, "italic": False,
+                                    "code": True},
+                })
+            else:
+                _add_text(segments, match.group(kind), code=True)
+            continue
+        if kind == "href":
+            _add_text(segments, match.group("label"), url=match.group(kind))
+            continue
+        bold = kind != "italic"
+        italic = kind != "bold"
+        if simple:
+            append({
+                "type": "text",
+                "text": {"content": match.group(kind)},
+                "annotations": {"bold": bold, "italic": italic},
+            })
+        else:
+            _add_linked_text(segments, match.group(kind), bold, italic)
+    if position < len(text):
+        _add_linked_text(segments, text[position:])
+    return segments
+
+
+def code_language(fence: str) -> str:
+    """
+    Maps the label of an opening code fence (e.g. "```py") to a Notion code
+    language, falling back to "plain text".
+    """
+    words = fence.strip().strip("`").strip().lower().split()
+    language = words[0] if words else ""
+    language = LANGUAGE_ALIASES.get(language, language)
+    return language if language in NOTION_LANGUAGES else "plain text"
+
+
+class NotionBlockBuilder:
+    """
+    Single-pass converter from Markdown lines to Notion blocks.
+
+    Text is fed line by line with `feed_line`, or in arbitrary pieces such
+    as a model's token stream with `feed`, and each call returns the
+    top-level blocks it completed. A block is complete once its line ends,
+    a code block once its closing fence does and a list once a line that is
+    not one of its nested items arrives, so `close()` must be called after
+    the last piece to flush what is left.
+
+    Supported syntax: `#` to `######` headings (levels past three become
+    `heading_3`), bulleted (`-`, `*`, `+`, `•`) and numbered (`1.`, `1)`)
+    lists nested by indentation, `>` quotes, `---`/`***`/`___` dividers,
+    fenced code blocks and paragraphs, with inline formatting parsed by
+    `parse_inline`.
+    """
+
+    def __init__(self):
+        self._code_lines: list[str] | None = None
+        self._code_language = ""
+        self._list_root: dict | None = None
+        # (indent, block) of the open list items, outermost first.
+        self._list_stack: list[tuple[int, dict]] = []
+        # Pieces of the line `feed` has not seen the end of yet.
+        self._partial_line: list[str] = []
+
+    def feed(self, text: str) -> list[dict]:
+        """
+        Consumes a piece of Markdown that may start or end mid-line.
+
+        Returns:
+            list[dict]: The top-level blocks completed by this piece.
+        """
+        blocks: list[dict] = []
+        if "\n" not in text:
+            if text:
+                self._partial_line.append(text)
+            return blocks
+        self._partial_line.append(text)
+        lines = "".join(self._partial_line).split("\n")
+        self._partial_line = [lines.pop()]
+        for line in lines:
+            self._feed(line, blocks)
+        return blocks
+
+    def feed_line(self, line: str) -> list[dict]:
+        """
+        Consumes one line of Markdown (without its line break).
+
+        Returns:
+            list[dict]: The top-level blocks completed by this line.
+        """
+        blocks: list[dict] = []
+        self._feed(line, blocks)
+        return blocks
+
+    def close(self) -> list[dict]:
+        """
+        Flushes the pending list or unterminated code block.
+
+        Returns:
+            list[dict]: The remaining top-level blocks.
+        """
+        blocks: list[dict] = []
+        if self._partial_line:
+            self._feed("".join(self._partial_line), blocks)
+            self._partial_line = []
+        self._close_list(blocks)
+        if self._code_lines is not None:
+            blocks.append(self._close_code())
+        return blocks
+
+    def _feed(self, line: str, blocks: list[dict]) -> None:
+        if self._code_lines is not None:
+            if line.lstrip().startswith("```"):
+                blocks.append(self._close_code())
+            else:
+                self._code_lines.append(line)
+            return
+
+        match = _BLOCK_RE.match(line) if line[:1] in _BLOCK_STARTS else None
+        if match is not None:
+            kind = match.lastgroup
+            if kind == "item":
+                self._list_item(match, blocks)
+                return
+            if self._list_root is not None:
+                self._close_list(blocks)
+            if kind == "heading":
+                level = min(len(match.group("hashes")), 3)
+                block_type = HEADING_TYPES[level - 1]
+            elif kind == "divider":
+                blocks.append({
+                    "object": "block",
+                    "type": "divider", "divider": {}
+                })
+                return
+            else:
+                block_type = "quote"
+            blocks.append({
+                "object": "block",
+                "type": block_type,
+                block_type: {
+                    "rich_text": parse_inline(match.group(kind).strip())
+                }
+            })
+            return
+
+        stripped = line.strip()
+        if not stripped:
+            # Blank lines only separate blocks; they do not end a list, so
+            # that loosely spaced nested items stay nested.
+            return
+        if self._list_root is not None:
+            self._close_list(blocks)
+        if stripped.startswith("```"):
+            self._code_lines = []
+            self._code_language = code_language(stripped)
+            return
+        blocks.append({
+            "object": "block",
+            "type": "paragraph",
+            "paragraph": {"rich_text": parse_inline(stripped)}
+        })
+
+    def _list_item(self, match: re.Match, blocks: list[dict]) -> None:
+        indent, marker, text = match.group("indent", "marker", "item")
+        block_type = LIST_TYPES[marker[0]]
+        block = {
+            "object": "block",
+            "type": block_type,
+            block_type: {"rich_text": parse_inline(text.strip())}
+        }
+        width = len(indent.expandtabs(4)) if indent else 0
+        stack = self._list_stack
+        while stack and stack[-1][0] >= width:
+            stack.pop()
+        if len(stack) >= MAX_LIST_DEPTH:
+            del stack[MAX_LIST_DEPTH - 1:]
+        if stack:
+            parent = stack[-1][1]
+            parent[parent["type"]].setdefault("children", []).append(block)
+        else:
+            if self._list_root is not None:
+                blocks.append(self._list_root)
+            self._list_root = block
+        stack.append((width, block))
+
+    def _close_list(self, blocks: list[dict]) -> None:
+        if self._list_root is not None:
+            blocks.append(self._list_root)
+            self._list_root = None
+        self._list_stack.clear()
+
+    def _close_code(self) -> dict:
+        content = "\n".join(self._code_lines)
+        self._code_lines = None
+        return {
+            "object": "block",
+            "type": "code",
+            "code": {
+                "rich_text": [
+                    {"type": "text", "text": {
+                        "content": content[i:i + MAX_TEXT_LENGTH]
+                    }}
+                    for i in range(0, max(len(content), 1), MAX_TEXT_LENGTH)
+                ],
+                "language": self._code_language
+            }
+        }
+
+
+def markdown_to_blocks(text: str) -> list[dict]:
+    """
+    Converts a Markdown document into Notion blocks.
+
+    Args:
+        text (str): The Markdown, e.g. a lesson written by the Atlas agent.
+
+    Returns:
+        list[dict]: Top-level Notion block objects, with nested list items
+        stored as their parents' `children`.
+    """
+    builder = NotionBlockBuilder()
+    blocks: list[dict] = []
+    feed = builder._feed
+    for line in text.strip().split("\n"):
+        feed(line, blocks)
+    blocks.extend(builder.close())
+    return blocks
@@ -0,0 +1,142 @@
+import hashlib
+import json
+from difflib import SequenceMatcher
+
+# Blocks whose content cannot be replaced through the update endpoint.
+_NOT_UPDATABLE = frozenset({"table", "column_list", "column", "synced_block"})
+
+
+def block_hash(block: dict) -> str:
+    """
+    Returns a digest of everything a block displays, children included, so
+    that two blocks with the same hash render identically.
+    """
+    payload = json.dumps(block, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _has_children(block: dict) -> bool:
+    return bool(block.get(block["type"], {}).get("children"))
+
+
+def published_blocks(blocks: list[dict], block_ids: list[str]) -> list[dict]:
+    """
+    Describes the top-level blocks of a page as they were sent to Notion.
+
+    Args:
+        blocks (list[dict]): The blocks, in page order.
+        block_ids (list[str]): Their Notion IDs, in the same order.
+
+    Returns:
+        list[dict]: One entry per block with its 'id', content 'hash',
+        'type' and whether it 'has_children'.
+    """
+    return [
+        {
+            "id": block_id,
+            "hash": block_hash(block),
+            "type": block["type"],
+            "has_children": _has_children(block),
+        }
+        for block, block_id in zip(blocks, block_ids)
+    ]
+
+
+def _updatable(old: dict, block: dict) -> bool:
+    # The update endpoint changes a block's content but neither its type
+    # nor its children.
+    return (
+        old["type"] == block["type"]
+        and block["type"] not in _NOT_UPDATABLE
+        and not old["has_children"]
+        and not _has_children(block)
+    )
+
+
+def plan_page_update(published: list[dict],
+                     blocks: list[dict]) -> tuple[list[tuple], dict]:
+    """
+    Plans the fewest Notion operations that turn a page holding the
+    `published` blocks into one holding `blocks`.
+
+    Blocks are compared by content hash. Unchanged blocks are kept, changed
+    blocks of the same type are updated in place, and the rest are deleted
+    or inserted after the block that precedes them.
+
+    Args:
+        published (list[dict]): The page's current blocks, in order, as
+        described by `published_blocks`.
+        blocks (list[dict]): The blocks the page should hold, in order.
+
+    Returns:
+        tuple[list[tuple], dict]: The operations, to run in order:
+        `("update", block_id, index)` replaces the content of block
+        `block_id` with `blocks[index]`, `("delete", block_id)` removes a
+        block, and `("insert", anchor, indexes)` inserts `blocks[i]` for
+        each index right after `anchor`, which is `("old", block_id)`,
+        `("new", index)` for a block inserted earlier, or None for the end
+        of the page. Also the ID of every kept or updated block, keyed by
+        its index in `blocks`.
+    """
+    hashes = [block_hash(block) for block in blocks]
+    ops: list[tuple] = []
+    kept: dict[int, str] = {}
+    old = list(published)
+    start = 0
+    anchor = None
+
+    # Blocks can only be inserted after another block, never at the top of
+    # a page, so the first block has to keep, or take over, the slot of an
+    # old one.
+    while old and blocks:
+        if old[0]["hash"] == hashes[0]:
+            kept[0] = old[0]["id"]
+        elif _updatable(old[0], blocks[0]):
+            ops.append(("update", old[0]["id"], 0))
+            kept[0] = old[0]["id"]
+        else:
+            ops.append(("delete", old[0]["id"]))
+            old = old[1:]
+            continue
+        anchor = ("old", old[0]["id"])
+        old, start = old[1:], 1
+        break
+
+    pending: list[int] = []
+
+    def flush():
+        nonlocal anchor
+        if pending:
+            ops.append(("insert", anchor, list(pending)))
+            anchor = ("new", pending[-1])
+            pending.clear()
+
+    matcher = SequenceMatcher(
+        a=[entry["hash"] for entry in old], b=hashes[start:], autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        olds = old[i1:i2]
+        news = list(range(start + j1, start + j2))
+        if tag == "equal":
+            flush()
+            kept.update(
+                (index, entry["id"]) for entry, index in zip(olds, news)
+            )
+            anchor = ("old", olds[-1]["id"])
+            continue
+        for k in range(max(len(olds), len(news))):
+            entry = olds[k] if k < len(olds) else None
+            index = news[k] if k < len(news) else None
+            if (entry is not None and index is not None
+                    and _updatable(entry, blocks[index])):
+                flush()
+                ops.append(("update", entry["id"], index))
+                kept[index] = entry["id"]
+                anchor = ("old", entry["id"])
+                continue
+            if entry is not None:
+                ops.append(("delete", entry["id"]))
+            if index is not None:
+                pending.append(index)
+    flush()
+    return ops, kept
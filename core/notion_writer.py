@@ -0,0 +1,372 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+from core.metrics import add_to_current_stage
+
+T = TypeVar("T")
+
+# Notion allows an average of three requests per second per integration.
+DEFAULT_RATE = 3.0
+RETRYABLE_STATUSES = {409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often requests may be sent.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float | None): Maximum burst size. Defaults to `rate`.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Blocks until a token is available and takes it.
+
+        Returns:
+            float: Seconds spent waiting for the token.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated_at) * self.rate,
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class NotionWriter:
+    """
+    Notion client wrapper that rate limits, retries and pools connections.
+
+    Every request goes through a token bucket shared by all writers in the
+    process, is retried with jittered exponential backoff on HTTP 429 and
+    5xx responses (honouring `Retry-After`), and reuses keep-alive
+    connections from a single pooled HTTP client.
+
+    Creating pages and appending blocks are not idempotent: a request that
+    timed out may still have been processed. They are resent right away
+    only when Notion surely did not process them (a 429 response or a
+    connection that could not be opened). Otherwise appends are resent
+    only after listing the parent block shows that they did not take
+    effect, and page creation fails.
+    """
+
+    def __init__(
+        self,
+        auth: str | None,
+        base_url: str | None = None,
+        limiter: TokenBucket | None = None,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        timeout_ms: int = 60_000,
+        max_connections: int = 10,
+        client: Any | None = None,
+    ):
+        """
+        Args:
+            auth (str | None): Notion integration token.
+            base_url (str | None): Notion API base URL. Point it to a local
+            fake server for testing.
+            limiter (TokenBucket | None): Rate limiter. Defaults to the one
+            shared by the whole process.
+            max_retries (int): Retries per request before giving up.
+            base_delay (float): Initial backoff delay in seconds.
+            max_delay (float): Upper bound of a single backoff delay.
+            timeout_ms (int): Timeout of a single HTTP request.
+            max_connections (int): Size of the keep-alive connection pool.
+            client (Any | None): A ready-made client exposing the
+            `notion_client.Client` interface, e.g. an in-process fake. When
+            given, `auth`, `base_url` and the pool settings are ignored.
+        """
+        self.limiter = limiter or get_shared_limiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counters = {
+            "requests": 0,
+            "throttled": 0,
+            "retried": 0,
+            "failed": 0,
+        }
+        self._counters_lock = threading.Lock()
+        if client is not None:
+            self.client = client
+            return
+
+        import httpx
+        from notion_client import Client
+
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        options: dict[str, Any] = {"auth": auth, "timeout_ms": timeout_ms}
+        if base_url:
+            options["base_url"] = base_url.rstrip("/")
+        self.client = Client(client=http_client, **options)
+
+    def call(self, operation: Callable[[Any], T], payload_bytes: int = 0,
+             idempotent: bool = True,
+             applied: Callable[[], T | None] | None = None) -> T:
+        """
+        Runs `operation(client)` under the rate limiter, retrying transient
+        failures.
+
+        Args:
+            operation (Callable[[Any], T]): Function issuing one request
+            through the given `notion_client.Client`.
+            payload_bytes (int): Size of the request body, reported as
+            bytes sent for every attempt.
+            idempotent (bool): Whether sending the request twice is
+            harmless. Other requests are only resent after a failure that
+            proves they were not processed.
+            applied (Callable[[], T | None] | None): For a non-idempotent
+            request whose outcome is unknown (a timeout or a 5xx response),
+            checks whether it took effect anyway and returns its result if
+            so, None otherwise. Without it such failures are raised.
+
+        Returns:
+            T: Whatever `operation` returns.
+        """
+        import httpx
+        from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self._count("requests")
+            add_to_current_stage(bytes_sent=payload_bytes)
+            try:
+                return operation(self.client)
+            except (HTTPResponseError, RequestTimeoutError,
+                    httpx.TransportError) as e:
+                status = getattr(e, "status", None)
+                if status == 429:
+                    self._count("throttled")
+                retryable = status is None or status in RETRYABLE_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+                if not idempotent and not _not_processed(e):
+                    if applied is None:
+                        self._count("failed")
+                        raise
+                    result = applied()
+                    if result is not None:
+                        print(
+                            f"Notion request failed ({status or repr(e)}) "
+                            "but took effect; not resending it"
+                        )
+                        return result
+                delay = self._backoff(attempt, getattr(e, "headers", None))
+                print(
+                    f"Notion request failed ({status or repr(e)}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                self._count("retried")
+                add_to_current_stage(retries=1)
+                time.sleep(delay)
+                attempt += 1
+
+    def create_page(self, **kwargs) -> dict:
+        """
+        Creates a page. Accepts the arguments of `pages.create`.
+        """
+        return self.call(
+            lambda client: client.pages.create(**kwargs),
+            payload_bytes=_payload_size(kwargs),
+            idempotent=False,
+        )
+
+    def append_children(self, block_id: str, children: list[dict],
+                        after: str | None = None) -> dict:
+        """
+        Appends up to 100 child blocks to `block_id`, at the end or right
+        after its child block `after`.
+        """
+        options = {"after": after} if after else {}
+        return self.call(
+            lambda client: client.blocks.children.append(
+                block_id=block_id, children=children, **options
+            ),
+            payload_bytes=_payload_size({"children": children, **options}),
+            idempotent=False,
+            applied=lambda: self._find_appended(block_id, children, after),
+        )
+
+    def list_children(self, block_id: str,
+                      start_cursor: str | None = None) -> dict:
+        """
+        Returns one page of up to 100 child blocks of `block_id`.
+        """
+        options = {"start_cursor": start_cursor} if start_cursor else {}
+        return self.call(
+            lambda client: client.blocks.children.list(
+                block_id=block_id, page_size=100, **options
+            )
+        )
+
+    def update_block(self, block_id: str, block: dict) -> dict:
+        """
+        Replaces the content of a block with that of `block`, which must be
+        of the same type and have no children.
+        """
+        content = {block["type"]: block[block["type"]]}
+        return self.call(
+            lambda client: client.blocks.update(block_id=block_id, **content),
+            payload_bytes=_payload_size(content),
+        )
+
+    def delete_block(self, block_id: str) -> dict:
+        """
+        Deletes (archives) a block.
+        """
+        return self.call(
+            lambda client: client.blocks.delete(block_id=block_id)
+        )
+
+    def _find_appended(self, block_id: str, children: list[dict],
+                       after: str | None) -> dict | None:
+        # Looks for `children` where a successful append would have put
+        # them and, if they are there, returns them like the append
+        # response would have.
+        blocks: list[dict] = []
+        cursor = None
+        while True:
+            response = self.list_children(block_id, cursor)
+            blocks.extend(response["results"])
+            cursor = response.get("next_cursor")
+            if not response.get("has_more") or not cursor:
+                break
+        if after is None:
+            start = len(blocks) - len(children)
+        else:
+            ids = [block["id"] for block in blocks]
+            start = ids.index(after) + 1 if after in ids else -1
+        found = blocks[start:start + len(children)] if start >= 0 else []
+        if len(found) == len(children) and all(
+            _signature(block) == _signature(child)
+            for block, child in zip(found, children)
+        ):
+            return {"object": "list", "results": found}
+        return None
+
+    def stats(self) -> dict:
+        """
+        Returns a copy of the request, throttle, retry and failure counters.
+        """
+        with self._counters_lock:
+            return dict(self.counters)
+
+    def _count(self, name: str) -> None:
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def _backoff(self, attempt: int, headers) -> float:
+        retry_after = headers.get("retry-after") if headers else None
+        if retry_after:
+            try:
+                # Honour the server's hint, plus jitter so that concurrent
+                # runs do not all come back at the same instant.
+                return float(retry_after) + random.uniform(0, self.base_delay)
+            except ValueError:
+                pass
+        # Full jitter exponential backoff.
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+
+def _not_processed(error: Exception) -> bool:
+    # Failures that prove Notion never handled the request: it was
+    # throttled, or the connection could not even be opened.
+    import httpx
+
+    return getattr(error, "status", None) == 429 or isinstance(
+        error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    )
+
+
+def _signature(block: dict) -> tuple[str, str]:
+    # A block's type and text, which Notion returns as sent.
+    content = block.get(block["type"]) or {}
+    text = "".join(
+        (item.get("text") or {}).get("content", item.get("plain_text", ""))
+        for item in content.get("rich_text", [])
+    )
+    return block["type"], text
+
+
+def _payload_size(payload: dict) -> int:
+    return len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+_shared_limiter: TokenBucket | None = None
+_notion_writer: NotionWriter | None = None
+_lock = threading.Lock()
+
+
+def get_shared_limiter() -> TokenBucket:
+    """
+    Returns the token bucket shared by every Notion request in the process.
+
+    The rate is read from `NOTION_RATE_LIMIT` (requests per second).
+    """
+    global _shared_limiter
+    with _lock:
+        if _shared_limiter is None:
+            rate = float(os.getenv("NOTION_RATE_LIMIT", DEFAULT_RATE))
+            _shared_limiter = TokenBucket(rate=rate)
+        return _shared_limiter
+
+
+def set_notion_writer(writer: NotionWriter | None) -> None:
+    """
+    Replaces the process-wide Notion writer. None makes the next
+    `get_notion_writer` call build a fresh one from the environment.
+    """
+    global _notion_writer
+    with _lock:
+        _notion_writer = writer
+
+
+def get_notion_writer() -> NotionWriter:
+    """
+    Returns the process-wide Notion writer, creating it on first use.
+
+    It authenticates with `NOTION_TOKEN` and talks to `NOTION_BASE_URL`
+    when set (e.g. a local fake Notion server), the public API otherwise.
+    """
+    global _notion_writer
+    limiter = get_shared_limiter()
+    with _lock:
+        if _notion_writer is None:
+            _notion_writer = NotionWriter(
+                auth=os.getenv("NOTION_TOKEN"),
+                base_url=os.getenv("NOTION_BASE_URL"),
+                limiter=limiter,
+            )
+        return _notion_writer
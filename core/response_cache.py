@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = ".atlas_cache"
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache for agent responses backed by SQLite.
+
+    Entries are keyed by a hash of everything that determines the output of
+    an agent run (model id, description, instructions and input text), so any
+    prompt change produces a new key and stale entries are simply never read
+    again; they age out through the eviction policy.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_age_seconds: float | None = 30 * 24 * 3600,
+        max_bytes: int | None = 256 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path (str): Location of the SQLite database file.
+            max_age_seconds (float | None): Entries not used for longer than
+            this are evicted. None disables age-based eviction.
+            max_bytes (int | None): Upper bound on the total size of cached
+            values. Least recently used entries are evicted first. None
+            disables size-based eviction.
+        """
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+            "ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_id: str, description: str, instructions,
+                 input_text: str, **prompt) -> str:
+        """
+        Builds the content-addressed key for an agent run.
+
+        Args:
+            model_id (str): Identifier of the model serving the agent.
+            description (str): The agent description prompt.
+            instructions: The agent instructions (string or list).
+            input_text (str): The message sent to the agent.
+            **prompt: Any other setting that shapes the system message or
+            the response, e.g. the agent's `role` or its tools.
+
+        Returns:
+            str: A SHA-256 hex digest identifying the run.
+        """
+        payload = json.dumps(
+            [model_id, description, instructions, input_text, prompt],
+            ensure_ascii=False,
+            default=str,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns the cached value for `key`, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, accessed_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and self._is_expired(row[1], now):
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key = ?", (key,)
+                )
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores `value` under `key` and applies the eviction policy.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """
+        Removes every cached entry.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def _is_expired(self, accessed_at: float, now: float) -> bool:
+        return (
+            self.max_age_seconds is not None
+            and now - accessed_at > self.max_age_seconds
+        )
+
+    def _evict(self, now: float) -> None:
+        if self.max_age_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE accessed_at < ?",
+                (now - self.max_age_seconds,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        if self.max_bytes is None:
+            return
+        (total_bytes,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total_bytes <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under budget.
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_bytes -= size
+            self.evictions += 1
+
+
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """
+    Returns the process-wide response cache, creating it on first use.
+
+    The cache is configured through environment variables:
+    `ATLAS_CACHE_DIR`, `ATLAS_CACHE_MAX_AGE_DAYS`, `ATLAS_CACHE_MAX_MB`.
+    Setting `ATLAS_CACHE_DISABLED=1` turns caching off.
+
+    Returns:
+        ResponseCache | None: The shared cache, or None if disabled.
+    """
+    global _response_cache
+    if os.getenv("ATLAS_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            cache_dir = os.getenv("ATLAS_CACHE_DIR", DEFAULT_CACHE_DIR)
+            max_age_days = float(os.getenv("ATLAS_CACHE_MAX_AGE_DAYS", "30"))
+            max_mb = float(os.getenv("ATLAS_CACHE_MAX_MB", "256"))
+            _response_cache = ResponseCache(
+                os.path.join(cache_dir, "responses.sqlite3"),
+                max_age_seconds=max_age_days * 24 * 3600,
+                max_bytes=int(max_mb * 1024 * 1024),
+            )
+        return _response_cache
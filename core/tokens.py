@@ -0,0 +1,44 @@
+import re
+from functools import lru_cache
+
+# Words, numbers and single punctuation marks.
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+# Beyond this many characters, words usually span several tokens.
+_CHARS_PER_EXTRA_TOKEN = 8
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        # The encoding of the GPT-4o family used by the agents.
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # e.g. the encoding file cannot be downloaded while offline.
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates how many tokens `text` costs in a GPT-4o prompt.
+
+    Counts exactly with tiktoken when it is installed, and otherwise with a
+    local heuristic: one token per word or punctuation mark, plus one for
+    every further eight characters of long words.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        tokens += 1 + (len(piece) - 1) // _CHARS_PER_EXTRA_TOKEN
+    return tokens
@@ -0,0 +1,343 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from core.response_cache import DEFAULT_CACHE_DIR
+from processors.topic_ranker import topic_key
+
+# Length of the character n-grams compared to find near matches.
+NGRAM_SIZE = 3
+# A near match must also be a spelling variant: the same number of words,
+# at most this many edits apart in total, with every changed word at least
+# MIN_VARIANT_WORD_LENGTH letters long and free of digits.
+MAX_EDIT_DISTANCE = 2
+MIN_VARIANT_WORD_LENGTH = 5
+
+
+def _ngrams(key: str) -> set[str]:
+    padded = f" {key} "
+    return {
+        padded[i:i + NGRAM_SIZE]
+        for i in range(max(len(padded) - NGRAM_SIZE + 1, 1))
+    }
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Returns the Dice coefficient of the character trigrams of two topic
+    keys, from 0 (nothing in common) to 1 (same trigrams).
+    """
+    grams_a, grams_b = _ngrams(a), _ngrams(b)
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def _edit_distance(a: str, b: str) -> int:
+    # Levenshtein distance, one row at a time.
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def is_spelling_variant(a: str, b: str) -> bool:
+    """
+    Tells whether two topic keys differ only by typos or regional spelling,
+    e.g. "colour theory" and "color theory".
+
+    Keys with a different number of words are different topics ("binary
+    search" and "binary search tree"), and so are keys where a word is
+    extended by a prefix or suffix ("synchronous" and "asynchronous",
+    "SQL" and "NoSQL"), differs in its digits ("IPv4" and "IPv6") or is
+    too short for a typo to be told from another word.
+    """
+    words_a, words_b = a.split(" "), b.split(" ")
+    if len(words_a) != len(words_b):
+        return False
+    distance = 0
+    for word_a, word_b in zip(words_a, words_b):
+        if word_a == word_b:
+            continue
+        if (min(len(word_a), len(word_b)) < MIN_VARIANT_WORD_LENGTH
+                or word_a in word_b or word_b in word_a
+                or any(char.isdigit() for char in word_a + word_b)):
+            return False
+        distance += _edit_distance(word_a, word_b)
+        if distance > MAX_EDIT_DISTANCE:
+            return False
+    return True
+
+
+def _initials(key: str) -> str | None:
+    # "binary search tree" -> "bst"; single words have no initials.
+    words = key.split(" ")
+    return "".join(word[0] for word in words) if len(words) > 1 else None
+
+
+def _abbreviation(topic: str, key: str) -> str | None:
+    # A topic written as a single all-caps word, such as "BST" or "APIs".
+    word = topic.strip()
+    if word.endswith("s"):
+        word = word[:-1]
+    if " " in key or not 2 <= len(word) <= 6 or not word.isupper():
+        return None
+    return key
+
+
+class TopicCache:
+    """
+    Persistent research cache shared by every video, backed by SQLite.
+
+    Enrichments are stored under the canonical key of their topic (see
+    `processors.topic_ranker.topic_key`), so "Binary Search Trees" and
+    "binary search tree:" share an entry. A topic without an entry of its
+    own is also served the entry of its abbreviation or expansion ("BST")
+    or of the most similar key by character trigrams, above
+    `min_similarity`, that is a spelling variant of it (see
+    `is_spelling_variant`). Entries older than `ttl_seconds` are stale:
+    they are no longer served and get replaced by the next research of the
+    topic.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float | None = 90 * 86400,
+                 min_similarity: float = 0.8):
+        """
+        Args:
+            path (str): Location of the SQLite database file.
+            ttl_seconds (float | None): Age after which an enrichment is
+            researched again. None keeps enrichments forever.
+            min_similarity (float): Trigram similarity a spelling variant
+            needs to be served, between 0 and 1. 1 disables near matches.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        # Trigram index of the stored keys, loaded incrementally so that
+        # entries added by other processes are seen too.
+        self._index: dict[str, set[str]] = {}
+        self._keys: dict[str, set[str]] = {}
+        self._last_rowid = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS topics ("
+            "key TEXT PRIMARY KEY, "
+            "topic TEXT NOT NULL, "
+            "initials TEXT, "
+            "abbreviation TEXT, "
+            "enrichment BLOB NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS topics_initials ON topics (initials)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS topics_abbreviation "
+            "ON topics (abbreviation)"
+        )
+        self._conn.commit()
+
+    def get(self, topic: str) -> dict | None:
+        """
+        Looks up the research of `topic` or of a topic equivalent to it.
+
+        Returns:
+            dict | None: On a hit, the 'enrichment', the cached 'topic' it
+            was researched as, its 'age_seconds' and the 'similarity' of the
+            keys (1 for the same key); None on a miss.
+        """
+        key = topic_key(topic)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            skipped_stale = False
+            for candidate, score in self._candidates(topic, key):
+                row = self._conn.execute(
+                    "SELECT topic, enrichment, created_at FROM topics "
+                    "WHERE key = ?",
+                    (candidate,),
+                ).fetchone()
+                if row is None:
+                    continue
+                if self._is_stale(row[2], now):
+                    skipped_stale = True
+                    continue
+                self.hits += 1
+                return {
+                    "topic": row[0],
+                    "enrichment": zlib.decompress(row[1]).decode("utf-8"),
+                    "age_seconds": now - row[2],
+                    "similarity": round(score, 3),
+                }
+            self.misses += 1
+            self.stale += skipped_stale
+        return None
+
+    def set(self, topic: str, enrichment: str) -> None:
+        """
+        Stores the research of `topic`, replacing any previous entry for its
+        key.
+        """
+        key = topic_key(topic)
+        if not key:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO topics (key, topic, initials, "
+                "abbreviation, enrichment, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key, topic, _initials(key), _abbreviation(topic, key),
+                    zlib.compress(enrichment.encode("utf-8")), time.time(),
+                ),
+            )
+            self._conn.commit()
+            self._add_to_index(key)
+
+    def clear(self) -> None:
+        """
+        Removes every cached entry.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM topics")
+            self._conn.commit()
+            self._index.clear()
+            self._keys.clear()
+            self._last_rowid = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters, the lookups that only found stale
+        entries, and the size and staleness of the cache.
+        """
+        now = time.time()
+        cutoff = now - self.ttl_seconds if self.ttl_seconds else 0
+        with self._lock:
+            entries, stale_entries, oldest, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(created_at < ?), 0), "
+                "MIN(created_at), COALESCE(SUM(LENGTH(enrichment)), 0) "
+                "FROM topics",
+                (cutoff,),
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_misses": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "stale_entries": stale_entries,
+            "oldest_age_seconds": now - oldest if oldest else 0.0,
+            "bytes": total_bytes,
+        }
+
+    def _candidates(self, topic: str, key: str) -> list[tuple[str, float]]:
+        # Keys that may hold the research of `topic`, best first: its own
+        # key, its abbreviation or expansion, then near matches.
+        candidates = [(key, 1.0)]
+        abbreviation = _abbreviation(topic, key)
+        if abbreviation:
+            rows = self._conn.execute(
+                "SELECT key FROM topics WHERE initials = ? "
+                "ORDER BY created_at DESC",
+                (abbreviation,),
+            ).fetchall()
+        else:
+            rows = self._conn.execute(
+                "SELECT key FROM topics WHERE abbreviation = ?",
+                (_initials(key),),
+            ).fetchall()
+        candidates.extend((row[0], 1.0) for row in rows if row[0] != key)
+        if self.min_similarity < 1:
+            candidates.extend(self._near_matches(key))
+        return candidates
+
+    def _near_matches(self, key: str) -> list[tuple[str, float]]:
+        self._refresh_index()
+        shared = set()
+        for gram in _ngrams(key):
+            shared.update(self._index.get(gram, ()))
+        shared.discard(key)
+        scored = [
+            (other, similarity(key, other)) for other in sorted(shared)
+        ]
+        return sorted(
+            (
+                match for match in scored
+                if match[1] >= self.min_similarity
+                and is_spelling_variant(key, match[0])
+            ),
+            key=lambda match: -match[1],
+        )
+
+    def _refresh_index(self) -> None:
+        rows = self._conn.execute(
+            "SELECT rowid, key FROM topics WHERE rowid > ? ORDER BY rowid",
+            (self._last_rowid,),
+        ).fetchall()
+        for rowid, key in rows:
+            self._add_to_index(key)
+            self._last_rowid = rowid
+
+    def _add_to_index(self, key: str) -> None:
+        if key in self._keys:
+            return
+        grams = _ngrams(key)
+        self._keys[key] = grams
+        for gram in grams:
+            self._index.setdefault(gram, set()).add(key)
+
+    def _is_stale(self, created_at: float, now: float) -> bool:
+        return (
+            self.ttl_seconds is not None
+            and now - created_at > self.ttl_seconds
+        )
+
+
+_topic_cache: TopicCache | None = None
+_topic_cache_lock = threading.Lock()
+
+
+def get_topic_cache() -> TopicCache | None:
+    """
+    Returns the process-wide topic research cache, creating it on first use.
+
+    The cache lives in `ATLAS_CACHE_DIR` next to the response cache. Its
+    entries expire after `ATLAS_TOPIC_CACHE_TTL_DAYS` and near matches need
+    a similarity of `ATLAS_TOPIC_SIMILARITY`. Setting `ATLAS_CACHE_DISABLED=1`
+    turns it off as well.
+
+    Returns:
+        TopicCache | None: The shared cache, or None if disabled.
+    """
+    global _topic_cache
+    if os.getenv("ATLAS_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _topic_cache_lock:
+        if _topic_cache is None:
+            cache_dir = os.getenv("ATLAS_CACHE_DIR", DEFAULT_CACHE_DIR)
+            ttl_days = float(os.getenv("ATLAS_TOPIC_CACHE_TTL_DAYS", "90"))
+            _topic_cache = TopicCache(
+                os.path.join(cache_dir, "topics.sqlite3"),
+                ttl_seconds=ttl_days * 86400 if ttl_days > 0 else None,
+                min_similarity=float(
+                    os.getenv("ATLAS_TOPIC_SIMILARITY", "0.8")
+                ),
+            )
+        return _topic_cache
@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from core.response_cache import DEFAULT_CACHE_DIR
+
+# Statuses of a cached lookup. Only "ok" entries hold a transcript; the
+# others remember that YouTube has none to offer.
+OK = "ok"
+DISABLED = "disabled"
+NOT_FOUND = "not_found"
+
+
+class TranscriptCache:
+    """
+    Persistent cache of fetched YouTube transcripts backed by SQLite.
+
+    Entries are keyed by video ID and language preference and stored as
+    zlib-compressed JSON. Videos without a transcript are cached too, for
+    `negative_ttl_seconds`, since captions may be added later.
+    """
+
+    def __init__(self, path: str,
+                 negative_ttl_seconds: float | None = 24 * 3600):
+        """
+        Args:
+            path (str): Location of the SQLite database file.
+            negative_ttl_seconds (float | None): How long a missing
+            transcript is remembered. None remembers it forever.
+        """
+        self.path = path
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            "video_id TEXT NOT NULL, "
+            "language TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "data BLOB, "
+            "created_at REAL NOT NULL, "
+            "PRIMARY KEY (video_id, language))"
+        )
+        self._conn.commit()
+
+    def get(self, video_id: str,
+            language: str) -> tuple[str, list[dict] | None] | None:
+        """
+        Looks up the transcript of `video_id` in `language`.
+
+        Returns:
+            tuple[str, list[dict] | None] | None: The status and, for "ok",
+            the transcript chunks; None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, data, created_at FROM transcripts "
+                "WHERE video_id = ? AND language = ?",
+                (video_id, language),
+            ).fetchone()
+            if row is not None and row[0] != OK and self._is_expired(row[2]):
+                self._conn.execute(
+                    "DELETE FROM transcripts "
+                    "WHERE video_id = ? AND language = ?",
+                    (video_id, language),
+                )
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        status, data, _ = row
+        if status != OK:
+            return status, None
+        return status, json.loads(zlib.decompress(data).decode("utf-8"))
+
+    def set(self, video_id: str, language: str, status: str,
+            chunks: list[dict] | None = None) -> None:
+        """
+        Stores the outcome of fetching `video_id` in `language`.
+        """
+        data = None
+        if chunks is not None:
+            data = zlib.compress(
+                json.dumps(chunks, ensure_ascii=False).encode("utf-8")
+            )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(video_id, language, status, data, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (video_id, language, status, data, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """
+        Removes every cached entry.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            entries, negative, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status != ?), 0), "
+                "COALESCE(SUM(LENGTH(data)), 0) FROM transcripts",
+                (OK,),
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "negative_entries": negative,
+            "bytes": total_bytes,
+        }
+
+    def _is_expired(self, created_at: float) -> bool:
+        return (
+            self.negative_ttl_seconds is not None
+            and time.time() - created_at > self.negative_ttl_seconds
+        )
+
+
+_transcript_cache: TranscriptCache | None = None
+_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> TranscriptCache | None:
+    """
+    Returns the process-wide transcript cache, creating it on first use.
+
+    The cache lives in `ATLAS_CACHE_DIR` next to the response cache and
+    remembers missing transcripts for `ATLAS_TRANSCRIPT_NEGATIVE_TTL_HOURS`.
+    Setting `ATLAS_CACHE_DISABLED=1` turns it off as well.
+
+    Returns:
+        TranscriptCache | None: The shared cache, or None if disabled.
+    """
+    global _transcript_cache
+    if os.getenv("ATLAS_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _transcript_cache_lock:
+        if _transcript_cache is None:
+            cache_dir = os.getenv("ATLAS_CACHE_DIR", DEFAULT_CACHE_DIR)
+            ttl_hours = float(
+                os.getenv("ATLAS_TRANSCRIPT_NEGATIVE_TTL_HOURS", "24")
+            )
+            _transcript_cache = TranscriptCache(
+                os.path.join(cache_dir, "transcripts.sqlite3"),
+                negative_ttl_seconds=ttl_hours * 3600,
+            )
+        return _transcript_cache
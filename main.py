@@ -1,4 +1,10 @@
-from ui import run_interface
+from dotenv import load_dotenv
+
+# Settings are read from the environment as modules are imported, so the
+# .env file is loaded before anything else.
+load_dotenv()
+
+from ui import run_interface  # noqa: E402
 
 if __name__ == "__main__":
     run_interface()
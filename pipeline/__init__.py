@@ -0,0 +1,21 @@
+from dotenv import load_dotenv
+
+# The pipeline modules read their settings from the environment when they
+# are imported, so the .env file is loaded first, whichever module is the
+# entry point (e.g. `python -m pipeline.batch`). Variables already set in
+# the environment take precedence.
+load_dotenv()
+
+from .runner import (  # noqa: E402
+    PageIncompleteError,
+    PipelineReporter,
+    TranscriptUnavailableError,
+    run_pipeline
+)
+
+__all__ = [
+    "PageIncompleteError",
+    "PipelineReporter",
+    "TranscriptUnavailableError",
+    "run_pipeline",
+]
@@ -0,0 +1,215 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agents.runner import set_max_inflight_calls
+from core.metrics import metrics
+from core.transcript_cache import get_transcript_cache
+from core.utils import extract_youtube_video_id
+from pipeline.runner import (
+    PageIncompleteError,
+    PipelineReporter,
+    TranscriptUnavailableError,
+    run_pipeline
+)
+from processors.transcript_fetcher import prefetch
+
+
+class BatchReporter(PipelineReporter):
+    """
+    Prints pipeline progress prefixed with the video ID, one line per update.
+    """
+
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        self.current_stage = None
+
+    def stage(self, title: str) -> None:
+        self.current_stage = title
+        print(f"[{self.video_id}] {title}")
+
+    def message(self, text: str) -> None:
+        print(f"[{self.video_id}] {text}")
+
+    def progress(self, fraction: float, text: str) -> None:
+        print(f"[{self.video_id}] {text}")
+
+    def run_summary(self, rows: list[dict]) -> None:
+        seconds = sum(row["total_seconds"] for row in rows)
+        tokens = sum(
+            row["input_tokens"] + row["output_tokens"] for row in rows
+        )
+        print(
+            f"[{self.video_id}] {seconds:.1f}s of stage time, "
+            f"{tokens} tokens"
+        )
+
+
+def read_video_ids(path: str) -> tuple[list[str], list[str]]:
+    """
+    Reads YouTube URLs or video IDs from a file, one per line.
+
+    Blank lines and lines starting with '#' are ignored, and duplicates are
+    only kept once.
+
+    Args:
+        path (str): Path of the input file.
+
+    Returns:
+        tuple[list[str], list[str]]: The valid video IDs in file order and
+        the lines that are not valid YouTube URLs or IDs.
+    """
+    video_ids, invalid = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            video_id = extract_youtube_video_id(line)
+            if video_id is None:
+                invalid.append(line)
+            elif video_id not in video_ids:
+                video_ids.append(video_id)
+    return video_ids, invalid
+
+
+def process_video(video_id: str, fresh: bool = False) -> dict:
+    """
+    Runs the full pipeline for one video and returns its status record.
+    """
+    reporter = BatchReporter(video_id)
+    started = time.monotonic()
+    record = {"video_id": video_id}
+    try:
+        record["url"] = run_pipeline(video_id, reporter=reporter, fresh=fresh)
+        record["status"] = "ok"
+    except TranscriptUnavailableError as e:
+        record["status"] = "no_transcript"
+        record["error"] = str(e)
+    except PageIncompleteError as e:
+        record["status"] = "incomplete"
+        record["url"] = e.url
+        record["error"] = str(e)
+    except Exception as e:
+        record["status"] = "failed"
+        record["stage"] = reporter.current_stage
+        record["error"] = repr(e)
+    record["seconds"] = round(time.monotonic() - started, 2)
+    return record
+
+
+def run_batch(video_ids: list[str], workers: int, report_path: str,
+              fresh: bool = False) -> list[dict]:
+    """
+    Processes videos with a bounded pool of workers.
+
+    Each video's status record is appended to `report_path` (JSON Lines) as
+    soon as it finishes.
+
+    Returns:
+        list[dict]: The status records, in completion order.
+    """
+    records = []
+    with open(report_path, "a", encoding="utf-8") as report, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(process_video, video_id, fresh)
+            for video_id in video_ids
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            records.append(record)
+            report.write(json.dumps(record, ensure_ascii=False) + "\n")
+            report.flush()
+            print(
+                f"[{done}/{len(futures)}] {record['video_id']}: "
+                f"{record['status']} ({record['seconds']}s)"
+            )
+    return records
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Turn a list of YouTube videos into Notion lesson pages "
+            "without the Streamlit interface."
+        )
+    )
+    parser.add_argument(
+        "input",
+        help="File with one YouTube URL or video ID per line.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4,
+        help="Number of videos processed at the same time (default: 4).",
+    )
+    parser.add_argument(
+        "--max-inflight-llm-calls", type=int, default=None,
+        help=(
+            "Maximum number of model calls in flight across all videos "
+            "(default: unlimited)."
+        ),
+    )
+    parser.add_argument(
+        "--report", default="batch_report.jsonl",
+        help=(
+            "JSON Lines file the per-video status is appended to "
+            "(default: batch_report.jsonl)."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-jsonl", default=None,
+        help="Write every stage event of the batch to this JSON Lines file.",
+    )
+    parser.add_argument(
+        "--metrics-prometheus", default=None,
+        help=(
+            "Write per-stage aggregates of the batch to this file in the "
+            "Prometheus text format."
+        ),
+    )
+    parser.add_argument(
+        "--prefetch-workers", type=int, default=4,
+        help=(
+            "Concurrent transcript downloads into the transcript cache "
+            "before any video is processed; 0 disables it (default: 4)."
+        ),
+    )
+    parser.add_argument(
+        "--fresh", action="store_true",
+        help="Ignore progress saved by earlier runs.",
+    )
+    args = parser.parse_args(argv)
+
+    set_max_inflight_calls(args.max_inflight_llm_calls)
+
+    video_ids, invalid = read_video_ids(args.input)
+    for line in invalid:
+        print(f"Skipping invalid YouTube URL or ID: {line}")
+    if args.prefetch_workers > 0 and get_transcript_cache() is not None:
+        available = prefetch(video_ids, workers=args.prefetch_workers)
+        print(
+            f"Prefetched transcripts: {sum(available.values())}/"
+            f"{len(video_ids)} available"
+        )
+    print(f"Processing {len(video_ids)} videos with {args.workers} workers")
+
+    records = run_batch(video_ids, args.workers, args.report, args.fresh)
+    succeeded = sum(record["status"] == "ok" for record in records)
+    if args.metrics_jsonl:
+        with open(args.metrics_jsonl, "w", encoding="utf-8") as f:
+            f.write(metrics.to_jsonl())
+    if args.metrics_prometheus:
+        with open(args.metrics_prometheus, "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus())
+    print(
+        f"\n✅ {succeeded}/{len(records)} videos processed. "
+        f"Report saved to {args.report}"
+    )
+    return 0 if succeeded == len(records) and not invalid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
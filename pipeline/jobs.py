@@ -0,0 +1,393 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+from pipeline.runner import (
+    PageIncompleteError,
+    PipelineReporter,
+    TranscriptUnavailableError,
+    run_pipeline
+)
+
+DEFAULT_JOBS_DB = os.path.join(".atlas_jobs", "jobs.sqlite3")
+
+# Job statuses. Only the first two are unfinished. An incomplete job
+# published a page that is missing sections; running the video again
+# finishes it.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+INCOMPLETE = "incomplete"
+NO_TRANSCRIPT = "no_transcript"
+FAILED = "failed"
+FINISHED = (DONE, INCOMPLETE, NO_TRANSCRIPT, FAILED)
+
+# A running job whose worker has not written for this long is assumed to
+# have lost its worker and is queued again. Workers touch their job every
+# HEARTBEAT_SECONDS while it runs.
+STALE_SECONDS = 300
+HEARTBEAT_SECONDS = 30
+# Claims after which a job that keeps losing its worker (e.g. it runs out
+# of memory or crashes the interpreter) fails instead of being queued again.
+MAX_ATTEMPTS = 3
+
+_COLUMNS = (
+    "id", "video_id", "fresh", "status", "log", "url", "error", "attempts",
+    "created_at", "started_at", "finished_at", "updated_at",
+)
+
+
+class JobQueue:
+    """
+    Persistent queue of pipeline jobs backed by SQLite.
+
+    Any number of processes may share the same database: the interface
+    enqueues jobs and polls them, and worker processes claim, run and
+    report on them. Every job keeps a progress log, so its status outlives
+    the browser tab that submitted it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Location of the SQLite database file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False,
+            isolation_level=None,
+        )
+        # WAL lets the interface read while a worker is writing.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, "
+            "video_id TEXT NOT NULL, "
+            "fresh INTEGER NOT NULL, "
+            "status TEXT NOT NULL, "
+            "log TEXT NOT NULL, "
+            "url TEXT, "
+            "error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, "
+            "started_at REAL, "
+            "finished_at REAL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status_created_at "
+            "ON jobs (status, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_video_id ON jobs (video_id)"
+        )
+
+    def enqueue(self, video_id: str, fresh: bool = False) -> str:
+        """
+        Queues a pipeline run for `video_id`.
+
+        Unless `fresh` is set, a job for the same video that is still queued,
+        running or has already produced a complete page is returned instead
+        of queuing a new one. A fresh job for a video that is being
+        processed waits until the running job has finished.
+
+        Args:
+            video_id (str): The 11-character YouTube video ID.
+            fresh (bool): Discard saved checkpoints and start from scratch.
+
+        Returns:
+            str: The ID of the job to poll.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not fresh:
+                    row = self._conn.execute(
+                        "SELECT id FROM jobs WHERE video_id = ? "
+                        "AND status IN (?, ?, ?) "
+                        "ORDER BY created_at DESC LIMIT 1",
+                        (video_id, QUEUED, RUNNING, DONE),
+                    ).fetchone()
+                    if row is not None:
+                        self._conn.execute("COMMIT")
+                        return row[0]
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, video_id, fresh, status, log, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, video_id, int(fresh), QUEUED, "[]", now, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self) -> dict | None:
+        """
+        Marks the oldest queued job as running and returns it, skipping
+        jobs whose video already has a running job.
+
+        Running jobs that have not been updated for `STALE_SECONDS` are
+        queued again first, so the jobs of a crashed worker are picked up.
+        A job that already lost its worker on `MAX_ATTEMPTS` claims is
+        marked as failed instead.
+
+        Returns:
+            dict | None: The claimed job, or None if the queue is empty.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, "
+                    "finished_at = ?, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (
+                        FAILED,
+                        f"The worker was lost on all {MAX_ATTEMPTS} attempts",
+                        now, now, RUNNING, now - STALE_SECONDS, MAX_ATTEMPTS,
+                    ),
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET status = ? "
+                    "WHERE status = ? AND updated_at < ?",
+                    (QUEUED, RUNNING, now - STALE_SECONDS),
+                )
+                # Two runs of the same video would share its checkpoints
+                # and could both create a page, so a video's jobs run one
+                # at a time.
+                row = self._conn.execute(
+                    "SELECT id FROM jobs AS job WHERE status = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM jobs "
+                    "WHERE video_id = job.video_id AND status = ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, "
+                        "updated_at = ?, attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (RUNNING, now, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row is not None else None
+
+    def update(self, job_id: str, **fields) -> None:
+        """
+        Sets columns of a job, e.g. `status`, `url`, `error` or `log` (a
+        list, stored as JSON), and refreshes its `updated_at`.
+        """
+        fields["updated_at"] = time.time()
+        if "log" in fields:
+            fields["log"] = json.dumps(fields["log"], ensure_ascii=False)
+        if fields.get("status") in FINISHED:
+            fields["finished_at"] = fields["updated_at"]
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        Returns a job with its decoded progress log, or None if unknown.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["fresh"] = bool(job["fresh"])
+        job["log"] = json.loads(job["log"])
+        return job
+
+    def counts(self) -> dict[str, int]:
+        """
+        Returns the number of jobs in every status.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+
+_job_queue: JobQueue | None = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Returns the process-wide job queue, opening it on first use.
+
+    The database location is read from `ATLAS_JOBS_DB`.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(os.getenv("ATLAS_JOBS_DB", DEFAULT_JOBS_DB))
+        return _job_queue
+
+
+class JobReporter(PipelineReporter):
+    """
+    Records pipeline progress in the job's log, one entry per stage with its
+    messages, latest progress and the run summary.
+    """
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.current_stage = None
+        self._log: list[dict] = []
+        # Progress may be reported from the pipeline's worker threads.
+        self._lock = threading.Lock()
+
+    def _write(self) -> None:
+        self.queue.update(self.job_id, log=self._log)
+
+    def _entry(self) -> dict:
+        if not self._log:
+            self._log.append({"stage": None, "messages": []})
+        return self._log[-1]
+
+    def stage(self, title: str) -> None:
+        with self._lock:
+            self.current_stage = title
+            self._log.append({"stage": title, "messages": []})
+            self._write()
+
+    def message(self, text: str) -> None:
+        with self._lock:
+            self._entry()["messages"].append(text)
+            self._write()
+
+    def progress(self, fraction: float, text: str) -> None:
+        with self._lock:
+            self._entry()["progress"] = [fraction, text]
+            self._write()
+
+    def run_summary(self, rows: list[dict]) -> None:
+        with self._lock:
+            self._log.append({"stage": None, "messages": [], "summary": rows})
+            self._write()
+
+
+def run_job(queue: JobQueue, job: dict) -> None:
+    """
+    Runs a claimed job and records its outcome.
+    """
+    reporter = JobReporter(queue, job["id"])
+    finished = threading.Event()
+
+    def heartbeat():
+        while not finished.wait(HEARTBEAT_SECONDS):
+            queue.update(job["id"])
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        url = run_pipeline(
+            job["video_id"], reporter=reporter, fresh=job["fresh"]
+        )
+    except TranscriptUnavailableError as e:
+        queue.update(job["id"], status=NO_TRANSCRIPT, error=str(e))
+    except PageIncompleteError as e:
+        queue.update(job["id"], status=INCOMPLETE, url=e.url, error=str(e))
+    except Exception as e:
+        print(f"Job {job['id']} for {job['video_id']} failed: {repr(e)}")
+        queue.update(
+            job["id"], status=FAILED,
+            error=f"{reporter.current_stage}: {repr(e)}",
+        )
+    else:
+        queue.update(job["id"], status=DONE, url=url)
+    finally:
+        finished.set()
+
+
+def work(poll_seconds: float = 1.0, stop: threading.Event | None = None):
+    """
+    Claims and runs queued jobs one at a time until `stop` is set.
+
+    Args:
+        poll_seconds (float): Delay between polls of an empty queue.
+        stop (threading.Event | None): Ends the loop once set. None runs
+        forever.
+    """
+    queue = get_job_queue()
+    while stop is None or not stop.is_set():
+        job = queue.claim()
+        if job is None:
+            time.sleep(poll_seconds)
+            continue
+        print(f"Running job {job['id']} for video {job['video_id']}")
+        run_job(queue, job)
+
+
+def start_workers(count: int) -> list[multiprocessing.Process]:
+    """
+    Starts `count` worker processes that run queued jobs.
+
+    The processes are daemons: they stop with the process that started
+    them. They are spawned rather than forked, so they do not inherit the
+    threads of a running Streamlit server.
+
+    Returns:
+        list[multiprocessing.Process]: The started processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    for _ in range(count):
+        process = context.Process(target=work, daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run queued Atlas jobs in worker processes, e.g. next to a "
+            "Streamlit server started with ATLAS_JOB_WORKERS=0."
+        )
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2,
+        help="Number of worker processes (default: 2).",
+    )
+    args = parser.parse_args(argv)
+
+    workers = start_workers(max(args.workers, 1))
+    print(f"Started {len(workers)} workers on {get_job_queue().path}")
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,624 @@
+import os
+import uuid
+from typing import Iterable, Iterator
+
+from core.checkpoints import Checkpoint
+from core.metrics import metrics, run_context
+from core.notion_sync import published_blocks
+from core.notion_writer import get_notion_writer
+from core.topic_cache import get_topic_cache
+from processors.section_splitter import SectionSplitter
+from processors.transcript_compactor import (
+    TranscriptCompactor,
+    iter_tokens_saved
+)
+from processors.transcript_fetcher import fetch_transcript_raw
+from agents.summarizer_agent import (
+    iter_summarized_sections,
+    reduce_to_chapters
+)
+from agents.research_agent import extract_topics_from_json, enrich_topics
+from agents.atlas_agent import (
+    build_lessons,
+    list_block_ids,
+    pair_with_enrichment,
+    stream_lessons_to_page,
+    update_page
+)
+
+# Strip caption markers, fillers and repeated caption text before splitting
+COMPACT_TRANSCRIPT = os.getenv("ATLAS_COMPACT_TRANSCRIPT", "1") != "0"
+# Token budget of a transcript section (unset: 5-minute sections) and the
+# tokens of context repeated between consecutive sections
+SECTION_MAX_TOKENS = int(os.getenv("ATLAS_SECTION_TOKENS", "0")) or None
+SECTION_OVERLAP_TOKENS = int(os.getenv("ATLAS_SECTION_OVERLAP_TOKENS", "0"))
+# Number of transcript sections summarized concurrently
+SUMMARIZER_MAX_WORKERS = int(os.getenv("ATLAS_SUMMARIZER_WORKERS", "4"))
+# Videos with more sections than this are merged into chapters before the
+# lessons are written (0, the default, disables it), at most this many parts
+# per merge
+CHAPTER_MIN_SECTIONS = int(os.getenv("ATLAS_CHAPTER_MIN_SECTIONS", "0"))
+CHAPTER_FAN_IN = int(os.getenv("ATLAS_CHAPTER_FAN_IN", "4"))
+# Number of topics researched concurrently and the per-topic time limit
+RESEARCH_MAX_WORKERS = int(os.getenv("ATLAS_RESEARCH_WORKERS", "5"))
+RESEARCH_TIMEOUT = float(os.getenv("ATLAS_RESEARCH_TIMEOUT", "120"))
+# Number of lessons generated concurrently while the Notion page fills up
+LESSON_MAX_WORKERS = int(os.getenv("ATLAS_LESSON_WORKERS", "4"))
+# Append lesson blocks while the model is still writing the lesson
+STREAM_LESSONS = os.getenv("ATLAS_STREAM_LESSONS", "1") != "0"
+# Rewrite the page published earlier for the video in place, block by
+# block, instead of creating a new one
+UPDATE_PAGES = os.getenv("ATLAS_UPDATE_PAGES", "1") != "0"
+
+# Artifact recording the page published for a video and the hash of each of
+# its blocks. Starting fresh keeps it, so the page can be updated.
+PUBLISHED_PAGE = "published_page"
+
+
+class TranscriptUnavailableError(Exception):
+    """
+    Raised when a video has no transcript that can be fetched.
+    """
+
+
+class PageIncompleteError(Exception):
+    """
+    Raised when some sections could not be summarized or some lessons
+    could not be written, so the Notion page at `url` does not cover the
+    whole video yet. Running the video again finishes it, reusing the
+    summaries and lessons already written.
+    """
+
+    def __init__(self, message: str, url: str):
+        super().__init__(message)
+        self.url = url
+
+
+class PipelineReporter:
+    """
+    Receives progress updates from `run_pipeline`.
+
+    The default implementation prints them; the Streamlit interface renders
+    them as status boxes.
+    """
+
+    def stage(self, title: str) -> None:
+        print(f"\n{title}")
+
+    def message(self, text: str) -> None:
+        print(text)
+
+    def progress(self, fraction: float, text: str) -> None:
+        print(text)
+
+    def finish(self) -> None:
+        pass
+
+    def run_summary(self, rows: list[dict]) -> None:
+        print("\nRun summary")
+        for row in rows:
+            print(
+                f"  {row['stage']}: {row['calls']} calls, "
+                f"{row['total_seconds']}s total, "
+                f"{row['input_tokens']}+{row['output_tokens']} tokens"
+            )
+
+
+def run_pipeline(video_id: str,
+                 reporter: PipelineReporter | None = None,
+                 fresh: bool = False) -> str:
+    """
+    Turns a YouTube video into a Notion lesson page.
+
+    Every stage checkpoints its output, so running the same video again
+    resumes after the last completed stage, and an interrupted summarization
+    or lesson stage resumes at the first unfinished section. The latency
+    and token usage of every stage call is appended to the video's `metrics`
+    record log and reported as a run summary.
+
+    Args:
+        video_id (str): The 11-character YouTube video ID.
+        reporter (PipelineReporter | None): Receives progress updates.
+        fresh (bool): Discard saved checkpoints and start from scratch.
+
+    Returns:
+        str: The URL of the Notion page.
+
+    Raises:
+        TranscriptUnavailableError: The video has no transcript.
+        PageIncompleteError: Some sections could not be summarized or
+        some lessons failed, so the page is missing sections or was not
+        updated.
+    """
+    reporter = reporter or PipelineReporter()
+    checkpoint = Checkpoint(video_id)
+    if fresh:
+        checkpoint.reset()
+
+    run_id = uuid.uuid4().hex
+    with run_context(video_id=video_id, run_id=run_id):
+        try:
+            return _run_stages(checkpoint, reporter)
+        finally:
+            events = metrics.events(run_id=run_id)
+            for event in events:
+                checkpoint.store.append_record(video_id, "metrics", event)
+            reporter.run_summary(metrics.summary(run_id=run_id))
+
+
+def _run_stages(checkpoint: Checkpoint, reporter: PipelineReporter) -> str:
+    video_id = checkpoint.video_id
+    reporter.stage("Extracting Transcript")
+    if checkpoint.is_done("fetch"):
+        reporter.message("♻️ **Restored from a previous run.**")
+    else:
+        reporter.message(
+            "📜 **Extracting ancient scrolls from YouTube archives...**"
+        )
+        with metrics.measure("fetch_transcript_raw"):
+            chunks = fetch_transcript_raw(video_id)
+        if not chunks:
+            raise TranscriptUnavailableError(
+                "No transcript found or transcripts are disabled."
+            )
+        # YouTube hands the transcript over whole; from here on it is
+        # streamed back from the checkpoint instead of kept in memory.
+        checkpoint.save("fetch", chunks)
+        del chunks
+
+    reporter.stage("Splitting Transcript")
+    if checkpoint.is_done("split"):
+        reporter.message("♻️ **Restored from a previous run.**")
+        sections = checkpoint.records("split")
+    else:
+        reporter.message("🪓 **Splitting scroll into readable runes...**")
+        # Lazy: each section is split off the transcript only when the
+        # summarizers are ready for it.
+        sections = _split(checkpoint, reporter)
+
+    reporter.stage("Summarization Ritual")
+    if checkpoint.is_done("summarize"):
+        summarized_sections = _resume(checkpoint, "summarize", reporter)
+    else:
+        summarized_sections = _summarize(checkpoint, sections, reporter)
+
+    reporter.stage("Analyzing Topics")
+    if checkpoint.is_done("topics"):
+        topics = _resume(checkpoint, "topics", reporter)
+    else:
+        reporter.message(
+            "🕵🏼‍♂️ **Research Agent is analyzing and "
+            "extracting key topics...**"
+        )
+        topics = extract_topics_from_json(checkpoint.path("summarize"))
+        checkpoint.save("topics", topics)
+    reporter.message(
+        f"🔍 Topics identified for research: {' | '.join(topics)}"
+    )
+
+    reporter.stage("Enriching Topics")
+    if checkpoint.is_done("research"):
+        enrichment_data = _resume(checkpoint, "research", reporter)
+    else:
+        enrichment_data = _research(checkpoint, topics, reporter)
+
+    # A section whose summary failed has nothing to teach from, so it gets
+    # no lesson until a later run summarizes it.
+    skipped = [
+        i + 1 for i, section in enumerate(summarized_sections)
+        if "error" in section
+    ]
+    if skipped:
+        summarized_sections = [
+            section for section in summarized_sections
+            if "error" not in section
+        ]
+        if not summarized_sections:
+            raise RuntimeError(
+                "No rune could be transcribed; run this video again to "
+                "retry them."
+            )
+        reporter.message(
+            f"⚠️ **Runes {', '.join(map(str, skipped))} are left out of the "
+            "page.**"
+        )
+
+    if checkpoint.is_done("chapters"):
+        chapters = checkpoint.load("chapters")
+    else:
+        chapters = _chapters(checkpoint, summarized_sections, reporter)
+
+    reporter.stage("Crafting Notion Page")
+    if checkpoint.is_done("page"):
+        page_id = _resume(checkpoint, "page", reporter)["page_id"]
+    else:
+        page_id = _build_page(checkpoint, chapters, enrichment_data, reporter)
+
+    if skipped:
+        # The summarize stage stays unfinished, so the next run retries
+        # these sections and then rewrites the page.
+        raise PageIncompleteError(
+            f"Atlas could not summarize sections "
+            f"{', '.join(map(str, skipped))}, so the page leaves them out. "
+            "Run this video again to add them.",
+            _page_url(page_id),
+        )
+    reporter.finish()
+    return _page_url(page_id)
+
+
+def _page_url(page_id: str) -> str:
+    return f"https://www.notion.so/{page_id.replace('-', '')}"
+
+
+def _measured(stage: str, items: Iterator[dict]) -> Iterator[dict]:
+    # Measures the work done to produce each item of a lazy stream as one
+    # `stage` event, leaving out the time the consumer spends on it.
+    while True:
+        with metrics.measure(stage):
+            item = next(items, None)
+        if item is None:
+            return
+        yield item
+
+
+def _split(checkpoint: Checkpoint,
+           reporter: PipelineReporter) -> Iterator[dict]:
+    # Streams the transcript from the fetch checkpoint through compaction
+    # and splitting, yielding each section as soon as it closes. Sections
+    # are saved one by one and become the split artifact once the
+    # transcript is exhausted.
+    chunks = checkpoint.records("fetch")
+    if COMPACT_TRANSCRIPT:
+        chunks = TranscriptCompactor().iter_compacted(chunks)
+    sections = SectionSplitter(
+        max_tokens=SECTION_MAX_TOKENS,
+        overlap_tokens=SECTION_OVERLAP_TOKENS,
+    ).iter_sections(chunks)
+    if COMPACT_TRANSCRIPT:
+        sections = iter_tokens_saved(checkpoint.records("fetch"), sections)
+
+    checkpoint.discard_items("split")
+    saved: list[int] = []
+    tokens = 0
+    for index, section in enumerate(
+        _measured("SectionSplitter.run", sections)
+    ):
+        checkpoint.save_item("split", index, section)
+        saved.append(section.get("tokens_saved", 0))
+        tokens += section["tokens"]
+        yield section
+
+    checkpoint.save(
+        "split",
+        (section for _, section in checkpoint.iter_items("split")),
+        invalidate_later=False,
+    )
+    if COMPACT_TRANSCRIPT:
+        _report_compaction(saved, tokens, reporter)
+
+
+def _report_compaction(saved: list[int], tokens: int,
+                       reporter: PipelineReporter) -> None:
+    total = sum(saved) + tokens
+    per_section = ", ".join(map(str, saved))
+    reporter.message(
+        f"✂️ **Compaction trimmed {sum(saved)} of {total} tokens "
+        f"({sum(saved) / max(total, 1):.0%}).** Per rune: {per_section}"
+    )
+
+
+def _resume(checkpoint: Checkpoint, stage: str, reporter: PipelineReporter):
+    reporter.message("♻️ **Restored from a previous run.**")
+    return checkpoint.load(stage)
+
+
+def _same_section(summarized: dict, section: dict) -> bool:
+    # A section summarized by an interrupted run is reused only if the
+    # transcript was split the same way this time.
+    return all(
+        summarized.get(key) == section.get(key)
+        for key in ("start", "end", "tokens")
+    )
+
+
+def _summarize(checkpoint: Checkpoint, sections: Iterable[dict],
+               reporter: PipelineReporter) -> list[dict]:
+    reporter.message("🔥 **Preparing for Summarization Ritual...**")
+    done = checkpoint.load_items("summarize")
+    if done:
+        reporter.message(
+            f"♻️ **{len(done)} runes were already transcribed.**"
+        )
+    pending: list[int] = []
+    count = 0
+
+    def pending_sections() -> Iterator[dict]:
+        nonlocal count
+        for index, section in enumerate(sections):
+            count = index + 1
+            if index in done and _same_section(done[index], section):
+                continue
+            done.pop(index, None)
+            pending.append(index)
+            yield section
+
+    def save_section(position: int, section: dict):
+        # The text is kept in the split artifact only, so memory holds the
+        # summaries and nothing else. Failed sections are not checkpointed
+        # so a re-run retries them.
+        section.pop("text", None)
+        if "error" not in section:
+            checkpoint.save_item("summarize", pending[position], section)
+
+    reporter.message(
+        "✍🏻 **Summarizer Agent is transcribing each rune with "
+        "insight…**"
+    )
+    for position, section in enumerate(iter_summarized_sections(
+        pending_sections(),
+        max_workers=SUMMARIZER_MAX_WORKERS,
+        on_section=save_section,
+    )):
+        done[pending[position]] = section
+    summarized_sections = [done[i] for i in range(count)]
+    failed = [
+        i + 1 for i, section in enumerate(summarized_sections)
+        if "error" in section
+    ]
+    if failed:
+        reporter.message(
+            f"⚠️ **Runes {', '.join(map(str, failed))} could not be "
+            "transcribed.** Run this video again to retry them."
+        )
+    checkpoint.save("summarize", summarized_sections, complete=not failed)
+    return summarized_sections
+
+
+def _chapters(checkpoint: Checkpoint, summarized_sections: list[dict],
+              reporter: PipelineReporter) -> list[dict]:
+    # Unless enabled for long videos, every section gets its own lesson.
+    if not 0 < CHAPTER_MIN_SECTIONS < len(summarized_sections):
+        checkpoint.save("chapters", summarized_sections)
+        return summarized_sections
+
+    reporter.stage("Binding Chapters")
+    reporter.message(
+        f"📚 **Binding {len(summarized_sections)} runes into chapters...**"
+    )
+
+    def save_chapter(key: str, chapter: dict):
+        checkpoint.save_item("chapters", key, chapter)
+
+    chapters = reduce_to_chapters(
+        summarized_sections,
+        fan_in=CHAPTER_FAN_IN,
+        max_workers=SUMMARIZER_MAX_WORKERS,
+        merged=checkpoint.load_items("chapters"),
+        on_merge=save_chapter,
+    )
+    failed = any("error" in chapter for chapter in chapters)
+    reporter.message(
+        f"📖 **{len(chapters)} chapters bound.**" + (
+            " Some could not be merged; run this video again to retry them."
+            if failed else ""
+        )
+    )
+    checkpoint.save("chapters", chapters, complete=not failed)
+    return chapters
+
+
+def _research(checkpoint: Checkpoint, topics: list[str],
+              reporter: PipelineReporter) -> dict[str, str]:
+    done = checkpoint.load_items("research")
+    pending = [topic for topic in topics if topic not in done]
+    if pending:
+        reporter.message(f"📚 **Researching: {' | '.join(pending)}...**")
+
+    def save_topic(topic: str, enrichment: str):
+        reporter.message(f"✅ **Researched: {topic}**")
+        # Failed topics are not checkpointed so a re-run retries them.
+        if enrichment:
+            checkpoint.save_item("research", topic, enrichment)
+
+    cache = get_topic_cache()
+    before = cache.stats() if cache else None
+    done.update(enrich_topics(
+        pending,
+        max_workers=RESEARCH_MAX_WORKERS,
+        timeout=RESEARCH_TIMEOUT,
+        on_result=save_topic,
+    ))
+    if cache and pending:
+        _report_topic_cache(before, cache.stats(), reporter)
+    enrichment_data = {topic: done.get(topic, "") for topic in topics}
+    checkpoint.save(
+        "research", enrichment_data, complete=all(enrichment_data.values())
+    )
+    return enrichment_data
+
+
+def _report_topic_cache(before: dict, after: dict,
+                        reporter: PipelineReporter) -> None:
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    stale = after["stale_misses"] - before["stale_misses"]
+    reporter.message(
+        f"🗃️ **{hits} of {lookups} topics reused from earlier videos.** "
+        f"Topic cache: {after['entries']} entries, "
+        f"{after['stale_entries']} stale"
+        + (f", {stale} refreshed now" if stale else "")
+        + f", hit rate {after['hit_rate']:.0%} since start"
+    )
+
+
+def _build_page(checkpoint: Checkpoint, summarized_sections: list[dict],
+                enrichment_data: dict[str, str],
+                reporter: PipelineReporter) -> str:
+    lesson_inputs = pair_with_enrichment(summarized_sections, enrichment_data)
+    published = checkpoint.store.get(
+        checkpoint.video_id, PUBLISHED_PAGE, None
+    )
+    if UPDATE_PAGES and published:
+        page_id = _update_page(checkpoint, lesson_inputs, published, reporter)
+        if page_id is not None:
+            return page_id
+
+    reporter.message("🏛️ **Atlas is crafting your Notion page...**")
+    lessons = checkpoint.load_items("lessons")
+    page_state = checkpoint.load_items("page")
+    section_block_ids = {
+        int(key.split(":")[1]): block_ids
+        for key, block_ids in page_state.items()
+        if key.startswith("section:")
+    }
+
+    def page_created(page_id: str):
+        checkpoint.save_item("page", "page_id", page_id)
+        reporter.message(
+            f"🏛️ **Your page is filling up:** {_page_url(page_id)}"
+        )
+
+    def lesson_built(index: int, blocks: list[dict]):
+        lessons[index] = blocks
+        checkpoint.save_item("lessons", index, blocks)
+
+    def blocks_appended(index: int, block_ids: list[str]):
+        # Lets a resumed run remove a partially appended section before
+        # appending it again.
+        section_block_ids[index] = list(block_ids)
+        checkpoint.save_item(
+            "page", "partial", {"index": index, "block_ids": block_ids}
+        )
+
+    def section_appended(index: int, block_count: int):
+        checkpoint.save_item(
+            "page", f"section:{index}", section_block_ids.get(index, [])
+        )
+        checkpoint.save_item("page", "appended", index + 1)
+        reporter.progress(
+            (index + 1) / len(lesson_inputs),
+            f"📜 Section {index + 1}/{len(lesson_inputs)} "
+            f"added to Notion ({block_count} blocks)",
+        )
+
+    start_index = page_state.get("appended", 0)
+    partial = page_state.get("partial") or {}
+    page_id, appended = stream_lessons_to_page(
+        f"YouTube Video ID – {checkpoint.video_id}",
+        lesson_inputs,
+        max_workers=LESSON_MAX_WORKERS,
+        on_section_appended=section_appended,
+        on_page_created=page_created,
+        page_id=page_state.get("page_id"),
+        lessons=dict(lessons),
+        start_index=start_index,
+        on_lesson_built=lesson_built,
+        stream=STREAM_LESSONS,
+        partial_block_ids=(
+            partial.get("block_ids")
+            if partial.get("index") == start_index else None
+        ),
+        on_blocks_appended=blocks_appended,
+    )
+    lesson_blocks = [lessons.get(i, []) for i in range(len(lesson_inputs))]
+    missing = [i + 1 for i in range(len(lesson_inputs)) if i not in lessons]
+    if missing or appended < len(lesson_inputs):
+        message = (
+            "Atlas could not write sections "
+            f"{', '.join(map(str, missing))}. The page stops before "
+            f"section {appended + 1}; run this video again to finish it, "
+            "reusing the lessons already written."
+        )
+        reporter.message(f"⚠️ **{message}**")
+        # The page state is kept, so the next run resumes on this page.
+        checkpoint.save("lessons", lesson_blocks, complete=False)
+        raise PageIncompleteError(message, _page_url(page_id))
+    checkpoint.save("lessons", lesson_blocks)
+    blocks = [block for lesson in lesson_blocks for block in lesson]
+    block_ids = [
+        block_id for index in range(len(lesson_inputs))
+        for block_id in section_block_ids.get(index, [])
+    ]
+    if len(block_ids) == len(blocks):
+        checkpoint.store.put(checkpoint.video_id, PUBLISHED_PAGE, {
+            "page_id": page_id,
+            "blocks": published_blocks(blocks, block_ids),
+        })
+    checkpoint.save("page", {"page_id": page_id})
+    return page_id
+
+
+def _update_page(checkpoint: Checkpoint, lesson_inputs: list[tuple],
+                 published: dict,
+                 reporter: PipelineReporter) -> str | None:
+    # Rewrites the page published by an earlier run with only the changes.
+    # Returns None if that page cannot be updated and a new one is needed.
+    page_id = published["page_id"]
+    try:
+        present = set(list_block_ids(page_id))
+    except Exception as e:
+        reporter.message(
+            "⚠️ **The page published earlier could not be read; Atlas "
+            f"will create a new one.** ({repr(e)})"
+        )
+        return None
+    reporter.message(
+        "🏛️ **Atlas is rewriting your Notion page:** "
+        + _page_url(page_id)
+    )
+    # Blocks removed from the page by hand are no longer ours to update.
+    current = [
+        block for block in published["blocks"] if block["id"] in present
+    ]
+    written = []
+
+    def lesson_built(index: int, blocks: list[dict]):
+        checkpoint.save_item("lessons", index, blocks)
+        written.append(index)
+        reporter.progress(
+            len(written) / len(lesson_inputs),
+            f"📜 Lesson {len(written)}/{len(lesson_inputs)} written",
+        )
+
+    lessons = build_lessons(
+        lesson_inputs,
+        max_workers=LESSON_MAX_WORKERS,
+        lessons=checkpoint.load_items("lessons"),
+        on_lesson_built=lesson_built,
+    )
+    lesson_blocks = [lessons.get(i, []) for i in range(len(lesson_inputs))]
+    missing = [i + 1 for i in range(len(lesson_inputs)) if i not in lessons]
+    if missing:
+        message = (
+            "Atlas could not write sections "
+            f"{', '.join(map(str, missing))}, so the page was left as it "
+            "was. Run this video again to retry them."
+        )
+        reporter.message(f"⚠️ **{message}**")
+        checkpoint.save("lessons", lesson_blocks, complete=False)
+        raise PageIncompleteError(message, _page_url(page_id))
+    checkpoint.save("lessons", lesson_blocks)
+
+    requests = get_notion_writer().stats()["requests"]
+    blocks = [block for lesson in lesson_blocks for block in lesson]
+
+    def page_published(page_blocks: list[dict]):
+        # Also runs when a request fails, so a retry only sends the rest.
+        checkpoint.store.put(checkpoint.video_id, PUBLISHED_PAGE, {
+            "page_id": page_id,
+            "blocks": page_blocks,
+        })
+
+    _, counts = update_page(
+        page_id, current, blocks, on_published=page_published
+    )
+    checkpoint.save("page", {"page_id": page_id})
+    reporter.message(
+        f"🔁 **Page updated with "
+        f"{get_notion_writer().stats()['requests'] - requests} Notion "
+        f"requests:** {counts['kept']} blocks kept, {counts['updated']} "
+        f"updated, {counts['inserted']} inserted, {counts['deleted']} "
+        "deleted."
+    )
+    return page_id
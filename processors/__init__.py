@@ -1,6 +1,9 @@
-from .transcript_fetcher import fetch_transcript
+from .transcript_fetcher import fetch_transcript, prefetch
 from .section_splitter import SectionSplitter
+from .topic_ranker import rank_topics
 
 
 __all__ = ["fetch_transcript",
-           "SectionSplitter"]
+           "prefetch",
+           "SectionSplitter",
+           "rank_topics"]
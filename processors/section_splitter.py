@@ -1,39 +1,181 @@
+from typing import Iterable, Iterator
+
+from core.tokens import estimate_tokens
+
+# Caption texts ending with one of these close a sentence.
+SENTENCE_ENDINGS = (".", "!", "?", "…", '."', '?"', '!"')
+
+
 class SectionSplitter:
+    """
+    Groups raw transcript chunks into sections that are summarized one by
+    one.
+
+    By default every section covers `seconds_per_section` of video. Given
+    `max_tokens`, sections are instead sized by their estimated prompt
+    tokens, so fast and slow speakers both produce evenly sized model
+    calls.
+    """
+
+    def __init__(self, seconds_per_section: float = 300,
+                 max_tokens: int | None = None, overlap_tokens: int = 0,
+                 min_fill: float = 0.6, pause_seconds: float = 1.0):
+        """
+        Args:
+            seconds_per_section (float): Section length in time mode.
+            max_tokens (int | None): Token budget of a section. Enables the
+            token mode when set.
+            overlap_tokens (int): Tokens of context repeated from the end of
+            each section at the start of the next one, in token mode.
+            min_fill (float): Share of `max_tokens` a section must reach
+            before it may be cut early at a sentence end or pause.
+            pause_seconds (float): Silence between two captions that counts
+            as a pause.
+        """
+        if max_tokens is not None and not 0 <= overlap_tokens < max_tokens / 2:
+            raise ValueError(
+                "overlap_tokens must be less than half of max_tokens"
+            )
+        self.seconds_per_section = seconds_per_section
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_fill = min_fill
+        self.pause_seconds = pause_seconds
+
     def run(self, transcript_chunks: list[dict]) -> list[dict]:
         """
         Groups raw transcripts chunks into logical sections.
 
         Args:
             transcript_chunks (list[dict]): List of dicts with keys 'text',
-            'start', and 'end'.
+            'start', and 'duration'.
 
         Returns:
-            list[dict]: List of sections with keys 'text', 'start', and 'end'.
+            list[dict]: List of sections with keys 'text', 'start', 'end'
+            and 'tokens' (the estimated prompt tokens of 'text').
         """
-        SECONDS_PER_SECTION = 300  # We will define 5 minutes per chunk
-        sections = []
-        current_section = []
-        section_start = 0
-        current_time = 0
+        return list(self.iter_sections(transcript_chunks))
+
+    def iter_sections(self,
+                      transcript_chunks: Iterable[dict]) -> Iterator[dict]:
+        """
+        Streaming counterpart of `run`: consumes the chunks one at a time
+        and yields each section as soon as it closes, so only the section
+        being filled is held in memory.
 
+        Args:
+            transcript_chunks (Iterable[dict]): Dicts with keys 'text',
+            'start', and 'duration', in order.
+
+        Yields:
+            dict: Sections with keys 'text', 'start', 'end' and 'tokens'.
+        """
+        if self.max_tokens is None:
+            return self._split_by_time(transcript_chunks)
+        return self._split_by_tokens(transcript_chunks)
+
+    def _split_by_time(self,
+                       transcript_chunks: Iterable[dict]) -> Iterator[dict]:
+        # Boundaries come from each caption's own start time; adding up
+        # durations drifts wherever captions overlap or leave gaps.
+        current_section = []
         for chunk in transcript_chunks:
-            current_time += chunk['duration']
-            current_section.append(chunk["text"])
-
-            if current_time - section_start >= SECONDS_PER_SECTION:
-                sections.append({
-                    "start": section_start,
-                    "end": current_time,
-                    "text": " ".join(current_section)
-                })
-                section_start = current_time
+            current_section.append(chunk)
+            end = chunk["start"] + chunk["duration"]
+            if end - current_section[0]["start"] >= self.seconds_per_section:
+                yield _section(current_section)
                 current_section = []
 
         # Add any remaining chunks to the last section
         if current_section:
-            sections.append({
-                "start": section_start,
-                "end": current_time,
-                "text": " ".join(current_section)
-            })
-        return sections
+            yield _section(current_section)
+
+    def _split_by_tokens(self,
+                         transcript_chunks: Iterable[dict]) -> Iterator[dict]:
+        # (chunk, tokens) pairs of the section being filled. The first
+        # `carried` of them repeat the end of the previous section.
+        current: list[tuple[dict, int]] = []
+        carried = 0
+        total = 0
+        # Positions right after the latest sentence end and pause.
+        sentence_end = pause = 0
+
+        # Pauses are measured up to the next chunk, so one chunk is read
+        # ahead.
+        chunks = iter(transcript_chunks)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            following = next(chunks, None)
+            tokens = estimate_tokens(chunk["text"])
+            if len(current) > carried and total + tokens > self.max_tokens:
+                cut = self._cut(current, carried, sentence_end, pause)
+                yield _section([c for c, _ in current[:cut]])
+                overlap = self._overlap(current[:cut])
+                current = overlap + current[cut:]
+                carried = len(overlap)
+                total = sum(t for _, t in current)
+                sentence_end = pause = 0
+                for position in range(carried + 1, len(current) + 1):
+                    sentence_end, pause = self._boundaries(
+                        current, position, sentence_end, pause,
+                        chunk if position == len(current)
+                        else current[position][0],
+                    )
+            current.append((chunk, tokens))
+            total += tokens
+            sentence_end, pause = self._boundaries(
+                current, len(current), sentence_end, pause, following
+            )
+            chunk = following
+
+        if len(current) > carried:
+            yield _section([c for c, _ in current])
+
+    def _boundaries(self, current: list[tuple[dict, int]], position: int,
+                    sentence_end: int, pause: int,
+                    following: dict | None) -> tuple[int, int]:
+        # Records whether the section could be cut after its first
+        # `position` chunks: `following` is the chunk after that point.
+        chunk = current[position - 1][0]
+        if chunk["text"].rstrip().endswith(SENTENCE_ENDINGS):
+            sentence_end = position
+        if following is not None:
+            silence = following["start"] - (
+                chunk["start"] + chunk["duration"]
+            )
+            if silence >= self.pause_seconds:
+                pause = position
+        return sentence_end, pause
+
+    def _cut(self, current: list[tuple[dict, int]], carried: int,
+             sentence_end: int, pause: int) -> int:
+        # Prefers the latest sentence end, then the latest pause, as long
+        # as the section is already reasonably full; cuts right before the
+        # chunk that does not fit otherwise.
+        minimum = self.min_fill * self.max_tokens
+        for position in (sentence_end, pause):
+            if position > carried and sum(
+                t for _, t in current[:position]
+            ) >= minimum:
+                return position
+        return len(current)
+
+    def _overlap(self, section: list[tuple[dict, int]]) -> list:
+        overlap: list[tuple[dict, int]] = []
+        budget = self.overlap_tokens
+        for chunk, tokens in reversed(section):
+            if tokens > budget:
+                break
+            overlap.insert(0, (chunk, tokens))
+            budget -= tokens
+        return overlap
+
+
+def _section(chunks: list[dict]) -> dict:
+    text = " ".join(chunk["text"] for chunk in chunks)
+    return {
+        "start": chunks[0]["start"],
+        "end": chunks[-1]["start"] + chunks[-1]["duration"],
+        "text": text,
+        "tokens": estimate_tokens(text),
+    }
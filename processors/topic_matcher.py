@@ -0,0 +1,141 @@
+from collections import Counter, deque
+
+from processors.topic_ranker import topic_key
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _plural(word: str) -> str:
+    if word.endswith("y") and len(word) > 3 and word[-2] not in "aeiou":
+        return word[:-1] + "ies"
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        return word + "es"
+    return word + "s"
+
+
+def _variants(topic: str) -> set[str]:
+    # The topic as written plus its singular and plural forms, so "Bands"
+    # also matches "band" and "query" also matches "queries".
+    lowered = " ".join(topic.lower().split())
+    singular = topic_key(topic)
+    variants = {lowered, singular}
+    if singular:
+        *words, last = singular.split(" ")
+        variants.add(" ".join(words + [_plural(last)]))
+    variants.discard("")
+    return variants
+
+
+class TopicMatcher:
+    """
+    Finds every occurrence of a fixed set of topics in texts, in one pass
+    per text whatever the number of topics.
+
+    The topics are compiled once into an Aho-Corasick automaton over their
+    lower-cased singular and plural forms. Matches must start and end at
+    word boundaries, so "key" is not found inside "keyboard", and topics
+    written in capitals such as "WHERE" only match in capitals.
+    """
+
+    def __init__(self, topics: list[str]):
+        """
+        Args:
+            topics (list[str]): The topics to look for, e.g. the keys of the
+            enrichment data.
+        """
+        self.topics = list(topics)
+        self._capitals = [topic.isupper() for topic in self.topics]
+        # Trie transitions, failure links and, per state, the (topic index,
+        # pattern length) pairs of the patterns ending there.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, int]]] = [[]]
+        for index, topic in enumerate(self.topics):
+            for pattern in _variants(topic):
+                self._add(pattern, index)
+        self._link()
+
+    def _add(self, pattern: str, index: int):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        if (index, len(pattern)) not in self._out[state]:
+            self._out[state].append((index, len(pattern)))
+
+    def _link(self):
+        # Breadth-first, so a state's failure target is always linked
+        # before the state itself.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[
+                    self._fail[child]
+                ]
+
+    def find(self, text: str) -> Counter:
+        """
+        Counts the occurrences of every topic in `text`.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            Counter: Hit counts keyed by topic; topics that do not occur are
+            absent.
+        """
+        hits: Counter = Counter()
+        original = text
+        text = text.lower()
+        if len(text) != len(original):
+            # Lower-casing changed some lengths, so capitals cannot be
+            # checked at the same positions.
+            original = text.upper()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        last = len(text) - 1
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            if position < last and _is_word_char(text[position + 1]):
+                continue
+            for index, length in out[state]:
+                start = position - length + 1
+                if start and _is_word_char(text[start - 1]):
+                    continue
+                if (self._capitals[index]
+                        and not original[start:position + 1].isupper()):
+                    continue
+                hits[self.topics[index]] += 1
+        return hits
+
+    def match_sections(self, sections: list[dict]) -> list[Counter]:
+        """
+        Maps every section to the topics its summary mentions.
+
+        Args:
+            sections (list[dict]): Summarized sections with a 'summary' key.
+
+        Returns:
+            list[Counter]: Per section, in order, the hit count of every
+            topic it mentions.
+        """
+        return [self.find(section.get("summary", "")) for section in sections]
@@ -0,0 +1,165 @@
+import math
+import re
+from collections import Counter
+
+# Bold spans, where the summarizer highlights key terms.
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_KEY_WORD_RE = re.compile(r"[\w+#]+")
+
+# Bold labels the summaries use to structure text rather than to name a
+# topic worth researching.
+GENERIC_TERMS = frozenset({
+    "conclusion", "definition", "example", "explanation", "further reading",
+    "important", "introduction", "key concept", "key point", "key takeaway",
+    "note", "overview", "step", "summary", "takeaway", "tip", "warning",
+})
+
+# Weights of the salience signals. Relevance is TF-IDF: every occurrence of
+# a term, bold or not, counts, but a term mentioned in most sections (the
+# tutorial's running example, such as its table names) weighs less than
+# one a few sections are about. Emphasis is the number of times it is
+# bolded; position favours terms introduced early, which later sections
+# tend to build on; specificity favours multi-word terms over single
+# common words.
+RELEVANCE_WEIGHT = 1.0
+EMPHASIS_WEIGHT = 1.0
+POSITION_WEIGHT = 0.3
+SPECIFICITY_WEIGHT = 0.5
+MAX_TOPIC_WORDS = 6
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is", "os")):
+        return word[:-1]
+    return word
+
+
+def topic_key(text: str) -> str:
+    """
+    Normalizes a topic so that casing, punctuation and plural variants of
+    the same term share one key, e.g. "Primary Keys:" -> "primary key".
+    """
+    return " ".join(
+        _singular(word) for word in _KEY_WORD_RE.findall(text.lower())
+    )
+
+
+def _mention_pattern(key: str, spellings: Counter) -> str:
+    # Matches the key's words with any separator and plural ending.
+    # Acronyms and keywords such as "FROM" only count in capitals, not as
+    # the everyday word.
+    upper = all(spelling.isupper() for spelling in spellings)
+    *words, last = key.upper().split(" ") if upper else key.split(" ")
+    if last[-1:] in "yY" and len(last) > 3:
+        last = re.escape(last[:-1]) + (
+            "(?:Y|IES)" if upper else "(?:y|ies)"
+        )
+    else:
+        last = re.escape(last) + ("(?:E?S)?" if upper else "(?:e?s)?")
+    pattern = r"[\s\-_]+".join([re.escape(word) for word in words] + [last])
+    return f"(?-i:{pattern})" if upper else pattern
+
+
+def rank_topics(sections: list[dict], max_topics: int = 5) -> list[dict]:
+    """
+    Ranks the bolded terms of the summaries by salience and returns the
+    best ones.
+
+    Candidates are the `**bold**` spans of every summary, merged by
+    `topic_key`. Each is scored from how often it is mentioned (bold or
+    not), weighted by the inverse of the share of sections mentioning it,
+    how often it is bolded, how early it first appears and how many words
+    it has, so that the video's running example does not outrank the
+    concepts it illustrates. Generic labels such as
+    "Example" are skipped. Ties are broken alphabetically, so the same
+    summaries always yield the same topics.
+
+    Args:
+        sections (list[dict]): Summarized sections with a 'summary' key.
+        max_topics (int): Number of topics to return.
+
+    Returns:
+        list[dict]: The top topics, best first, with keys 'topic' (the most
+        common spelling), 'key', 'score', 'mentions', 'sections', 'bolded'
+        and 'first_section'.
+    """
+    summaries = [section.get("summary", "") for section in sections]
+    spellings: dict[str, Counter] = {}
+    for summary in summaries:
+        for match in _BOLD_RE.finditer(summary):
+            spelling = match.group(1).strip().strip(":;,.()[]{}").strip()
+            key = topic_key(spelling)
+            words = key.count(" ") + 1
+            # A span without word characters, such as "**???**", has an
+            # empty key, whose pattern would match everywhere.
+            if (not key or not 2 < len(spelling) < 50
+                    or words > MAX_TOPIC_WORDS
+                    or key in GENERIC_TERMS or key.replace(" ", "").isdigit()):
+                continue
+            spellings.setdefault(key, Counter())[spelling] += 1
+    if not spellings:
+        return []
+
+    # One pass per summary finds every mention of every candidate; longer
+    # candidates come first so "primary key" wins over "key".
+    keys = sorted(spellings, key=lambda k: (-len(k), k))
+    mention_re = re.compile(
+        r"(?<![\w+#])(?:"
+        + "|".join(_mention_pattern(key, spellings[key]) for key in keys)
+        + r")(?![\w+#])",
+        re.IGNORECASE,
+    )
+    mentions: Counter = Counter()
+    section_hits: dict[str, set[int]] = {key: set() for key in keys}
+    for index, summary in enumerate(summaries):
+        for match in mention_re.finditer(summary):
+            key = topic_key(match.group())
+            if key in section_hits:
+                mentions[key] += 1
+                section_hits[key].add(index)
+
+    total_sections = max(len(summaries), 1)
+    ranked = []
+    for key in keys:
+        hits = section_hits[key]
+        bolded = sum(spellings[key].values())
+        first_section = min(hits) if hits else 0
+        # Inverse section frequency, 1 + log(N) for a term in one section
+        # down to 1 for one in every section.
+        idf = 1 + math.log(total_sections / max(len(hits), 1))
+        score = (
+            RELEVANCE_WEIGHT * math.log1p(max(mentions[key], bolded)) * idf
+            + EMPHASIS_WEIGHT * math.log1p(bolded)
+            + POSITION_WEIGHT * (1 - first_section / total_sections)
+            + SPECIFICITY_WEIGHT * min(key.count(" "), 2)
+        )
+        ranked.append({
+            # Most common spelling, the first one seen on ties.
+            "topic": spellings[key].most_common(1)[0][0],
+            "key": key,
+            "score": round(score, 3),
+            "mentions": max(mentions[key], bolded),
+            "sections": len(hits),
+            "bolded": bolded,
+            "first_section": first_section,
+        })
+    ranked.sort(key=lambda topic: (-topic["score"], topic["key"]))
+    return ranked[:max_topics]
+
+
+def describe_topic(topic: dict, total_sections: int) -> str:
+    """
+    Explains in one line why a ranked topic was chosen.
+    """
+    return (
+        f"{topic['topic']}: score {topic['score']} "
+        f"({topic['mentions']} mentions in {topic['sections']}/"
+        f"{total_sections} sections, bolded {topic['bolded']}x, "
+        f"first in section {topic['first_section'] + 1})"
+    )
@@ -0,0 +1,181 @@
+import html
+import re
+from typing import Iterable, Iterator
+
+from core.tokens import estimate_tokens
+
+# Non-speech annotations of captions, written as [Music] or (applause).
+# Only these are removed: other bracketed text, such as `list[i]` in a
+# coding tutorial, is speech.
+NON_SPEECH_MARKERS = (
+    "applause", "cheering", "inaudible", "laughs", "laughter", "music",
+    "noise", "silence",
+)
+# The markers, the "[ __ ]" of bleeped words, ♪ and the ">>" speaker
+# change markers of auto-generated captions.
+_MARKER_RE = re.compile(
+    r"\[\s*(?:" + "|".join(NON_SPEECH_MARKERS) + r"|_+)\s*\]"
+    r"|\((?:" + "|".join(NON_SPEECH_MARKERS) + r")\)"
+    r"|[♪♫]+|>>",
+    re.IGNORECASE,
+)
+# Hesitations that carry no meaning, with the comma that often follows.
+_FILLER_RE = re.compile(
+    r"\b(?:u+m+|u+h+|uhm|erm|hmm+|mhm)\b,?\s*", re.IGNORECASE
+)
+# Short function words speakers stutter on, as in "the the". Other words
+# are kept when repeated, since "had had", "that that", "very very" or
+# "10 10" usually mean what they say.
+STUTTER_WORDS = frozenset({
+    "a", "an", "and", "but", "i", "i'm", "it's", "my", "of", "the", "they",
+    "to", "we", "we're", "you", "you're",
+})
+_REPEAT_RE = re.compile(
+    r"\b("
+    + "|".join(map(re.escape, sorted(STUTTER_WORDS, key=lambda w: -len(w))))
+    + r")(?:\s+\1\b)+",
+    re.IGNORECASE,
+)
+_SPACE_RE = re.compile(r"\s+")
+_WORD_KEY_RE = re.compile(r"[^\w']+")
+
+# Shortest run of words repeated from the end of the previous caption that
+# is treated as a rolling-caption duplicate rather than a coincidence.
+MIN_OVERLAP_WORDS = 3
+MAX_OVERLAP_WORDS = 30
+
+
+def _word_key(word: str) -> str:
+    return _WORD_KEY_RE.sub("", word.lower())
+
+
+class TranscriptCompactor:
+    """
+    Strips caption text of everything that costs prompt tokens without
+    adding meaning, before the transcript is split into sections.
+
+    Non-speech markers, hesitation fillers, stuttered words, repeated
+    whitespace and the text auto-captions repeat from one chunk to the next
+    are removed. The result is deterministic: the same captions always give
+    the same compacted text.
+    """
+
+    def __init__(self, remove_fillers: bool = True):
+        """
+        Args:
+            remove_fillers (bool): Also drop hesitations such as "um" and
+            "uh" and stuttered function words such as "the the".
+        """
+        self.remove_fillers = remove_fillers
+
+    def run(self, transcript_chunks: list[dict]) -> list[dict]:
+        """
+        Compacts raw transcript chunks.
+
+        Args:
+            transcript_chunks (list[dict]): List of dicts with keys 'text',
+            'start', and 'duration'.
+
+        Returns:
+            list[dict]: Copies of the chunks with compacted 'text'. Chunks
+            left without any text are dropped.
+        """
+        return list(self.iter_compacted(transcript_chunks))
+
+    def iter_compacted(self,
+                       transcript_chunks: Iterable[dict]) -> Iterator[dict]:
+        """
+        Streaming counterpart of `run`: compacts and yields the chunks one
+        at a time.
+        """
+        previous: list[str] = []
+        for chunk in transcript_chunks:
+            text = self.clean(chunk["text"])
+            words = text.split(" ") if text else []
+            overlap = self._overlap(previous, words)
+            if overlap:
+                words = words[overlap:]
+            if not words:
+                continue
+            previous = [_word_key(word) for word in words]
+            yield {**chunk, "text": " ".join(words)}
+
+    def clean(self, text: str) -> str:
+        """
+        Compacts the text of a single caption.
+        """
+        text = _MARKER_RE.sub(" ", html.unescape(text))
+        if self.remove_fillers:
+            text = _FILLER_RE.sub(" ", text)
+            text = _REPEAT_RE.sub(r"\1", text)
+        return _SPACE_RE.sub(" ", text).strip()
+
+    def _overlap(self, previous: list[str], words: list[str]) -> int:
+        # Length of the longest run of words that ends the previous caption
+        # and starts this one. A caption of at least MIN_OVERLAP_WORDS words
+        # repeating the end of the previous one entirely counts whatever its
+        # length; a shorter one, such as "no" after "...no", is speech.
+        if not previous or not words:
+            return 0
+        keys = [_word_key(word) for word in words]
+        if len(keys) >= MIN_OVERLAP_WORDS and keys == previous[-len(keys):]:
+            return len(keys)
+        longest = min(len(previous), len(keys), MAX_OVERLAP_WORDS)
+        for size in range(longest, MIN_OVERLAP_WORDS - 1, -1):
+            if previous[-size:] == keys[:size]:
+                return size
+        return 0
+
+
+def tokens_saved(raw_chunks: list[dict], sections: list[dict]) -> int:
+    """
+    Records on every section how many prompt tokens compaction saved.
+
+    Each raw chunk is attributed to the section whose time range it starts
+    in; the section gets a 'tokens_saved' key with the difference between
+    the estimated tokens of those raw chunks and its own 'tokens'.
+
+    Args:
+        raw_chunks (list[dict]): The transcript chunks before compaction.
+        sections (list[dict]): The sections split from the compacted
+        chunks, with 'start' and 'tokens' keys.
+
+    Returns:
+        int: The tokens saved over all sections.
+    """
+    return sum(
+        section["tokens_saved"]
+        for section in iter_tokens_saved(raw_chunks, sections)
+    )
+
+
+def iter_tokens_saved(raw_chunks: Iterable[dict],
+                      sections: Iterable[dict]) -> Iterator[dict]:
+    """
+    Streaming counterpart of `tokens_saved`: walks both streams in order
+    and yields each section with its 'tokens_saved' key as soon as the next
+    section starts, or the sections run out.
+    """
+    raw = iter(raw_chunks)
+    chunk = next(raw, None)
+
+    def close(section: dict, next_start: float | None) -> dict:
+        nonlocal chunk
+        texts = []
+        while chunk is not None and (
+            next_start is None or chunk["start"] < next_start
+        ):
+            texts.append(chunk["text"])
+            chunk = next(raw, None)
+        section["tokens_saved"] = max(
+            estimate_tokens(" ".join(texts)) - section["tokens"], 0
+        )
+        return section
+
+    previous = None
+    for section in sections:
+        if previous is not None:
+            yield close(previous, section["start"])
+        previous = section
+    if previous is not None:
+        yield close(previous, None)
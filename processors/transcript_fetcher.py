@@ -1,30 +1,117 @@
-from youtube_transcript_api import (
-    YouTubeTranscriptApi,
-    TranscriptsDisabled,
-    NoTranscriptFound
+from concurrent.futures import ThreadPoolExecutor
+
+from core.transcript_cache import (
+    DISABLED,
+    NOT_FOUND,
+    OK,
+    get_transcript_cache
 )
 
+# Transcript languages, in order of preference.
+DEFAULT_LANGUAGES = ("en",)
+
+_UNAVAILABLE_MESSAGES = {
+    DISABLED: "Transcripts are disabled for video ID: {}",
+    NOT_FOUND: "No transcript found for video ID: {}",
+}
+
+
+def _download(video_id: str,
+              languages: tuple[str, ...]) -> tuple[str, list | None]:
+    # Returns the status to cache and the transcript. Only a video without
+    # a transcript is a result; network failures and YouTube throttling
+    # raise, so they are neither cached nor reported as a missing
+    # transcript. The API client is imported here, as cached transcripts
+    # never need it.
+    from youtube_transcript_api import (
+        YouTubeTranscriptApi,
+        TranscriptsDisabled,
+        NoTranscriptFound
+    )
+
+    try:
+        return OK, YouTubeTranscriptApi.get_transcript(
+            video_id, languages=languages
+        )
+    except TranscriptsDisabled:
+        return DISABLED, None
+    except NoTranscriptFound:
+        return NOT_FOUND, None
+
 
-def fetch_transcript_raw(video_id: str) -> list[dict] | None:
+def fetch_transcript_raw(
+    video_id: str, languages: tuple[str, ...] = DEFAULT_LANGUAGES
+) -> list[dict] | None:
     """
     Fetches the raw transcript for a given YouTube video ID.
 
+    Transcripts, and videos known to have none, are served from the
+    transcript cache, so YouTube is only asked once per video and language.
+
     Args:
         video_id (str): The 11-character YouTube video ID.
+        languages (tuple[str, ...]): Transcript languages, in order of
+        preference.
 
     Returns:
         list[dict] | None: The raw transcript as a list of dictionaries,
-        or None if not available.
+        or None if the video has none.
+
+    Raises:
+        Exception: Any other failure to download it, such as a network
+        error or YouTube throttling the requests.
     """
-    try:
-        return YouTubeTranscriptApi.get_transcript(video_id)
-    except TranscriptsDisabled:
-        print(f"Transcripts are disabled for video ID: {video_id}")
-    except NoTranscriptFound:
-        print(f"No transcript found for video ID: {video_id}")
-    except Exception as e:
-        print(f"An error occurred while fetching the transcript: {repr(e)}")
-    return None
+    cache = get_transcript_cache()
+    language = ",".join(languages)
+    cached = cache.get(video_id, language) if cache else None
+    if cached is not None:
+        status, chunks = cached
+    else:
+        status, chunks = _download(video_id, languages)
+        if cache:
+            cache.set(video_id, language, status, chunks)
+    if status in _UNAVAILABLE_MESSAGES:
+        print(_UNAVAILABLE_MESSAGES[status].format(video_id))
+    return chunks
+
+
+def prefetch(video_ids: list[str], workers: int = 4,
+             languages: tuple[str, ...] = DEFAULT_LANGUAGES) -> dict:
+    """
+    Pulls the transcripts of several videos into the transcript cache
+    concurrently, so that later runs on them start without waiting for
+    YouTube.
+
+    Args:
+        video_ids (list[str]): The videos to fetch.
+        workers (int): Number of concurrent downloads. Keep it small;
+        YouTube throttles bursts of requests.
+        languages (tuple[str, ...]): Transcript languages, in order of
+        preference.
+
+    Returns:
+        dict: Whether a transcript is available, keyed by video ID. Videos
+        whose download failed count as unavailable and are fetched again
+        when processed.
+    """
+    video_ids = list(dict.fromkeys(video_ids))
+
+    def fetch(video_id: str) -> list[dict] | None:
+        try:
+            return fetch_transcript_raw(video_id, languages)
+        except Exception as e:
+            print(
+                "An error occurred while fetching the transcript of "
+                f"{video_id}: {repr(e)}"
+            )
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        transcripts = executor.map(fetch, video_ids)
+        return {
+            video_id: bool(chunks)
+            for video_id, chunks in zip(video_ids, transcripts)
+        }
 
 
 def fetch_transcript(video_id: str) -> str | None:
@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.fakes import FakeNotionServer
+from core.notion_writer import NotionWriter, TokenBucket, set_notion_writer
+
+
+def paragraph(text: str) -> dict:
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [{"type": "text", "text": {"content": text}}]
+        },
+    }
+
+
+def page_texts(server: FakeNotionServer, page_id: str) -> list[str]:
+    return [
+        block[block["type"]]["rich_text"][0]["text"]["content"]
+        for block in server.notion.page_blocks[page_id]
+    ]
+
+
+@pytest.fixture
+def server():
+    with FakeNotionServer() as server:
+        yield server
+
+
+@pytest.fixture
+def writer(server):
+    return NotionWriter(
+        auth="secret_test",
+        base_url=server.url,
+        limiter=TokenBucket(rate=1000),
+        base_delay=0.01,
+    )
+
+
+@pytest.fixture
+def shared_writer(writer):
+    # Makes `writer` the process-wide writer the agents use.
+    set_notion_writer(writer)
+    yield writer
+    set_notion_writer(None)
@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents import runner
+from agents.runner import (
+    agent_cache_key,
+    set_agent_backend,
+    set_max_inflight_calls,
+    stream_agent
+)
+
+
+class Router:
+    def __init__(self):
+        self.latencies = []
+
+    def plan(self, stage):
+        return ["model"]
+
+    def primary(self, stage):
+        return "model"
+
+    def record(self, model_id, seconds, ok):
+        self.latencies.append(seconds)
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = Router()
+    monkeypatch.setattr(runner, "get_model_router", lambda: router)
+    monkeypatch.setattr(runner, "get_response_cache", lambda: None)
+    yield router
+    set_agent_backend(None)
+    set_max_inflight_calls(None)
+
+
+def test_consumer_time_is_not_model_latency(router):
+    def stream(agent, message):
+        for delta in ("a", "b", "c"):
+            time.sleep(0.01)
+            yield delta
+        return None
+
+    set_agent_backend(lambda agent, message: None, stream_backend=stream)
+    set_max_inflight_calls(1)
+    agent = SimpleNamespace(name="tester", model=SimpleNamespace(id="model"))
+
+    deltas = []
+    for delta in stream_agent(agent, "hello", stage="atlas"):
+        # The call slot is free while the consumer handles a delta.
+        assert runner._inflight_calls.acquire(blocking=False)
+        runner._inflight_calls.release()
+        time.sleep(0.1)
+        deltas.append(delta)
+
+    assert deltas == ["a", "b", "c"]
+    assert len(router.latencies) == 1
+    assert 0.03 <= router.latencies[0] < 0.2
+
+
+def test_cache_key_covers_the_whole_system_prompt():
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+    from agno.tools.duckduckgo import DuckDuckGoTools
+
+    def build(**changes):
+        settings = {
+            "name": "Tester",
+            "model": OpenAIChat(id="gpt-4o-mini"),
+            "role": "Explain topics.",
+            "description": "You are a teacher.",
+            "instructions": ["Be brief."],
+            "markdown": True,
+        }
+        return Agent(**{**settings, **changes})
+
+    key = agent_cache_key(build(), "hello")
+
+    assert agent_cache_key(build(), "hello") == key
+    for changes in (
+        {"role": "Explain topics in depth."},
+        {"markdown": False},
+        {"tools": [DuckDuckGoTools()]},
+        {"expected_output": "A list."},
+    ):
+        assert agent_cache_key(build(**changes), "hello") != key
@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+
+from core.artifact_store import ArtifactStore
+from core.checkpoints import Checkpoint
+
+VIDEO = "dQw4w9WgXcQ"
+SECTIONS = [{"title": "Intro", "text": "héllo"}, {"title": "End", "text": ""}]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_artifacts_round_trip_through_the_manifest(tmp_path, compress):
+    store = ArtifactStore(root=str(tmp_path), compress=compress)
+
+    path = store.put(VIDEO, "sections", iter(SECTIONS), complete=True)
+    store.put(VIDEO, "enrichment_data", {"sql": "## SQL", "join": ""})
+
+    assert path.endswith(".jsonl.gz" if compress else ".jsonl")
+    # A fresh instance finds everything through the manifest alone.
+    reopened = ArtifactStore(root=str(tmp_path))
+    assert reopened.get(VIDEO, "sections") == SECTIONS
+    assert reopened.get(VIDEO, "enrichment_data") == {
+        "sql": "## SQL", "join": ""
+    }
+    entry = reopened.entry(VIDEO, "sections")
+    assert (entry["shape"], entry["records"], entry["complete"]) == (
+        "list", 2, True
+    )
+    assert reopened.entry(VIDEO, "enrichment_data")["shape"] == "dict"
+    assert reopened.videos() == [VIDEO]
+
+
+def test_rewriting_an_artifact_drops_its_other_format(tmp_path):
+    ArtifactStore(root=str(tmp_path), compress=True).put(
+        VIDEO, "sections", SECTIONS
+    )
+    store = ArtifactStore(root=str(tmp_path))
+
+    path = store.put(VIDEO, "sections", SECTIONS[:1])
+
+    assert store.locate(VIDEO, "sections") == path
+    assert store.get(VIDEO, "sections") == SECTIONS[:1]
+    assert store.entry(VIDEO, "sections")["records"] == 1
+
+
+def test_legacy_files_stay_readable(tmp_path):
+    with open(tmp_path / f"sections_{VIDEO}.json", "w") as f:
+        json.dump(SECTIONS, f)
+    store = ArtifactStore(root=str(tmp_path))
+
+    assert store.get(VIDEO, "sections") == SECTIONS
+    assert list(store.read_records(VIDEO, "sections")) == SECTIONS
+    assert store.get(VIDEO, "topics", default=None) is None
+    with pytest.raises(FileNotFoundError):
+        store.get(VIDEO, "topics")
+
+
+def test_a_truncated_record_log_keeps_its_complete_lines(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    store.append_record(VIDEO, "sections.partial", {"key": 0, "value": "a"})
+    store.append_record(VIDEO, "sections.partial", {"key": 1, "value": "b"})
+    path = store.records_path(VIDEO, "sections.partial")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": 2, "val')
+
+    assert list(store.read_records(VIDEO, "sections.partial")) == [
+        {"key": 0, "value": "a"}, {"key": 1, "value": "b"},
+    ]
+
+
+def test_an_interrupted_stage_resumes_from_its_items(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    checkpoint = Checkpoint(VIDEO, store=store)
+    checkpoint.save("split", SECTIONS)
+    checkpoint.save_item("summarize", 0, {"summary": "first"})
+
+    resumed = Checkpoint(VIDEO, store=ArtifactStore(root=str(tmp_path)))
+
+    assert resumed.is_done("split")
+    assert not resumed.is_done("summarize")
+    assert resumed.load("split") == SECTIONS
+    assert resumed.load_items("summarize") == {0: {"summary": "first"}}
+
+    resumed.save("summarize", [{"summary": "first"}, {"summary": "second"}])
+    assert resumed.is_done("summarize")
+    assert resumed.load_items("summarize") == {}
+
+
+def test_completing_a_stage_invalidates_the_later_ones(tmp_path):
+    checkpoint = Checkpoint(VIDEO, store=ArtifactStore(root=str(tmp_path)))
+    checkpoint.save("split", SECTIONS)
+    checkpoint.save("summarize", SECTIONS)
+    checkpoint.save_item("lessons", 0, [])
+
+    checkpoint.save("split", SECTIONS[:1])
+
+    assert checkpoint.is_done("split")
+    assert not checkpoint.is_done("summarize")
+    # The stale output stays on disk, only its completion is withdrawn.
+    assert checkpoint.load("summarize") == SECTIONS
+    assert checkpoint.load_items("lessons") == {}
+
+
+def test_a_streamed_stage_keeps_later_items(tmp_path):
+    checkpoint = Checkpoint(VIDEO, store=ArtifactStore(root=str(tmp_path)))
+    checkpoint.save("summarize", SECTIONS)
+    checkpoint.save_item("lessons", 0, [])
+
+    checkpoint.save("split", SECTIONS, invalidate_later=False)
+
+    assert checkpoint.is_done("summarize")
+    assert checkpoint.load_items("lessons") == {0: []}
+
+
+def test_reset_forgets_every_stage(tmp_path):
+    checkpoint = Checkpoint(VIDEO, store=ArtifactStore(root=str(tmp_path)))
+    checkpoint.save("split", SECTIONS)
+    checkpoint.save_item("summarize", 0, {})
+
+    checkpoint.reset()
+
+    assert not checkpoint.is_done("split")
+    assert checkpoint.load_items("summarize") == {}
+    assert os.listdir(tmp_path / VIDEO) == ["manifest.json"]
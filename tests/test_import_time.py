@@ -0,0 +1,16 @@
+from benchmarks.import_time import BUDGET_MS, HEAVY_MODULES, measure_import
+
+
+def test_app_imports_within_budget_without_heavy_modules():
+    # The fastest of three imports counts, as the first one may be slowed
+    # down by a cold disk cache.
+    best, imported = min(
+        (measure_import("main") for _ in range(3)),
+        key=lambda measurement: measurement[0],
+    )
+
+    heavy = sorted({
+        name for _, name in imported if name.split(".")[0] in HEAVY_MODULES
+    })
+    assert heavy == []
+    assert best * 1000 <= BUDGET_MS
@@ -0,0 +1,55 @@
+from pipeline import jobs
+from pipeline.jobs import (
+    DONE,
+    FAILED,
+    INCOMPLETE,
+    MAX_ATTEMPTS,
+    RUNNING,
+    JobQueue
+)
+
+
+def test_job_that_keeps_losing_its_worker_fails(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.enqueue("dQw4w9WgXcQ")
+    # Every running job counts as abandoned by its worker.
+    monkeypatch.setattr(jobs, "STALE_SECONDS", -1)
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = queue.claim()
+        assert (job["id"], job["status"]) == (job_id, RUNNING)
+        assert job["attempts"] == attempt
+
+    assert queue.claim() is None
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert job["finished_at"] is not None
+
+
+
+def test_fresh_job_waits_for_the_running_job_of_its_video(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    first = queue.enqueue("dQw4w9WgXcQ")
+    assert queue.claim()["id"] == first
+    fresh = queue.enqueue("dQw4w9WgXcQ", fresh=True)
+    other = queue.enqueue("9bZkp7q19f0")
+
+    assert fresh != first
+    assert queue.claim()["id"] == other
+    assert queue.claim() is None
+
+    queue.update(first, status=DONE)
+
+    assert queue.claim()["id"] == fresh
+
+
+def test_incomplete_job_is_run_again(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    first = queue.enqueue("dQw4w9WgXcQ")
+    queue.claim()
+    queue.update(first, status=INCOMPLETE)
+
+    again = queue.enqueue("dQw4w9WgXcQ")
+
+    assert again != first
+    assert queue.claim()["id"] == again
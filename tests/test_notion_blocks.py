@@ -0,0 +1,131 @@
+from core.notion_blocks import (
+    MAX_TEXT_LENGTH,
+    NotionBlockBuilder,
+    markdown_to_blocks,
+    parse_inline
+)
+
+
+def text(content: str, bold: bool = False, italic: bool = False,
+         code: bool = False, url: str | None = None) -> dict:
+    annotations = {"bold": bold, "italic": italic}
+    if code:
+        annotations["code"] = True
+    segment = {"content": content}
+    if url:
+        segment["link"] = {"url": url}
+    return {"type": "text", "text": segment, "annotations": annotations}
+
+
+def item(block_type: str, content: str, children=None) -> dict:
+    body = {"rich_text": [text(content)]}
+    if children:
+        body["children"] = children
+    return {"object": "block", "type": block_type, block_type: body}
+
+
+def test_headings_quotes_and_dividers():
+    blocks = markdown_to_blocks(
+        "# Title\n### Part\n##### Deep\n> Quoted\n---\nPlain"
+    )
+
+    assert [block["type"] for block in blocks] == [
+        "heading_1", "heading_3", "heading_3", "quote", "divider",
+        "paragraph",
+    ]
+    assert blocks[0]["heading_1"]["rich_text"] == [text("Title")]
+    assert blocks[3]["quote"]["rich_text"] == [text("Quoted")]
+    assert blocks[4] == {"object": "block", "type": "divider", "divider": {}}
+
+
+def test_numbered_and_nested_lists():
+    blocks = markdown_to_blocks(
+        "1. First\n"
+        "   - Detail\n"
+        "\n"
+        "   - Other detail\n"
+        "2) Second\n"
+        "After"
+    )
+
+    assert blocks == [
+        item("numbered_list_item", "First", [
+            item("bulleted_list_item", "Detail"),
+            item("bulleted_list_item", "Other detail"),
+        ]),
+        item("numbered_list_item", "Second"),
+        item("paragraph", "After"),
+    ]
+
+
+def test_lists_nest_at_most_three_levels():
+    blocks = markdown_to_blocks("- a\n  - b\n    - c\n      - d")
+
+    level_b = blocks[0]["bulleted_list_item"]["children"][0]
+    level_c = level_b["bulleted_list_item"]["children"]
+    assert [block["bulleted_list_item"]["rich_text"][0]["text"]["content"]
+            for block in level_c] == ["c", "d"]
+    assert all("children" not in block["bulleted_list_item"]
+               for block in level_c)
+
+
+def test_inline_formatting():
+    assert parse_inline("Use `git add` **now** or *later*, ***really***") == [
+        text("Use "),
+        text("git add", code=True),
+        text(" "),
+        text("now", bold=True),
+        text(" or "),
+        text("later", italic=True),
+        text(", "),
+        text("really", bold=True, italic=True),
+    ]
+
+
+def test_links():
+    assert parse_inline(
+        "See [the docs](https://docs.python.org/3/) or "
+        "https://example.com/a_(b)."
+    ) == [
+        text("See "),
+        text("the docs", url="https://docs.python.org/3/"),
+        text(" or "),
+        text("https://example.com/a_(b)", url="https://example.com/a_(b)"),
+        text("."),
+    ]
+
+
+def test_long_text_is_split_into_notion_sized_pieces():
+    segments = parse_inline("x" * (MAX_TEXT_LENGTH * 2 + 5) + " **end**")
+
+    assert [len(segment["text"]["content"]) for segment in segments] == [
+        MAX_TEXT_LENGTH, MAX_TEXT_LENGTH, 6, 3,
+    ]
+    assert segments[-1]["annotations"]["bold"]
+
+
+def test_code_blocks():
+    code = "x" * (MAX_TEXT_LENGTH + 1)
+    blocks = markdown_to_blocks(f"```py\nprint(1)\n{code}\n```\n```brainf\n")
+
+    assert blocks[0]["code"]["language"] == "python"
+    assert "".join(
+        part["text"]["content"] for part in blocks[0]["code"]["rich_text"]
+    ) == f"print(1)\n{code}"
+    assert len(blocks[0]["code"]["rich_text"]) == 2
+    # An unknown label and an unterminated fence still give a code block.
+    assert blocks[1]["code"]["language"] == "plain text"
+
+
+def test_streamed_pieces_give_the_same_blocks():
+    markdown = (
+        "## Loops\n1. `for` loops\n   - over *lists*\n"
+        "Done [ok](https://a.io)"
+    )
+    builder = NotionBlockBuilder()
+    blocks = []
+    for i in range(0, len(markdown), 3):
+        blocks.extend(builder.feed(markdown[i:i + 3]))
+    blocks.extend(builder.close())
+
+    assert blocks == markdown_to_blocks(markdown)
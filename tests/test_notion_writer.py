@@ -0,0 +1,72 @@
+import pytest
+from conftest import page_texts, paragraph
+
+
+def test_append_is_not_repeated_when_the_response_is_lost(server, writer):
+    page_id = writer.create_page(parent={"page_id": "parent"})["id"]
+    writer.append_children(page_id, [paragraph("intro")])
+    server.fail_next(502, applied=True)
+
+    response = writer.append_children(
+        page_id, [paragraph("one"), paragraph("two")]
+    )
+
+    assert page_texts(server, page_id) == ["intro", "one", "two"]
+    assert [block["id"] for block in response["results"]] == [
+        block["id"] for block in server.notion.page_blocks[page_id][1:]
+    ]
+
+
+def test_append_after_a_block_is_not_repeated(server, writer):
+    page_id = writer.create_page(parent={"page_id": "parent"})["id"]
+    first = writer.append_children(
+        page_id, [paragraph("a"), paragraph("c")]
+    )["results"][0]["id"]
+    server.fail_next(504, applied=True)
+
+    writer.append_children(page_id, [paragraph("b")], after=first)
+
+    assert page_texts(server, page_id) == ["a", "b", "c"]
+
+
+def test_append_is_resent_when_it_did_not_take_effect(server, writer):
+    page_id = writer.create_page(parent={"page_id": "parent"})["id"]
+    server.fail_next(502)
+
+    writer.append_children(page_id, [paragraph("one")])
+
+    assert page_texts(server, page_id) == ["one"]
+    assert writer.stats()["retried"] == 1
+
+
+def test_throttled_requests_are_retried(server, writer):
+    server.fail_next(429, times=2)
+
+    page = writer.create_page(parent={"page_id": "parent"})
+
+    assert list(server.notion.page_blocks) == [page["id"]]
+    assert writer.stats()["throttled"] == 2
+
+
+def test_page_creation_with_unknown_outcome_is_not_resent(server, writer):
+    server.fail_next(502, applied=True)
+
+    with pytest.raises(Exception):
+        writer.create_page(parent={"page_id": "parent"})
+
+    assert len(server.notion.page_blocks) == 1
+
+
+def test_idempotent_requests_are_retried(server, writer):
+    page_id = writer.create_page(parent={"page_id": "parent"})["id"]
+    block_id = writer.append_children(
+        page_id, [paragraph("draft")]
+    )["results"][0]["id"]
+    server.fail_next(503, applied=True)
+
+    writer.update_block(block_id, paragraph("final"))
+    server.fail_next(500)
+    listed = writer.list_children(page_id)
+
+    assert page_texts(server, page_id) == ["final"]
+    assert [block["id"] for block in listed["results"]] == [block_id]
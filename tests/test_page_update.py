@@ -0,0 +1,74 @@
+import pytest
+from conftest import page_texts, paragraph
+
+from agents import atlas_agent
+from agents.atlas_agent import append_blocks, update_page
+from core.notion_sync import published_blocks
+
+pytestmark = pytest.mark.usefixtures("shared_writer")
+
+
+def heading(text: str) -> dict:
+    return {
+        "object": "block",
+        "type": "heading_2",
+        "heading_2": {
+            "rich_text": [{"type": "text", "text": {"content": text}}]
+        },
+    }
+
+
+def test_blocks_inserted_before_a_failure_are_not_inserted_again(
+        server, monkeypatch):
+    page_id = server.notion.pages.create(parent={"page_id": "parent"})["id"]
+    old_blocks = [heading("A"), heading("C")]
+    published = published_blocks(
+        old_blocks, append_blocks(page_id, old_blocks)
+    )
+    new_blocks = [heading("A"), paragraph("b"), heading("C"), paragraph("d")]
+    calls = []
+
+    def append_then_fail(*args, **kwargs):
+        # The first insertion succeeds, the second one fails.
+        calls.append(args)
+        if len(calls) > 1:
+            raise RuntimeError("Notion is down")
+        return append_blocks(*args, **kwargs)
+
+    monkeypatch.setattr(atlas_agent, "append_blocks", append_then_fail)
+    recorded = []
+    with pytest.raises(RuntimeError):
+        update_page(
+            page_id, published, new_blocks, on_published=recorded.append
+        )
+    assert page_texts(server, page_id) == ["A", "b", "C"]
+    monkeypatch.setattr(atlas_agent, "append_blocks", append_blocks)
+
+    page_blocks, counts = update_page(page_id, recorded[-1], new_blocks)
+
+    assert page_texts(server, page_id) == ["A", "b", "C", "d"]
+    assert counts["inserted"] == 1
+    assert [block["id"] for block in page_blocks] == [
+        block["id"] for block in server.notion.page_blocks[page_id]
+    ]
+
+
+def test_update_reports_the_blocks_it_leaves(server):
+    page_id = server.notion.pages.create(parent={"page_id": "parent"})["id"]
+    old_blocks = [heading("A"), paragraph("x"), heading("C")]
+    published = published_blocks(
+        old_blocks, append_blocks(page_id, old_blocks)
+    )
+    new_blocks = [heading("A"), paragraph("b"), heading("B"), heading("C")]
+    recorded = []
+
+    page_blocks, _ = update_page(
+        page_id, published, new_blocks, on_published=recorded.append
+    )
+
+    assert recorded == [page_blocks]
+    assert page_texts(server, page_id) == ["A", "b", "B", "C"]
+    assert page_blocks == published_blocks(
+        new_blocks,
+        [block["id"] for block in server.notion.page_blocks[page_id]],
+    )
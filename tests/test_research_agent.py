@@ -0,0 +1,22 @@
+import time
+
+from agents import research_agent
+from agents.research_agent import enrich_topics
+
+
+def test_timeout_only_counts_once_a_topic_starts(monkeypatch):
+    def enrich_topic(topic):
+        time.sleep(0.3 if topic == "slow" else 0.05)
+        return f"{topic} research"
+
+    monkeypatch.setattr(research_agent, "enrich_topic", enrich_topic)
+
+    results = enrich_topics(
+        ["slow", "queued", "also queued"], max_workers=1, timeout=0.2
+    )
+
+    assert results == {
+        "slow": "",
+        "queued": "queued research",
+        "also queued": "also queued research",
+    }
@@ -0,0 +1,94 @@
+import pytest
+
+from processors import section_splitter
+from processors.section_splitter import SectionSplitter
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word, whether or not tiktoken is installed.
+    monkeypatch.setattr(
+        section_splitter, "estimate_tokens", lambda text: len(text.split())
+    )
+
+
+def captions(*texts: str, pause_after: tuple[int, ...] = ()) -> list[dict]:
+    chunks = []
+    start = 0.0
+    for index, text in enumerate(texts):
+        chunks.append({"text": text, "start": start, "duration": 2.0})
+        start += 2.0 + (3.0 if index in pause_after else 0.0)
+    return chunks
+
+
+def texts(sections: list[dict]) -> list[str]:
+    return [section["text"] for section in sections]
+
+
+def test_sections_fill_the_budget_exactly():
+    chunks = captions(*[f"w{i} x{i}" for i in range(7)])
+
+    sections = SectionSplitter(max_tokens=10).run(chunks)
+
+    assert [section["tokens"] for section in sections] == [10, 4]
+    assert texts(sections) == [
+        "w0 x0 w1 x1 w2 x2 w3 x3 w4 x4", "w5 x5 w6 x6",
+    ]
+    assert (sections[0]["start"], sections[0]["end"]) == (0.0, 10.0)
+    assert sections[1]["start"] == 10.0
+
+
+def test_cut_at_a_sentence_end_once_the_section_is_full_enough():
+    chunks = captions("a b", "c d.", "e f", "g h.", "i j", "k l")
+
+    sections = SectionSplitter(max_tokens=10, min_fill=0.6).run(chunks)
+
+    # "c d." ends a sentence too early (4 of 10 tokens); "g h." does not.
+    assert texts(sections) == ["a b c d. e f g h.", "i j k l"]
+
+
+def test_cut_at_a_pause_without_a_sentence_end():
+    chunks = captions("a b", "c d", "e f", "g h", "i j", "k l",
+                      pause_after=(3,))
+
+    sections = SectionSplitter(max_tokens=10).run(chunks)
+
+    assert texts(sections) == ["a b c d e f g h", "i j k l"]
+
+
+def test_sections_repeat_the_overlap_of_the_previous_one():
+    chunks = captions("a b", "c d", "e f", "g h", "i j", "k l", "m n")
+
+    sections = SectionSplitter(max_tokens=6, overlap_tokens=2).run(chunks)
+
+    assert texts(sections) == ["a b c d e f", "e f g h i j", "i j k l m n"]
+
+
+def test_an_oversized_caption_is_a_section_of_its_own():
+    chunks = captions("a b", "one two three four five six seven", "c d")
+
+    sections = SectionSplitter(max_tokens=5).run(chunks)
+
+    assert texts(sections) == [
+        "a b", "one two three four five six seven", "c d",
+    ]
+
+
+def test_overlap_must_be_less_than_half_the_budget():
+    with pytest.raises(ValueError):
+        SectionSplitter(max_tokens=10, overlap_tokens=5)
+
+
+def test_sections_are_yielded_before_the_input_ends():
+    read = []
+
+    def chunks():
+        for chunk in captions(*[f"w{i} x{i}" for i in range(20)]):
+            read.append(chunk)
+            yield chunk
+
+    first = next(SectionSplitter(max_tokens=10).iter_sections(chunks()))
+
+    assert first["tokens"] == 10
+    # The chunk that did not fit and the one read ahead for pauses.
+    assert len(read) == 7
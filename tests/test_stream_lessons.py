@@ -0,0 +1,30 @@
+import pytest
+from conftest import page_texts, paragraph
+
+from agents import atlas_agent
+from agents.atlas_agent import stream_lessons_to_page
+
+pytestmark = pytest.mark.usefixtures("shared_writer")
+
+
+def test_a_failed_lesson_leaves_the_page_incomplete(server, monkeypatch):
+    def build_lesson(summary, enrichment):
+        if summary == "broken":
+            raise RuntimeError("model error")
+        return [paragraph(summary)]
+
+    monkeypatch.setattr(atlas_agent, "build_lesson", build_lesson)
+    lesson_inputs = [("one", ""), ("broken", ""), ("three", "")]
+
+    page_id, appended = stream_lessons_to_page("Title", lesson_inputs)
+
+    assert appended == 1
+    assert page_texts(server, page_id) == ["one"]
+
+    lesson_inputs[1] = ("two", "")
+    _, appended = stream_lessons_to_page(
+        "Title", lesson_inputs, page_id=page_id, start_index=appended
+    )
+
+    assert appended == 3
+    assert page_texts(server, page_id) == ["one", "two", "three"]
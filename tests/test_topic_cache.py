@@ -0,0 +1,41 @@
+import pytest
+
+from core.topic_cache import TopicCache
+
+DISTINCT_TOPICS = [
+    ("supervised learning", "unsupervised learning"),
+    ("synchronous", "asynchronous"),
+    ("linear regression", "nonlinear regression"),
+    ("SQL injection", "NoSQL injection"),
+    ("binary search", "binary search tree"),
+]
+SPELLING_VARIANTS = [
+    ("colour theory", "color theory"),
+    ("dependency injection", "dependancy injection"),
+    ("gradient descent", "gradient desent"),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TopicCache(str(tmp_path / "topics.sqlite3"))
+
+
+@pytest.mark.parametrize("cached, topic", DISTINCT_TOPICS)
+def test_distinct_topics_are_not_near_matches(cache, cached, topic):
+    cache.set(cached, f"Research on {cached}")
+
+    assert cache.get(topic) is None
+    cache.set(topic, f"Research on {topic}")
+    assert cache.get(cached)["enrichment"] == f"Research on {cached}"
+    assert cache.get(topic)["enrichment"] == f"Research on {topic}"
+
+
+@pytest.mark.parametrize("cached, topic", SPELLING_VARIANTS)
+def test_spelling_variants_share_research(cache, cached, topic):
+    cache.set(cached, f"Research on {cached}")
+
+    hit = cache.get(topic)
+
+    assert hit["topic"] == cached
+    assert hit["similarity"] < 1
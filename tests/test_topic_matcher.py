@@ -0,0 +1,48 @@
+from collections import Counter
+
+from processors.topic_matcher import TopicMatcher
+
+
+def test_overlapping_topics_are_all_counted():
+    matcher = TopicMatcher(["binary search", "binary search tree",
+                            "search tree"])
+
+    hits = matcher.find("A binary search tree is a search tree.")
+
+    assert hits == Counter({
+        "binary search": 1, "binary search tree": 1, "search tree": 2,
+    })
+
+
+def test_matches_start_and_end_at_word_boundaries():
+    matcher = TopicMatcher(["key", "band"])
+
+    hits = matcher.find("keys, not keyboards, monkeys, bands_x or key_id")
+
+    assert hits == Counter({"key": 1})
+
+
+def test_plural_and_singular_forms_match_in_any_case():
+    matcher = TopicMatcher(["Bands", "query"])
+
+    hits = matcher.find("One band, two BANDS; a Query and more queries.")
+
+    assert hits == Counter({"Bands": 2, "query": 2})
+
+
+def test_topics_in_capitals_only_match_in_capitals():
+    matcher = TopicMatcher(["WHERE"])
+
+    assert matcher.find("where to put WHERE and Where") == Counter(
+        {"WHERE": 1}
+    )
+
+
+def test_sections_are_matched_in_order():
+    matcher = TopicMatcher(["join"])
+
+    hits = matcher.match_sections(
+        [{"summary": "Joins and a join."}, {}, {"summary": "None here"}]
+    )
+
+    assert hits == [Counter({"join": 2}), Counter(), Counter()]
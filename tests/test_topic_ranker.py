@@ -0,0 +1,29 @@
+import json
+import os
+
+from processors.topic_ranker import rank_topics
+
+
+def test_bold_spans_without_words_are_not_topics():
+    sections = [
+        {"summary": "**???** then **→→→** before **binary search**."},
+        {"summary": "Binary search halves the range; see **heaps**."},
+    ]
+
+    topics = [topic["topic"] for topic in rank_topics(sections)]
+
+    assert topics == ["binary search", "heaps"]
+
+
+def test_concepts_outrank_the_running_example():
+    path = os.path.join(
+        os.path.dirname(__file__), "..", "transcript_files",
+        "summarized_sections_p3qvj9hO_Bo.json",
+    )
+    with open(path, encoding="utf-8") as f:
+        sections = json.load(f)
+
+    topics = [topic["key"] for topic in rank_topics(sections)]
+
+    assert {"primary key", "left join"} <= set(topics)
+    assert not {"band", "database", "album", "band id"} & set(topics)
@@ -0,0 +1,44 @@
+from core import transcript_cache
+from core.transcript_cache import NOT_FOUND, OK, TranscriptCache
+
+CHUNKS = [{"text": "héllo", "start": 0.0, "duration": 1.5}]
+
+
+def test_transcripts_are_served_from_disk(tmp_path):
+    path = str(tmp_path / "transcripts.sqlite3")
+    TranscriptCache(path).set("dQw4w9WgXcQ", "en", OK, CHUNKS)
+
+    cache = TranscriptCache(path)
+
+    assert cache.get("dQw4w9WgXcQ", "en") == (OK, CHUNKS)
+    assert cache.get("dQw4w9WgXcQ", "de") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_missing_transcripts_expire(tmp_path, monkeypatch):
+    cache = TranscriptCache(
+        str(tmp_path / "transcripts.sqlite3"), negative_ttl_seconds=60
+    )
+    cache.set("dQw4w9WgXcQ", "en", NOT_FOUND)
+    cache.set("9bZkp7q19f0", "en", OK, CHUNKS)
+    assert cache.get("dQw4w9WgXcQ", "en") == (NOT_FOUND, None)
+
+    now = transcript_cache.time.time()
+    monkeypatch.setattr(transcript_cache.time, "time", lambda: now + 61)
+
+    assert cache.get("dQw4w9WgXcQ", "en") is None
+    # Transcripts themselves do not expire.
+    assert cache.get("9bZkp7q19f0", "en") == (OK, CHUNKS)
+    assert cache.stats()["negative_entries"] == 0
+
+
+def test_a_new_outcome_replaces_the_cached_one(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "transcripts.sqlite3"))
+    cache.set("dQw4w9WgXcQ", "en", NOT_FOUND)
+
+    cache.set("dQw4w9WgXcQ", "en", OK, CHUNKS)
+
+    assert cache.get("dQw4w9WgXcQ", "en") == (OK, CHUNKS)
+    assert cache.stats()["entries"] == 1
+    cache.clear()
+    assert cache.get("dQw4w9WgXcQ", "en") is None
@@ -0,0 +1,42 @@
+from processors.transcript_compactor import TranscriptCompactor
+
+
+def test_stuttered_function_words_are_collapsed():
+    compactor = TranscriptCompactor()
+
+    text = compactor.clean("so um the the index is is I I mean a a tree")
+
+    assert text == "so the index is is I mean a tree"
+
+
+def test_meaningful_repeats_are_kept():
+    compactor = TranscriptCompactor()
+
+    for text in (
+        "she had had enough",
+        "he said that that was fine",
+        "a very very large table",
+        "the output is 10 10 times",
+    ):
+        assert compactor.clean(text) == text
+
+
+def test_only_known_markers_are_removed():
+    compactor = TranscriptCompactor()
+
+    text = compactor.clean("[Music] set list[i] to (applause) array[0] [ __ ]")
+
+    assert text == "set list[i] to array[0]"
+
+
+def test_short_captions_repeating_the_previous_end_are_kept():
+    chunks = [
+        {"text": "is that right? no", "start": 0.0, "duration": 1.0},
+        {"text": "no", "start": 1.0, "duration": 1.0},
+        {"text": "right? no it is not", "start": 2.0, "duration": 1.0},
+        {"text": "no it is not", "start": 3.0, "duration": 1.0},
+    ]
+
+    texts = [chunk["text"] for chunk in TranscriptCompactor().run(chunks)]
+
+    assert texts == ["is that right? no", "no", "right? no it is not"]
@@ -0,0 +1,57 @@
+import pytest
+from youtube_transcript_api import TranscriptsDisabled, YouTubeTranscriptApi
+
+from core.transcript_cache import DISABLED, TranscriptCache
+from processors import transcript_fetcher
+from processors.transcript_fetcher import fetch_transcript_raw, prefetch
+
+CHUNKS = [{"text": "hello", "start": 0.0, "duration": 1.0}]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TranscriptCache(str(tmp_path / "transcripts.sqlite3"))
+    monkeypatch.setattr(
+        transcript_fetcher, "get_transcript_cache", lambda: cache
+    )
+    return cache
+
+
+def youtube_answers(monkeypatch, *answers):
+    # Makes the API return or raise each answer in turn.
+    answers = list(answers)
+
+    def get_transcript(video_id, languages):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(
+        YouTubeTranscriptApi, "get_transcript", get_transcript,
+        raising=False,
+    )
+
+
+def test_transient_errors_raise_and_are_not_cached(cache, monkeypatch):
+    youtube_answers(monkeypatch, ConnectionError("throttled"), CHUNKS)
+
+    with pytest.raises(ConnectionError):
+        fetch_transcript_raw("dQw4w9WgXcQ")
+
+    assert cache.get("dQw4w9WgXcQ", "en") is None
+    assert fetch_transcript_raw("dQw4w9WgXcQ") == CHUNKS
+
+
+def test_disabled_transcripts_are_remembered(cache, monkeypatch):
+    youtube_answers(monkeypatch, TranscriptsDisabled("dQw4w9WgXcQ"))
+
+    assert fetch_transcript_raw("dQw4w9WgXcQ") is None
+    assert fetch_transcript_raw("dQw4w9WgXcQ") is None
+    assert cache.get("dQw4w9WgXcQ", "en") == (DISABLED, None)
+
+
+def test_prefetch_reports_failed_downloads(cache, monkeypatch):
+    youtube_answers(monkeypatch, ConnectionError("throttled"))
+
+    assert prefetch(["dQw4w9WgXcQ"], workers=1) == {"dQw4w9WgXcQ": False}
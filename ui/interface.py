@@ -1,24 +1,94 @@
-import streamlit as st
 import os
-import json
-import shutil
+
+import streamlit as st
 
 from core.utils import extract_youtube_video_id
-from processors.section_splitter import SectionSplitter
-from processors.transcript_fetcher import fetch_transcript_raw
-from agents.summarizer_agent import summarize_sections_from_file
-from agents.research_agent import extract_topics_from_json, enrich_topic
-from agents.atlas_agent import (
-    build_lesson,
-    create_page,
-    append_blocks
-    )
+from pipeline.jobs import (
+    DONE,
+    FAILED,
+    FINISHED,
+    INCOMPLETE,
+    NO_TRANSCRIPT,
+    QUEUED,
+    get_job_queue,
+    start_workers
+)
+
+# Job worker processes started with the interface; 0 leaves the queue to
+# workers started separately with `python -m pipeline.jobs`.
+JOB_WORKERS = int(os.getenv("ATLAS_JOB_WORKERS", "2"))
+# Seconds between two refreshes of a job's progress
+POLL_SECONDS = 1.0
+
+
+@st.cache_resource
+def _start_job_workers():
+    # Cached as a resource, so the server starts its workers only once
+    # however many sessions and reruns it serves.
+    return start_workers(JOB_WORKERS)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _follow_job(job_id: str):
+    # Only this fragment reruns while the job is in progress; the whole
+    # page reruns once more when it has finished.
+    job = get_job_queue().get(job_id)
+    render_job(job)
+    if job["status"] in FINISHED:
+        st.rerun()
+
+
+def render_job(job: dict) -> None:
+    """
+    Renders a job's progress as one Streamlit status box per stage,
+    followed by its outcome.
+    """
+    stages = [entry for entry in job["log"] if entry["stage"]]
+    for entry in job["log"]:
+        if entry.get("summary"):
+            with st.expander("⏱️ Run summary"):
+                st.dataframe(entry["summary"], use_container_width=True)
+            continue
+        if not entry["stage"]:
+            continue
+        state = "complete"
+        if entry is stages[-1] and job["status"] not in FINISHED:
+            state = "running"
+        elif entry is stages[-1] and job["status"] != DONE:
+            state = "error"
+        status = st.status(
+            entry["stage"], expanded=state != "complete", state=state
+        )
+        for text in entry["messages"]:
+            status.write(text)
+        if entry.get("progress"):
+            fraction, text = entry["progress"]
+            status.progress(fraction, text=text)
+
+    if job["status"] == QUEUED:
+        st.info("⏳ Waiting for a free worker...")
+    elif job["status"] == DONE:
+        st.success("🏛️ **Your Notion page is ready!** "
+                   f"[Click here to view it]({job['url']})")
+    elif job["status"] == INCOMPLETE:
+        st.warning(
+            f"🏗️ {job['error']} [Open the page so far]({job['url']})"
+        )
+    elif job["status"] == NO_TRANSCRIPT:
+        st.error(job["error"])
+    elif job["status"] == FAILED:
+        st.error(f"Atlas stumbled: {job['error']}")
 
 
 def run_interface():
     """
     Run the Streamlit interface for the Atlas AI YouTube Transcript Fetcher.
+
+    Videos are processed by background job workers; the interface only
+    queues jobs and polls their progress.
     """
+    if JOB_WORKERS > 0:
+        _start_job_workers()
     st.markdown(
         "<h1 style='text-align: center; "
         "font-size: 3em; "
@@ -53,6 +123,9 @@ def run_interface():
     with st.form(key="input_form"):
         user_input = st.text_input("",
                                    placeholder="Enter YouTube video URL or ID")
+        start_fresh = st.checkbox(
+            "Start fresh (ignore progress saved by earlier runs)"
+        )
         submitted = st.form_submit_button("Start")
 
     if submitted:
@@ -64,96 +137,17 @@ def run_interface():
         if not video_id:
             st.error("Invalid YouTube URL or ID.")
         else:
-            with st.status("Extracting Transcript", expanded=True):
-                st.write(
-                    "📜 **Extracting ancient scrolls from YouTube archives...**"
-                )
-                chunks = fetch_transcript_raw(video_id)
-                if not chunks:
-                    st.error(
-                        "No transcript found or transcripts are disabled."
-                    )
-                    return
-
-            with st.status("Splitting Transcript", expanded=True):
-                st.write("🪓 **Splitting scroll into readable runes...**")
-                splitter = SectionSplitter()
-                sections = splitter.run(chunks)
-
-            with st.status("Summarization Ritual", expanded=True):
-                st.write("🔥 **Preparing for Summarization Ritual...**")
-                output_folder = "transcript_files"
-
-                if os.path.exists(output_folder):
-                    shutil.rmtree(output_folder)
-                os.makedirs(output_folder, exist_ok=True)
-
-                output_path = os.path.join(output_folder,
-                                           f"sections_{video_id}.json")
-                with open(output_path, "w", encoding="utf-8") as f:
-                    json.dump(sections, f, ensure_ascii=False, indent=2)
-
-                st.write(
-                    "✍🏻 **Summarizer Agent is transcribing each rune with "
-                    "insight…**"
-                )
-                summarized_path = os.path.join(
-                    output_folder, f"summarized_sections_{video_id}.json")
-                summarized_sections = summarize_sections_from_file(output_path)
-                with open(summarized_path, "w", encoding="utf-8") as f:
-                    json.dump(summarized_sections, f, ensure_ascii=False,
-                              indent=2)
-
-            with st.status("Analyzing Topics",
-                           expanded=True):
-                st.write(
-                    "🕵🏼‍♂️ **Research Agent is analyzing and "
-                    "extracting key topics...**"
-                )
-                topics = extract_topics_from_json(summarized_path)
-                st.write(
-                    "🔍 Topics identified for research: "
-                    f"{' | '.join(topics)}"
-                )
-                enrichment_data = {}
-
-            with st.status("Enriching Topics", expanded=True):
-                for topic in topics:
-                    st.write(
-                        f"📚 **Researching: {topic}...**"
-                    )
-                    enrichment_data[topic] = enrich_topic(topic)
-                    with open(os.path.join(
-                        output_folder, f"enrichment_data_{video_id}.json"
-                    ), "w", encoding="utf-8") as enrichment_file:
-                        json.dump(enrichment_data, enrichment_file,
-                                  ensure_ascii=False, indent=2)
-
-            with st.status("Crafting Notion Page", expanded=True):
-                st.write(
-                    "🏛️ **Atlas is crafting your Notion page...**"
-                )
-                blocks = []
-
-                for section in summarized_sections:
-                    summary = section.get("summary", "")
-                    matched_topics = next(
-                        (
-                            key
-                            for key in enrichment_data
-                            if key.lower() in summary.lower()
-                        ),
-                        None
-                    )
-                    enrichment = enrichment_data.get(
-                        matched_topics, ""
-                    ) if matched_topics else ""
-                    blocks.extend(build_lesson(summary, enrichment))
-
-                page_id = create_page(f"YouTube Video ID – {video_id}")
-                append_blocks(page_id, blocks)
-                cleaned_page_id = page_id.replace('-', '')
-                notion_link = f"https://www.notion.so/{cleaned_page_id}"
-
-            st.success("🏛️ **Your Notion page is ready!** "
-                       f"[Click here to view it]({notion_link})")
+            # The job ID lives in the URL, so a refreshed or reopened tab
+            # keeps following the same job.
+            st.query_params["job"] = get_job_queue().enqueue(
+                video_id, fresh=start_fresh
+            )
+
+    job_id = st.query_params.get("job")
+    job = get_job_queue().get(job_id) if job_id else None
+    if job is None:
+        return
+    if job["status"] in FINISHED:
+        render_job(job)
+    else:
+        _follow_job(job_id)